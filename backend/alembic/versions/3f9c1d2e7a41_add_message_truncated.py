@@ -0,0 +1,30 @@
+"""add_message_truncated
+
+Revision ID: 3f9c1d2e7a41
+Revises: d877b82a9bb3
+Create Date: 2026-10-19 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d2e7a41'
+down_revision: Union[str, None] = 'd877b82a9bb3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Flag assistant messages cut off by a client disconnect
+    op.add_column(
+        'messages',
+        sa.Column('truncated', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('messages', 'truncated')
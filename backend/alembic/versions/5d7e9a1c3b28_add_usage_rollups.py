@@ -0,0 +1,60 @@
+"""add_usage_rollups
+
+Revision ID: 5d7e9a1c3b28
+Revises: 8c2d4e6f1a3b
+Create Date: 2026-10-19 16:41:08.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7e9a1c3b28'
+down_revision: Union[str, None] = '8c2d4e6f1a3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Existing enum type from usage_records
+request_type = postgresql.ENUM(
+    'CHAT', 'RAG', 'AGENT', 'EMBEDDING', 'IMAGE', 'TOOL', name='requesttype', create_type=False
+)
+
+
+def _create_rollup_table(name: str) -> None:
+    op.create_table(name,
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('request_type', request_type, nullable=False),
+    sa.Column('requests', sa.Integer(), nullable=False),
+    sa.Column('tokens_input', sa.BigInteger(), nullable=False),
+    sa.Column('tokens_output', sa.BigInteger(), nullable=False),
+    sa.Column('tokens_total', sa.BigInteger(), nullable=False),
+    sa.Column('credits', sa.BigInteger(), nullable=False),
+    sa.Column('cost', sa.Numeric(precision=14, scale=6), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'bucket_start', 'model', 'request_type', name=f'uq_{name}_bucket')
+    )
+    op.create_index(op.f(f'ix_{name}_bucket_start'), name, ['bucket_start'], unique=False)
+
+
+def upgrade() -> None:
+    # Usage rollups; fill for existing records with
+    # `python -m app.scripts.usage_rollups backfill`
+    _create_rollup_table('usage_hourly')
+    _create_rollup_table('usage_daily')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_usage_daily_bucket_start'), table_name='usage_daily')
+    op.drop_table('usage_daily')
+    op.drop_index(op.f('ix_usage_hourly_bucket_start'), table_name='usage_hourly')
+    op.drop_table('usage_hourly')
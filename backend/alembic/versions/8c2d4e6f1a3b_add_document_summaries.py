@@ -0,0 +1,30 @@
+"""add_document_summaries
+
+Revision ID: 8c2d4e6f1a3b
+Revises: 3f9c1d2e7a41
+Create Date: 2026-10-19 14:03:27.519482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2d4e6f1a3b'
+down_revision: Union[str, None] = '3f9c1d2e7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Summaries precomputed at ingestion
+    op.add_column('documents', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('documents', sa.Column('section_summaries', postgresql.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'section_summaries')
+    op.drop_column('documents', 'summary')
@@ -0,0 +1,45 @@
+"""add_messages_conversation_created_index
+
+Revision ID: e6a4b2c8d019
+Revises: 5d7e9a1c3b28
+Create Date: 2026-10-19 17:58:23.611402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a4b2c8d019'
+down_revision: Union[str, None] = '5d7e9a1c3b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-conversation range scans by created_at; the leading column also
+    # serves conversation_id lookups, so the single-column index goes.
+    # Built concurrently (outside the migration transaction) so writes to
+    # messages are not blocked while the index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_conversation_created',
+            'messages',
+            ['conversation_id', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(op.f('ix_messages_conversation_id'), table_name='messages', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_messages_conversation_id'),
+            'messages',
+            ['conversation_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_messages_conversation_created', table_name='messages', postgresql_concurrently=True)
@@ -0,0 +1,151 @@
+"""add_user_counters
+
+Revision ID: f1c7e3a9b052
+Revises: e6a4b2c8d019
+Create Date: 2026-10-19 19:07:52.340716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7e3a9b052'
+down_revision: Union[str, None] = 'e6a4b2c8d019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables counted with the generic row trigger: (table, counter column)
+COUNTED_TABLES = [
+    ('conversations', 'conversations_count'),
+    ('documents', 'documents_count'),
+    ('agents', 'agents_count'),
+]
+
+
+def upgrade() -> None:
+    op.create_table('user_counters',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('conversations_count', sa.Integer(), nullable=False),
+    sa.Column('documents_count', sa.Integer(), nullable=False),
+    sa.Column('agents_count', sa.Integer(), nullable=False),
+    sa.Column('messages_count', sa.BigInteger(), nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # One counters row per user, created with the user
+    op.execute("""
+        CREATE OR REPLACE FUNCTION user_counters_create() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO user_counters (user_id, conversations_count, documents_count, agents_count, messages_count)
+            VALUES (NEW.id, 0, 0, 0, 0)
+            ON CONFLICT (user_id) DO NOTHING;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER user_counters_create_trigger
+        AFTER INSERT ON users
+        FOR EACH ROW
+        EXECUTE FUNCTION user_counters_create();
+    """)
+
+    # +1/-1 on the counter named by the trigger argument for the row's user.
+    # Rows deleted with their user update nothing (the counters row is gone).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION user_counters_count_row() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' AND NEW.user_id IS NOT NULL THEN
+                EXECUTE format('UPDATE user_counters SET %1$I = %1$I + 1, updated_at = now() WHERE user_id = $1', TG_ARGV[0])
+                USING NEW.user_id;
+            ELSIF TG_OP = 'DELETE' AND OLD.user_id IS NOT NULL THEN
+                EXECUTE format('UPDATE user_counters SET %1$I = %1$I - 1, updated_at = now() WHERE user_id = $1', TG_ARGV[0])
+                USING OLD.user_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for table, column in COUNTED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_user_counters_trigger
+            AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW
+            EXECUTE FUNCTION user_counters_count_row('{column}');
+        """)
+
+    # Messages are counted for the conversation's user. A deleted
+    # conversation subtracts its messages up front; the cascaded message
+    # deletes then no longer find the conversation and update nothing.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION user_counters_count_message() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE user_counters SET messages_count = messages_count + 1, updated_at = now()
+                WHERE user_id = (SELECT user_id FROM conversations WHERE id = NEW.conversation_id);
+            ELSE
+                UPDATE user_counters SET messages_count = messages_count - 1, updated_at = now()
+                WHERE user_id = (SELECT user_id FROM conversations WHERE id = OLD.conversation_id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER messages_user_counters_trigger
+        AFTER INSERT OR DELETE ON messages
+        FOR EACH ROW
+        EXECUTE FUNCTION user_counters_count_message();
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION user_counters_conversation_deleted() RETURNS trigger AS $$
+        BEGIN
+            UPDATE user_counters
+            SET messages_count = messages_count - (SELECT count(*) FROM messages WHERE conversation_id = OLD.id),
+                updated_at = now()
+            WHERE user_id = OLD.user_id;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER conversations_user_counters_messages_trigger
+        BEFORE DELETE ON conversations
+        FOR EACH ROW
+        EXECUTE FUNCTION user_counters_conversation_deleted();
+    """)
+
+    # Counters for existing users
+    op.execute("""
+        INSERT INTO user_counters (user_id, conversations_count, documents_count, agents_count, messages_count, reconciled_at)
+        SELECT
+            u.id,
+            (SELECT count(*) FROM conversations c WHERE c.user_id = u.id),
+            (SELECT count(*) FROM documents d WHERE d.user_id = u.id),
+            (SELECT count(*) FROM agents a WHERE a.user_id = u.id),
+            (SELECT count(*) FROM messages m JOIN conversations c ON c.id = m.conversation_id WHERE c.user_id = u.id),
+            now()
+        FROM users u;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS conversations_user_counters_messages_trigger ON conversations;")
+    op.execute("DROP TRIGGER IF EXISTS messages_user_counters_trigger ON messages;")
+    for table, _ in COUNTED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_user_counters_trigger ON {table};")
+    op.execute("DROP TRIGGER IF EXISTS user_counters_create_trigger ON users;")
+
+    op.execute("DROP FUNCTION IF EXISTS user_counters_conversation_deleted();")
+    op.execute("DROP FUNCTION IF EXISTS user_counters_count_message();")
+    op.execute("DROP FUNCTION IF EXISTS user_counters_count_row();")
+    op.execute("DROP FUNCTION IF EXISTS user_counters_create();")
+
+    op.drop_table('user_counters')
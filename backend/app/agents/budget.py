@@ -0,0 +1,169 @@
+"""Per-request cost and latency budget for agent runs.
+
+`AgentEngine` creates one `AgentBudget` per request and checks it between
+iterations: every iteration re-sends the whole conversation, so before the
+next LLM call the engine estimates its cost and, if the budget cannot cover
+it, asks the model for a final answer from what it has gathered instead of
+calling more tools. Tools receive the budget as the `budget` keyword
+argument and can read what is left.
+
+Limits come from `settings.agent_max_*` and can be overridden per agent
+with the same keys (without the `agent_` prefix) in the agent's settings.
+Each iteration is recorded as a timing span, exported to OpenTelemetry
+when tracing is enabled; `summary()` goes on the AgentResponse.
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from app.config import settings
+from app.core.telemetry import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Reasons the budget ran out
+BUDGET_TOKENS = "tokens"
+BUDGET_LATENCY = "latency"
+BUDGET_TOOL_CALLS = "tool_calls"
+
+
+@dataclass
+class IterationSpan:
+    """Timing and cost of one agent iteration."""
+
+    iteration: int
+    started_at: float  # Seconds since the request started
+    llm_ms: int = 0
+    tools_ms: int = 0
+    tool_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    final: bool = False  # Budget fallback answer
+
+
+@dataclass
+class AgentBudget:
+    """Token, latency and tool-call limits for one agent request (None = unlimited)."""
+
+    max_tokens: int | None = None
+    max_latency_seconds: float | None = None
+    max_tool_calls: int | None = None
+    tokens_used: int = 0
+    tool_calls: int = 0
+    exhausted: str | None = None  # Which limit triggered the fallback answer
+    spans: list[IterationSpan] = field(default_factory=list)
+    _started: float = field(default_factory=time.monotonic, repr=False)
+    _started_ns: int = field(default_factory=time.time_ns, repr=False)
+
+    @classmethod
+    def from_settings(cls, agent_settings: dict[str, Any] | None = None) -> "AgentBudget":
+        """Create a budget from global settings and per-agent overrides."""
+        agent_settings = agent_settings or {}
+
+        def limit(key: str) -> Any:
+            value = agent_settings.get(key, getattr(settings, f"agent_{key}"))
+            # Zero or negative means unlimited
+            return value if value and value > 0 else None
+
+        return cls(
+            max_tokens=limit("max_total_tokens"),
+            max_latency_seconds=limit("max_latency_seconds"),
+            max_tool_calls=limit("max_tool_calls"),
+        )
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.monotonic() - self._started
+
+    @property
+    def remaining_tokens(self) -> int | None:
+        if self.max_tokens is None:
+            return None
+        return max(0, self.max_tokens - self.tokens_used)
+
+    @property
+    def remaining_seconds(self) -> float | None:
+        if self.max_latency_seconds is None:
+            return None
+        return max(0.0, self.max_latency_seconds - self.elapsed_seconds)
+
+    @property
+    def remaining_tool_calls(self) -> int | None:
+        if self.max_tool_calls is None:
+            return None
+        return max(0, self.max_tool_calls - self.tool_calls)
+
+    def add_usage(self, usage: dict[str, int] | None) -> None:
+        """Count one LLM call's tokens."""
+        if usage:
+            self.tokens_used += usage.get("total_tokens", 0)
+
+    def allow_tool_calls(self, requested: int) -> int:
+        """Reserve tool calls, returning how many of `requested` may run."""
+        remaining = self.remaining_tool_calls
+        allowed = requested if remaining is None else min(requested, remaining)
+        self.tool_calls += allowed
+        return allowed
+
+    def check(self, next_prompt_tokens: int, answer_tokens: int) -> str | None:
+        """Check whether another tool-calling iteration fits the budget.
+
+        Args:
+            next_prompt_tokens: Estimated prompt size of the next LLM call
+            answer_tokens: Tokens to keep for a final answer after it
+
+        Returns:
+            The exhausted limit (BUDGET_*), or None if the iteration fits
+        """
+        remaining_tokens = self.remaining_tokens
+        # The next call and a final answer after it each re-send the prompt
+        if remaining_tokens is not None and remaining_tokens < 2 * next_prompt_tokens + answer_tokens:
+            return BUDGET_TOKENS
+
+        remaining_seconds = self.remaining_seconds
+        if remaining_seconds is not None and self.spans:
+            # Assume the next iteration takes as long as the slowest so far
+            slowest = max((span.llm_ms + span.tools_ms) / 1000 for span in self.spans)
+            if remaining_seconds < 2 * slowest:
+                return BUDGET_LATENCY
+
+        if self.remaining_tool_calls == 0:
+            return BUDGET_TOOL_CALLS
+        return None
+
+    def start_iteration(self, iteration: int, final: bool = False) -> IterationSpan:
+        """Start timing an iteration."""
+        span = IterationSpan(
+            iteration=iteration,
+            started_at=round(self.elapsed_seconds, 3),
+            final=final,
+        )
+        self.spans.append(span)
+        return span
+
+    def end_iteration(self, span: IterationSpan) -> None:
+        """Export a finished iteration span to tracing (if enabled)."""
+        tracer = get_tracer(__name__)
+        if tracer is None:
+            return
+        start_ns = self._started_ns + int(span.started_at * 1e9)
+        end_ns = start_ns + (span.llm_ms + span.tools_ms) * 1_000_000
+        otel_span = tracer.start_span("agent.iteration", start_time=start_ns)
+        for key, value in asdict(span).items():
+            otel_span.set_attribute(f"agent.{key}", value)
+        otel_span.end(end_time=end_ns)
+
+    def summary(self) -> dict[str, Any]:
+        """Get the budget use and iteration spans for the response."""
+        return {
+            "tokens_used": self.tokens_used,
+            "max_tokens": self.max_tokens,
+            "elapsed_ms": int(self.elapsed_seconds * 1000),
+            "max_latency_ms": int(self.max_latency_seconds * 1000) if self.max_latency_seconds else None,
+            "tool_calls": self.tool_calls,
+            "max_tool_calls": self.max_tool_calls,
+            "exhausted": self.exhausted,
+            "iterations": [asdict(span) for span in self.spans],
+        }
@@ -0,0 +1,306 @@
+"""Immutable, versioned agent definitions.
+
+An `AgentDefinition` is everything `AgentEngine` needs to run an agent:
+persona, tools, settings and the system prompt already compiled for each
+tool-calling mode. Definitions are frozen and shared between requests;
+callers get copies of anything mutable.
+
+`AgentDefinitionCache` keeps one definition per agent:
+
+- System agents (YAML) are versioned by the file's mtime and recompiled
+  when the file changes.
+- User agents (DB) are versioned by `updated_at`. Entries are dropped by
+  `invalidate_slug` on create/update/delete, again once the change
+  commits (a lookup in between may re-cache the old row), and expire after
+  `settings.agent_cache_ttl_seconds` so other workers pick up changes.
+  At most `settings.agent_cache_max_user_entries` lookups are kept, least
+  recently used first out.
+"""
+
+import copy
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.agents.tools import TOOL_REGISTRY, BaseTool
+from app.config import settings
+from app.services.agent_loader import agent_loader
+
+logger = logging.getLogger(__name__)
+
+# Session.info key of agent slugs to invalidate again after commit
+PENDING_INVALIDATIONS = "agent_definition_invalidations"
+
+# Tool calling modes: native function calling, or <tool> tags parsed from text
+TOOL_MODE_NATIVE = "native"
+TOOL_MODE_PROMPT = "prompt"
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant."
+
+TOOL_ERROR_HINT = "If a tool returns an error, acknowledge it and try to help without that tool."
+
+
+def compile_system_prompt(persona_prompt: str, tools: Mapping[str, BaseTool], tool_mode: str) -> str:
+    """Build the system prompt with agent persona and tools description.
+
+    Args:
+        persona_prompt: Agent persona prompt
+        tools: Tools available to the agent, by name
+        tool_mode: TOOL_MODE_NATIVE or TOOL_MODE_PROMPT
+
+    Returns:
+        Complete system prompt
+    """
+    if not tools:
+        return persona_prompt
+
+    # Native mode sends tool descriptions as function schemas instead
+    if tool_mode == TOOL_MODE_NATIVE:
+        return f"{persona_prompt}\n\n{TOOL_ERROR_HINT}"
+
+    tools_desc = "\n\nYou have access to the following tools:\n"
+    for name, tool in tools.items():
+        tools_desc += f"\n- {name}: {tool.description}"
+
+    tools_desc += f"""
+
+To use a tool, include it in your response like this:
+<tool>{{"name": "tool_name", "params": {{"param1": "value1"}}}}</tool>
+
+You can use multiple tools by including multiple <tool>...</tool> blocks.
+After using tools, provide your final response based on the tool results.
+
+{TOOL_ERROR_HINT}"""
+    return persona_prompt + tools_desc
+
+
+@dataclass(frozen=True)
+class AgentDefinition:
+    """Compiled agent configuration (read-only, shared between requests)."""
+
+    slug: str
+    version: str
+    persona_prompt: str
+    tool_names: tuple[str, ...]
+    settings: Mapping[str, Any]
+    system_prompts: Mapping[str, str]
+    tool_schemas: tuple[dict[str, Any], ...]
+    document_ids: tuple[uuid.UUID, ...] = ()
+    agent_id: uuid.UUID | None = None
+
+    @classmethod
+    def compile(
+        cls,
+        slug: str,
+        version: str,
+        persona_prompt: str | None,
+        tool_names: list[str] | None,
+        agent_settings: dict[str, Any] | None,
+        document_ids: list[uuid.UUID] | None = None,
+        agent_id: uuid.UUID | None = None,
+    ) -> "AgentDefinition":
+        """Compile a definition, copying every input so later edits cannot leak in."""
+        persona_prompt = persona_prompt or ""
+        tools: dict[str, BaseTool] = {}
+        for tool_name in tool_names or []:
+            if tool_name in TOOL_REGISTRY:
+                tools[tool_name] = TOOL_REGISTRY[tool_name]
+            else:
+                logger.warning(f"Unknown tool '{tool_name}' for agent '{slug}'")
+
+        return cls(
+            slug=slug,
+            version=version,
+            persona_prompt=persona_prompt,
+            tool_names=tuple(tools),
+            settings=MappingProxyType(copy.deepcopy(agent_settings or {})),
+            system_prompts=MappingProxyType({
+                mode: compile_system_prompt(persona_prompt, tools, mode)
+                for mode in (TOOL_MODE_NATIVE, TOOL_MODE_PROMPT)
+            }),
+            tool_schemas=tuple(tool.get_schema() for tool in tools.values()),
+            document_ids=tuple(document_ids or ()),
+            agent_id=agent_id,
+        )
+
+    @property
+    def tools(self) -> dict[str, BaseTool]:
+        """Tool instances for this agent (a new dict per call)."""
+        return {name: TOOL_REGISTRY[name] for name in self.tool_names}
+
+    def settings_copy(self) -> dict[str, Any]:
+        """Get a mutable copy of the agent settings."""
+        return copy.deepcopy(dict(self.settings))
+
+
+def definition_from_config(
+    slug: str,
+    version: str,
+    config: dict[str, Any],
+    document_ids: list[uuid.UUID] | None = None,
+    agent_id: uuid.UUID | None = None,
+) -> AgentDefinition:
+    """Compile a definition from a YAML-style config dict."""
+    return AgentDefinition.compile(
+        slug=slug,
+        version=version,
+        persona_prompt=(config.get("persona") or {}).get("system_prompt"),
+        tool_names=config.get("tools", []),
+        agent_settings=config.get("settings", {}),
+        document_ids=document_ids,
+        agent_id=agent_id,
+    )
+
+
+@dataclass
+class _UserEntry:
+    """Cached lookup of a DB agent (None = no such agent for this user)."""
+
+    definition: AgentDefinition | None
+    expires_at: float
+
+
+class AgentDefinitionCache:
+    """Per-process cache of compiled agent definitions."""
+
+    def __init__(self) -> None:
+        self._system: dict[str, AgentDefinition] = {}
+        self._user: OrderedDict[tuple[str, uuid.UUID], _UserEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.compiles = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get_system(self, slug: str) -> AgentDefinition | None:
+        """Get a system agent definition, recompiling it if its YAML changed."""
+        version = agent_loader.get_version(slug)
+        if version is None:
+            self._system.pop(slug, None)
+            return None
+
+        cached = self._system.get(slug)
+        if cached is not None and cached.version == version:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        if cached is not None:
+            # The YAML file changed since it was compiled
+            self.invalidations += 1
+        config = agent_loader.load_agent(slug)
+        if not config:
+            return None
+
+        definition = definition_from_config(slug, version, config)
+        self.compiles += 1
+        self._system[slug] = definition
+        return definition
+
+    async def get(
+        self,
+        db: AsyncSession,
+        slug: str,
+        user_id: uuid.UUID,
+    ) -> AgentDefinition | None:
+        """Get the definition for a user's DB agent, falling back to system agents.
+
+        Args:
+            db: Database session (only used on a cache miss)
+            slug: Agent slug
+            user_id: User ID for the ownership check
+
+        Returns:
+            Agent definition or None if not found
+        """
+        # Imported here: the agent service imports this module for invalidation
+        from app.services import agent as agent_service
+
+        key = (slug, user_id)
+        entry = self._user.get(key)
+        now = time.monotonic()
+        if entry is not None and entry.expires_at > now:
+            self.hits += 1
+            self._user.move_to_end(key)
+            definition = entry.definition
+        else:
+            self.misses += 1
+            agent = await agent_service.get_agent_by_slug(db=db, slug=slug, user_id=user_id)
+            definition = None
+            if agent is not None:
+                definition = AgentDefinition.compile(
+                    slug=slug,
+                    version=agent.updated_at.isoformat() if agent.updated_at else "",
+                    persona_prompt=agent.system_prompt or DEFAULT_SYSTEM_PROMPT,
+                    tool_names=agent.tools,
+                    agent_settings=agent.config,
+                    document_ids=agent.document_ids,
+                    agent_id=agent.id,
+                )
+                self.compiles += 1
+            self._user[key] = _UserEntry(
+                definition=definition,
+                expires_at=now + settings.agent_cache_ttl_seconds,
+            )
+            self._user.move_to_end(key)
+            while len(self._user) > settings.agent_cache_max_user_entries:
+                self._user.popitem(last=False)
+                self.evictions += 1
+
+        return definition or self.get_system(slug)
+
+    def invalidate_slug(self, slug: str, db: AsyncSession | None = None) -> None:
+        """Drop cached DB agent lookups for a slug (after create/update/delete).
+
+        With `db`, the lookups are dropped again when the session commits.
+        """
+        stale = [key for key in self._user if key[0] == slug]
+        for key in stale:
+            del self._user[key]
+        self.invalidations += len(stale)
+        if db is not None:
+            db.sync_session.info.setdefault(PENDING_INVALIDATIONS, set()).add(slug)
+
+    def clear(self) -> None:
+        """Drop all cached definitions."""
+        self.invalidations += len(self._system) + len(self._user)
+        self._system.clear()
+        self._user.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Get cache metrics."""
+        lookups = self.hits + self.misses
+        return {
+            "system_entries": len(self._system),
+            "user_entries": len(self._user),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "compiles": self.compiles,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+
+# Singleton instance
+agent_definitions = AgentDefinitionCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for slug in session.info.pop(PENDING_INVALIDATIONS, ()):
+        agent_definitions.invalidate_slug(slug)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
@@ -1,18 +1,38 @@
 """Agent engine for processing chat with tools."""
 
+import asyncio
 import json
 import logging
 import re
+import time
 import uuid
 from collections.abc import AsyncIterator
+from contextlib import aclosing
 from dataclasses import dataclass, field
 from typing import Any
 
+import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agents.tools import TOOL_REGISTRY, BaseTool
-from app.providers.llm import ChatMessage, llm_client
-from app.services.agent_loader import agent_loader
+from app.agents.budget import AgentBudget, IterationSpan
+from app.agents.definitions import (
+    DEFAULT_SYSTEM_PROMPT,
+    TOOL_MODE_NATIVE,
+    TOOL_MODE_PROMPT,
+    AgentDefinition,
+    agent_definitions,
+)
+from app.agents.formatting import ToolResultFormatter, estimate_tokens
+from app.agents.tools import BaseTool
+from app.config import settings
+from app.core.database import SessionLocal
+from app.providers.llm import (
+    ChatCompletionResponse,
+    ChatMessage,
+    StreamStats,
+    ToolCallRequest,
+    llm_client,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +42,25 @@ TOOL_CALL_PATTERN = re.compile(
     re.DOTALL
 )
 
+TOOL_TAG_OPEN = "<tool>"
+TOOL_TAG_CLOSE = "</tool>"
+
+MAX_ITERATIONS_MESSAGE = "I've reached my processing limit. Please try simplifying your request."
+
+# Sent when the budget runs low, for a last call without tools
+FINAL_ANSWER_PROMPT = (
+    "The time and cost budget for this request is nearly used up. "
+    "Answer the question now using only the information gathered so far. "
+    "Do not call any tools. If the information is incomplete, say what is missing."
+)
+
+BUDGET_EXHAUSTED_MESSAGE = (
+    "I ran out of time for this request before I could finish. "
+    "Please try again or ask a narrower question."
+)
+
+TOOL_CALL_LIMIT_ERROR = "Tool call limit for this request reached; answer with the information you have"
+
 
 @dataclass
 class ToolCall:
@@ -29,6 +68,61 @@ class ToolCall:
 
     name: str
     params: dict[str, Any]
+    id: str | None = None  # Provider call ID (native mode only)
+
+
+class ToolTagStreamParser:
+    """Separate <tool> blocks from streamed text as chunks arrive.
+
+    Plain text is returned from `feed` as soon as it cannot be part of a tool
+    tag; only a possible tag opening or an open tag is held back.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._in_tag = False
+        self.blocks: list[str] = []
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the text that is safe to forward."""
+        self._buffer += chunk
+        text = []
+        while True:
+            if self._in_tag:
+                end = self._buffer.find(TOOL_TAG_CLOSE)
+                if end == -1:
+                    break
+                self.blocks.append(self._buffer[:end])
+                self._buffer = self._buffer[end + len(TOOL_TAG_CLOSE):]
+                self._in_tag = False
+                continue
+
+            start = self._buffer.find(TOOL_TAG_OPEN)
+            if start == -1:
+                # Hold back a suffix that may be the start of "<tool>"
+                keep = self._partial_open_length()
+                split = len(self._buffer) - keep
+                text.append(self._buffer[:split])
+                self._buffer = self._buffer[split:]
+                break
+            text.append(self._buffer[:start])
+            self._buffer = self._buffer[start + len(TOOL_TAG_OPEN):]
+            self._in_tag = True
+        return "".join(text)
+
+    def flush(self) -> str:
+        """Return held-back text at the end of the stream (unclosed tags included)."""
+        text = (TOOL_TAG_OPEN if self._in_tag else "") + self._buffer
+        self._buffer = ""
+        self._in_tag = False
+        return text
+
+    def _partial_open_length(self) -> int:
+        """Length of the longest buffer suffix that is a prefix of "<tool>"."""
+        for length in range(min(len(TOOL_TAG_OPEN) - 1, len(self._buffer)), 0, -1):
+            if self._buffer.endswith(TOOL_TAG_OPEN[:length]):
+                return length
+        return 0
 
 
 @dataclass
@@ -41,6 +135,8 @@ class AgentResponse:
     sources: list[dict[str, Any]] = field(default_factory=list)
     model: str | None = None
     usage: dict[str, int] | None = None
+    tool_result_stats: dict[str, int] | None = None
+    budget: dict[str, Any] | None = None
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary."""
@@ -51,6 +147,8 @@ class AgentResponse:
             "sources": self.sources,
             "model": self.model,
             "usage": self.usage,
+            "tool_result_stats": self.tool_result_stats,
+            "budget": self.budget,
         }
 
 
@@ -64,6 +162,7 @@ class AgentEngine:
         system_prompt: str | None = None,
         tools_list: list[str] | None = None,
         config: dict[str, Any] | None = None,
+        definition: AgentDefinition | None = None,
     ) -> None:
         """Initialize agent engine.
 
@@ -73,77 +172,65 @@ class AgentEngine:
             system_prompt: Optional system prompt override (for user agents)
             tools_list: Optional tools list override (for user agents)
             config: Optional config override (for user agents)
+            definition: Compiled definition (from agent_definitions); skips
+                loading and overrides entirely
         """
         self.agent_slug = agent_slug
-        self.document_ids = document_ids or []
+        if definition is None:
+            definition = self._resolve_definition(agent_slug, system_prompt, tools_list, config)
+        self.definition = definition
+        self.document_ids = document_ids or list(definition.document_ids)
+
+        # Shared definitions are read-only; take copies of what may change
+        self.tools: dict[str, BaseTool] = definition.tools
+        self.settings = definition.settings_copy()
+        self.temperature = self.settings.get("temperature", 0.7)
+        self.max_tokens = self.settings.get("max_tokens", 4096)
+
+        # Agents can opt out of native tool calling for models without support
+        self.tool_mode = self.settings.get("tool_mode", settings.agent_tool_mode)
+        self.tool_schemas = list(definition.tool_schemas)
 
+    @staticmethod
+    def _resolve_definition(
+        agent_slug: str,
+        system_prompt: str | None,
+        tools_list: list[str] | None,
+        config: dict[str, Any] | None,
+    ) -> AgentDefinition:
+        """Get the cached YAML definition, or compile one with the given overrides.
+
+        Raises:
+            ValueError: If the agent does not exist and no overrides are given
+        """
         # Try to load from YAML first (system agents)
-        self.config = agent_loader.load_agent(agent_slug)
+        base = agent_definitions.get_system(agent_slug)
+        if system_prompt is None and tools_list is None and not config:
+            if base is None:
+                raise ValueError(f"Agent not found: {agent_slug}")
+            return base
 
         # If not found in YAML, use provided config (user agents)
-        if not self.config and (system_prompt or tools_list):
-            self.config = {
-                "agent": {"slug": agent_slug},
-                "persona": {"system_prompt": system_prompt or "You are a helpful assistant."},
-                "tools": tools_list or [],
-                "settings": config or {},
-            }
-        elif not self.config:
+        if base is None and not (system_prompt or tools_list):
             raise ValueError(f"Agent not found: {agent_slug}")
 
-        # Override system prompt if provided
-        if system_prompt:
-            if "persona" not in self.config:
-                self.config["persona"] = {}
-            self.config["persona"]["system_prompt"] = system_prompt
-
-        # Override tools if provided
-        if tools_list is not None:
-            self.config["tools"] = tools_list
-
-        # Load tools for this agent
-        self.tools: dict[str, BaseTool] = {}
-        agent_tools = self.config.get("tools", [])
-        for tool_name in agent_tools:
-            if tool_name in TOOL_REGISTRY:
-                self.tools[tool_name] = TOOL_REGISTRY[tool_name]
-            else:
-                logger.warning(f"Unknown tool '{tool_name}' for agent '{agent_slug}'")
-
-        # Get settings (merge with provided config)
-        self.settings = self.config.get("settings", {})
-        if config:
-            self.settings.update(config)
-        self.temperature = self.settings.get("temperature", 0.7)
-        self.max_tokens = self.settings.get("max_tokens", 4096)
+        # Overrides produce a one-off definition on top of the YAML one
+        return AgentDefinition.compile(
+            slug=agent_slug,
+            version=base.version if base else "",
+            persona_prompt=system_prompt or (base.persona_prompt if base else DEFAULT_SYSTEM_PROMPT),
+            tool_names=tools_list if tools_list is not None else list(base.tool_names if base else ()),
+            agent_settings={**(base.settings_copy() if base else {}), **(config or {})},
+        )
 
     def _build_system_prompt(self) -> str:
-        """Build system prompt with agent persona and tools description.
+        """Get the precompiled system prompt for the current tool mode.
 
         Returns:
             Complete system prompt
         """
-        # Get base persona prompt
-        persona_prompt = agent_loader.get_system_prompt(self.agent_slug) or ""
-
-        # Add tools description if any tools are available
-        if self.tools:
-            tools_desc = "\n\nYou have access to the following tools:\n"
-            for name, tool in self.tools.items():
-                tools_desc += f"\n- {name}: {tool.description}"
-
-            tools_desc += """
-
-To use a tool, include it in your response like this:
-<tool>{"name": "tool_name", "params": {"param1": "value1"}}</tool>
-
-You can use multiple tools by including multiple <tool>...</tool> blocks.
-After using tools, provide your final response based on the tool results.
-
-If a tool returns an error, acknowledge it and try to help without that tool."""
-            return persona_prompt + tools_desc
-
-        return persona_prompt
+        prompts = self.definition.system_prompts
+        return prompts.get(self.tool_mode, prompts[TOOL_MODE_PROMPT])
 
     def _parse_tool_calls(self, response: str) -> list[ToolCall]:
         """Parse tool calls from LLM response.
@@ -170,6 +257,197 @@ If a tool returns an error, acknowledge it and try to help without that tool."""
 
         return tool_calls
 
+    def _parse_native_tool_calls(self, requests: list[ToolCallRequest]) -> list[ToolCall]:
+        """Convert provider tool calls to tool calls.
+
+        Args:
+            requests: Tool calls from the LLM response
+
+        Returns:
+            List of parsed tool calls
+        """
+        tool_calls = []
+        for request in requests:
+            try:
+                params = json.loads(request.arguments or "{}")
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to parse tool arguments: {request.arguments}, error: {e}")
+                params = {}
+            if not isinstance(params, dict):
+                params = {}
+            tool_calls.append(ToolCall(name=request.name, params=params, id=request.id))
+        return tool_calls
+
+    def _get_tool_calls(self, response: ChatCompletionResponse) -> list[ToolCall]:
+        """Get tool calls from an LLM response in the current tool mode."""
+        if self.tool_mode == TOOL_MODE_NATIVE:
+            return self._parse_native_tool_calls(response.tool_calls)
+        return self._parse_tool_calls(response.content)
+
+    async def _complete(
+        self,
+        all_messages: list[ChatMessage],
+        answer_max_tokens: int | None = None,
+    ) -> ChatCompletionResponse:
+        """Call the LLM, passing tool schemas in native mode.
+
+        Falls back to prompt mode if the model rejects the `tools` parameter.
+
+        Args:
+            all_messages: Conversation including the system prompt
+            answer_max_tokens: If set, a final answer is requested: tools are
+                disabled and the completion is capped at this many tokens
+
+        Returns:
+            LLM response
+        """
+        max_tokens = answer_max_tokens or self.max_tokens
+        if self.tool_mode == TOOL_MODE_NATIVE and self.tool_schemas:
+            try:
+                return await llm_client.chat_completion(
+                    messages=all_messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens,
+                    tools=self.tool_schemas,
+                    tool_choice="none" if answer_max_tokens else None,
+                )
+            except httpx.HTTPStatusError as e:
+                if not self._fallback_to_prompt_mode(e, all_messages):
+                    raise
+
+        return await llm_client.chat_completion(
+            messages=all_messages,
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+        )
+
+    async def _stream(
+        self,
+        all_messages: list[ChatMessage],
+        stats: StreamStats,
+        answer_max_tokens: int | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream one LLM turn, passing tool schemas in native mode.
+
+        Native tool calls are collected on `stats`. Falls back to prompt mode
+        if the model rejects the `tools` parameter (before any content).
+
+        Args:
+            all_messages: Conversation including the system prompt
+            stats: Receives usage and native tool calls
+            answer_max_tokens: If set, a final answer is requested (see _complete)
+
+        Yields:
+            Content chunks
+        """
+        max_tokens = answer_max_tokens or self.max_tokens
+        if self.tool_mode == TOOL_MODE_NATIVE and self.tool_schemas:
+            try:
+                async for chunk in llm_client.chat_completion_stream(
+                    messages=all_messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens,
+                    tools=self.tool_schemas,
+                    tool_choice="none" if answer_max_tokens else None,
+                    stats=stats,
+                ):
+                    yield chunk
+                return
+            except httpx.HTTPStatusError as e:
+                if not self._fallback_to_prompt_mode(e, all_messages):
+                    raise
+
+        async for chunk in llm_client.chat_completion_stream(
+            messages=all_messages,
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            stats=stats,
+        ):
+            yield chunk
+
+    def _fallback_to_prompt_mode(
+        self,
+        error: httpx.HTTPStatusError,
+        all_messages: list[ChatMessage],
+    ) -> bool:
+        """Switch to <tool> tags after the model rejected native tool calling.
+
+        Only possible before any tool message was sent.
+
+        Returns:
+            True if the engine switched modes and the call should be retried
+        """
+        if error.response.status_code not in (400, 422):
+            return False
+        if any(message.role == "tool" for message in all_messages):
+            return False
+
+        logger.warning(
+            f"Native tool calling rejected for agent '{self.agent_slug}', "
+            f"falling back to prompt mode: {error}"
+        )
+        self.tool_mode = TOOL_MODE_PROMPT
+        all_messages[0] = ChatMessage(role="system", content=self._build_system_prompt())
+        return True
+
+    def _append_tool_results(
+        self,
+        all_messages: list[ChatMessage],
+        content: str,
+        tool_results: list[tuple[ToolCall, dict[str, Any]]],
+        formatter: ToolResultFormatter,
+    ) -> None:
+        """Add the assistant turn and its tool results to the conversation.
+
+        Args:
+            all_messages: Conversation to extend
+            content: Assistant response text
+            tool_results: Executed tool calls with their results
+            formatter: Compacts results for the prompt (one per request)
+        """
+        if self.tool_mode == TOOL_MODE_NATIVE:
+            all_messages.append(ChatMessage(
+                role="assistant",
+                content=content,
+                tool_calls=[
+                    ToolCallRequest(id=call.id or "", name=call.name, arguments=json.dumps(call.params))
+                    for call, _ in tool_results
+                ],
+            ))
+            for call, result in tool_results:
+                all_messages.append(ChatMessage(
+                    role="tool",
+                    content=formatter.format(call.name, result, self._result_budget(call.name)),
+                    tool_call_id=call.id,
+                ))
+            return
+
+        results = formatter.format_batch([
+            (call.name, result, self._result_budget(call.name)) for call, result in tool_results
+        ])
+        all_messages.append(ChatMessage(role="assistant", content=content))
+        all_messages.append(ChatMessage(
+            role="user",
+            content=f"Tool results:\n{results}\n\nPlease provide your response based on these results.",
+        ))
+
+    def _result_budget(self, tool_name: str) -> int | None:
+        """Get the prompt token budget for a tool's results."""
+        tool = self.tools.get(tool_name)
+        return tool.result_token_budget if tool else None
+
+    def _log_tool_result_stats(self, formatter: ToolResultFormatter) -> dict[str, int] | None:
+        """Log and return the tool-result token savings for a request."""
+        if not formatter.tokens_before:
+            return None
+        stats = formatter.stats()
+        logger.info(
+            f"Agent '{self.agent_slug}' tool results: ~{stats['tokens_after']} prompt tokens "
+            f"(saved ~{stats['tokens_saved']}, {stats['deduplicated_chunks']} repeated chunks, "
+            f"{stats['truncated']} truncated)"
+        )
+        return stats
+
     def _remove_tool_calls(self, response: str) -> str:
         """Remove tool call blocks from response.
 
@@ -220,8 +498,19 @@ If a tool returns an error, acknowledge it and try to help without that tool."""
 
             params.update(kwargs)
 
-            result = await tool.execute(**params)
+            timeout = tool.timeout_seconds or settings.agent_tool_timeout_seconds
+            budget: AgentBudget | None = kwargs.get("budget")
+            if budget is not None and budget.remaining_seconds is not None:
+                timeout = max(0.1, min(timeout, budget.remaining_seconds))
+            async with asyncio.timeout(timeout):
+                result = await tool.execute(**params)
             return result.to_dict()
+        except TimeoutError:
+            logger.warning(f"Tool execution timed out: {tool_call.name} after {timeout}s")
+            return {
+                "success": False,
+                "error": f"Tool timed out after {timeout} seconds",
+            }
         except Exception as e:
             logger.error(f"Tool execution error: {tool_call.name}, {e}")
             return {
@@ -229,6 +518,179 @@ If a tool returns an error, acknowledge it and try to help without that tool."""
                 "error": str(e),
             }
 
+    async def _execute_tools(
+        self,
+        tool_calls: list[ToolCall],
+        db: AsyncSession | None = None,
+        user_id: uuid.UUID | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """Execute tool calls concurrently.
+
+        At most `settings.agent_tool_concurrency` tools run at once. When more
+        than one database tool is in the batch, each gets its own session so
+        they do not share one AsyncSession.
+
+        Args:
+            tool_calls: Tool calls from one LLM turn
+            db: Database session (for tools that need it)
+            user_id: User ID (for tools that need it)
+            **kwargs: Additional tool parameters
+
+        Yields:
+            (index into tool_calls, result) in completion order
+        """
+        if len(tool_calls) == 1:
+            yield 0, await self._execute_tool(tool_calls[0], db=db, user_id=user_id, **kwargs)
+            return
+
+        db_tools = sum(
+            1 for call in tool_calls
+            if call.name in self.tools and self.tools[call.name].uses_db
+        )
+        isolate_sessions = db is not None and db_tools > 1
+        semaphore = asyncio.Semaphore(settings.agent_tool_concurrency)
+
+        async def run(index: int, tool_call: ToolCall) -> tuple[int, dict[str, Any]]:
+            async with semaphore:
+                tool = self.tools.get(tool_call.name)
+                if isolate_sessions and tool is not None and tool.uses_db:
+                    async with SessionLocal() as session:
+                        result = await self._execute_tool(
+                            tool_call, db=session, user_id=user_id, **kwargs
+                        )
+                else:
+                    result = await self._execute_tool(tool_call, db=db, user_id=user_id, **kwargs)
+            return index, result
+
+        tasks = [
+            asyncio.create_task(run(index, tool_call))
+            for index, tool_call in enumerate(tool_calls)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The consumer stopped early (or a tool raised): stop the rest
+            # here rather than leave them running until garbage collection
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_tools(
+        self,
+        tool_calls: list[ToolCall],
+        budget: AgentBudget,
+        span: IterationSpan,
+        db: AsyncSession | None = None,
+        user_id: uuid.UUID | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """Execute the tool calls the budget allows; the rest get an error result.
+
+        Tools receive the budget as the `budget` keyword argument.
+
+        Yields:
+            (index into tool_calls, result) in completion order
+        """
+        allowed = budget.allow_tool_calls(len(tool_calls))
+        span.tool_calls = allowed
+        for index in range(allowed, len(tool_calls)):
+            yield index, {"success": False, "error": TOOL_CALL_LIMIT_ERROR}
+        if not allowed:
+            return
+
+        started = time.perf_counter()
+        async with aclosing(
+            self._execute_tools(tool_calls[:allowed], db=db, user_id=user_id, budget=budget, **kwargs)
+        ) as results:
+            async for index, result in results:
+                yield index, result
+        span.tools_ms = int((time.perf_counter() - started) * 1000)
+
+    def _record_llm_call(
+        self,
+        budget: AgentBudget,
+        span: IterationSpan,
+        started: float,
+        usage: dict[str, int] | None,
+    ) -> None:
+        """Add an LLM call's latency and tokens to the iteration span and budget."""
+        span.llm_ms = int((time.perf_counter() - started) * 1000)
+        if usage:
+            span.prompt_tokens = usage.get("prompt_tokens", 0)
+            span.completion_tokens = usage.get("completion_tokens", 0)
+        budget.add_usage(usage)
+
+    def _check_budget(self, budget: AgentBudget, all_messages: list[ChatMessage]) -> int | None:
+        """Check whether the budget covers another tool-calling iteration.
+
+        If not, marks the budget exhausted and prepares the conversation for a
+        final answer.
+
+        Returns:
+            None to continue; otherwise max_tokens for the final answer call,
+            or 0 if not even that fits (answer without another LLM call)
+        """
+        prompt_tokens = self._estimate_prompt_tokens(all_messages)
+        answer_tokens = min(self.max_tokens, settings.agent_budget_answer_tokens)
+        reason = budget.check(prompt_tokens, answer_tokens)
+        if reason is None:
+            return None
+
+        budget.exhausted = reason
+        logger.info(
+            f"Agent '{self.agent_slug}' budget exhausted ({reason}): {budget.tokens_used} tokens, "
+            f"{budget.tool_calls} tool calls, {budget.elapsed_seconds:.1f}s; answering from gathered results"
+        )
+
+        remaining_tokens = budget.remaining_tokens
+        if remaining_tokens is not None and remaining_tokens < prompt_tokens + answer_tokens // 4:
+            return 0
+        if budget.remaining_seconds == 0:
+            return 0
+
+        all_messages.append(ChatMessage(role="user", content=FINAL_ANSWER_PROMPT))
+        if remaining_tokens is not None:
+            answer_tokens = min(answer_tokens, remaining_tokens - prompt_tokens)
+        return answer_tokens
+
+    def _estimate_prompt_tokens(self, all_messages: list[ChatMessage]) -> int:
+        """Estimate the prompt tokens of the next LLM call."""
+        tokens = sum(estimate_tokens(message.content or "") for message in all_messages)
+        for message in all_messages:
+            for call in message.tool_calls or []:
+                tokens += estimate_tokens(call.arguments or "")
+        if self.tool_mode == TOOL_MODE_NATIVE and self.tool_schemas:
+            tokens += estimate_tokens(json.dumps(self.tool_schemas))
+        return tokens
+
+    def _fallback_content(self, all_messages: list[ChatMessage]) -> str:
+        """Best answer available without another LLM call."""
+        for message in reversed(all_messages):
+            if message.role == "assistant":
+                content = self._remove_tool_calls(message.content or "")
+                if content:
+                    return content
+        return BUDGET_EXHAUSTED_MESSAGE
+
+    def _add_usage(self, total_usage: dict[str, int], usage: dict[str, int] | None) -> None:
+        """Add one LLM call's token usage to the running total."""
+        if not usage:
+            return
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            total_usage[key] += usage.get(key, 0)
+
+    def _collect_sources(
+        self,
+        tool_results: list[tuple[ToolCall, dict[str, Any]]],
+        sources: list[dict[str, Any]],
+    ) -> None:
+        """Add chunks from successful RAG searches to sources."""
+        for tool_call, result in tool_results:
+            if tool_call.name == "rag_search" and result.get("success"):
+                sources.extend(result.get("data", []))
+
     async def process(
         self,
         messages: list[ChatMessage],
@@ -256,76 +718,67 @@ If a tool returns an error, acknowledge it and try to help without that tool."""
         tools_used = []
         sources = []
         thinking_parts = []
+        formatter = ToolResultFormatter()
+        budget = AgentBudget.from_settings(self.settings)
         total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
         model_used = None
 
+        def build_response(content: str) -> AgentResponse:
+            return AgentResponse(
+                content=content,
+                tools_used=tools_used,
+                thinking="\n".join(thinking_parts) if thinking_parts else None,
+                sources=sources,
+                model=model_used,
+                usage=total_usage if total_usage["total_tokens"] > 0 else None,
+                tool_result_stats=self._log_tool_result_stats(formatter),
+                budget=budget.summary(),
+            )
+
         for iteration in range(max_iterations):
+            answer_max_tokens = self._check_budget(budget, all_messages) if iteration else None
+            if answer_max_tokens == 0:
+                return build_response(self._fallback_content(all_messages))
+
             # Call LLM
-            response = await llm_client.chat_completion(
-                messages=all_messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            span = budget.start_iteration(iteration, final=answer_max_tokens is not None)
+            started = time.perf_counter()
+            response = await self._complete(all_messages, answer_max_tokens=answer_max_tokens)
+            self._record_llm_call(budget, span, started, response.usage)
 
             model_used = response.model
-            if response.usage:
-                total_usage["prompt_tokens"] += response.usage.get("prompt_tokens", 0)
-                total_usage["completion_tokens"] += response.usage.get("completion_tokens", 0)
-                total_usage["total_tokens"] += response.usage.get("total_tokens", 0)
+            self._add_usage(total_usage, response.usage)
 
-            # Parse tool calls
-            tool_calls = self._parse_tool_calls(response.content)
+            # Parse tool calls (none are run after the budget ran out)
+            tool_calls = self._get_tool_calls(response) if answer_max_tokens is None else []
 
             if not tool_calls:
                 # No tool calls, return final response
-                final_content = self._remove_tool_calls(response.content)
-                return AgentResponse(
-                    content=final_content,
-                    tools_used=tools_used,
-                    thinking="\n".join(thinking_parts) if thinking_parts else None,
-                    sources=sources,
-                    model=model_used,
-                    usage=total_usage if total_usage["total_tokens"] > 0 else None,
-                )
+                budget.end_iteration(span)
+                return build_response(self._remove_tool_calls(response.content))
 
             # Execute tools and collect results
-            tool_results = []
             for tool_call in tool_calls:
                 tools_used.append(tool_call.name)
                 thinking_parts.append(f"Using tool: {tool_call.name}")
 
-                result = await self._execute_tool(
-                    tool_call=tool_call,
-                    db=db,
-                    user_id=user_id,
-                    **kwargs,
-                )
-                tool_results.append({
-                    "tool": tool_call.name,
-                    "result": result,
-                })
+            results: list[dict[str, Any]] = [{}] * len(tool_calls)
+            async with aclosing(
+                self._run_tools(tool_calls, budget, span, db=db, user_id=user_id, **kwargs)
+            ) as tool_events:
+                async for index, result in tool_events:
+                    results[index] = result
+            tool_results = list(zip(tool_calls, results, strict=True))
+            budget.end_iteration(span)
 
-                # Collect sources from RAG search results
-                if tool_call.name == "rag_search" and result.get("success"):
-                    for chunk in result.get("data", []):
-                        sources.append(chunk)
+            # Collect sources from RAG search results
+            self._collect_sources(tool_results, sources)
 
             # Add assistant message and tool results to conversation
-            all_messages.append(ChatMessage(role="assistant", content=response.content))
-            all_messages.append(ChatMessage(
-                role="user",
-                content=f"Tool results:\n{json.dumps(tool_results, indent=2)}\n\nPlease provide your response based on these results.",
-            ))
+            self._append_tool_results(all_messages, response.content, tool_results, formatter)
 
         # Max iterations reached
-        return AgentResponse(
-            content="I've reached my processing limit. Please try simplifying your request.",
-            tools_used=tools_used,
-            thinking="\n".join(thinking_parts) if thinking_parts else None,
-            sources=sources,
-            model=model_used,
-            usage=total_usage if total_usage["total_tokens"] > 0 else None,
-        )
+        return build_response(MAX_ITERATIONS_MESSAGE)
 
     async def process_stream(
         self,
@@ -342,7 +795,12 @@ If a tool returns an error, acknowledge it and try to help without that tool."""
         - {"type": "tool_call", "name": "...", "params": {...}}
         - {"type": "tool_result", "name": "...", "result": {...}}
         - {"type": "content", "content": "...", "done": false}
-        - {"type": "done", "tools_used": [...], "sources": [...]}
+        - {"type": "done", "tools_used": [...], "sources": [...], "model": "...", "usage": {...},
+           "tool_result_stats": {...}, "budget": {...}}
+
+        Usage is summed over all LLM calls of the loop (None if the provider
+        reported none). Content streamed before a "thinking" event belongs to
+        a turn that called tools; the answer is the content after the last one.
 
         Args:
             messages: Chat messages
@@ -360,40 +818,70 @@ If a tool returns an error, acknowledge it and try to help without that tool."""
 
         tools_used = []
         sources = []
+        formatter = ToolResultFormatter()
+        budget = AgentBudget.from_settings(self.settings)
+        total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        model_used = None
+
+        def done_event() -> dict[str, Any]:
+            return {
+                "type": "done",
+                "tools_used": tools_used,
+                "sources": sources,
+                "model": model_used,
+                "usage": total_usage if total_usage["total_tokens"] > 0 else None,
+                "tool_result_stats": self._log_tool_result_stats(formatter),
+                "budget": budget.summary(),
+            }
 
         for iteration in range(max_iterations):
-            # First, get a non-streaming response to check for tool calls
-            response = await llm_client.chat_completion(
-                messages=all_messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            answer_max_tokens = self._check_budget(budget, all_messages) if iteration else None
+            if answer_max_tokens == 0:
+                yield {"type": "content", "content": self._fallback_content(all_messages), "done": True}
+                yield done_event()
+                return
 
-            # Parse tool calls
-            tool_calls = self._parse_tool_calls(response.content)
+            # One streaming call per turn: content is forwarded as it arrives
+            # and tool calls are picked out of the same stream
+            span = budget.start_iteration(iteration, final=answer_max_tokens is not None)
+            started = time.perf_counter()
+            stats = StreamStats()
+            parser = ToolTagStreamParser()
+            chunks = []
+            async for chunk in self._stream(all_messages, stats, answer_max_tokens=answer_max_tokens):
+                chunks.append(chunk)
+                text = chunk if self.tool_mode == TOOL_MODE_NATIVE else parser.feed(chunk)
+                if text:
+                    yield {"type": "content", "content": text, "done": False}
+
+            text = parser.flush()
+            if text:
+                yield {"type": "content", "content": text, "done": False}
+
+            self._record_llm_call(budget, span, started, stats.usage)
+            model_used = stats.model or model_used
+            self._add_usage(total_usage, stats.usage)
+
+            content = "".join(chunks)
+            if answer_max_tokens is not None:
+                # Budget fallback answer: no more tools
+                tool_calls = []
+            elif self.tool_mode == TOOL_MODE_NATIVE:
+                tool_calls = self._parse_native_tool_calls(stats.tool_calls)
+            else:
+                tool_calls = self._parse_tool_calls(content)
 
             if not tool_calls:
-                # No tool calls, stream the final response
-                async for chunk in llm_client.chat_completion_stream(
-                    messages=all_messages,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                ):
-                    yield {"type": "content", "content": chunk, "done": False}
-
                 # Send done event
-                yield {
-                    "type": "done",
-                    "tools_used": tools_used,
-                    "sources": sources,
-                }
+                budget.end_iteration(span)
+                yield done_event()
                 return
 
             # Show thinking
             yield {"type": "thinking", "content": f"Processing with {len(tool_calls)} tool(s)..."}
 
-            # Execute tools
-            tool_results = []
+            # Announce all calls, then execute them concurrently and report
+            # each result as soon as it completes
             for tool_call in tool_calls:
                 tools_used.append(tool_call.name)
 
@@ -403,44 +891,30 @@ If a tool returns an error, acknowledge it and try to help without that tool."""
                     "params": tool_call.params,
                 }
 
-                result = await self._execute_tool(
-                    tool_call=tool_call,
-                    db=db,
-                    user_id=user_id,
-                    **kwargs,
-                )
-
-                yield {
-                    "type": "tool_result",
-                    "name": tool_call.name,
-                    "result": result,
-                }
-
-                tool_results.append({
-                    "tool": tool_call.name,
-                    "result": result,
-                })
-
-                # Collect sources
-                if tool_call.name == "rag_search" and result.get("success"):
-                    for chunk in result.get("data", []):
-                        sources.append(chunk)
+            results: list[dict[str, Any]] = [{}] * len(tool_calls)
+            async with aclosing(
+                self._run_tools(tool_calls, budget, span, db=db, user_id=user_id, **kwargs)
+            ) as tool_events:
+                async for index, result in tool_events:
+                    results[index] = result
+                    yield {
+                        "type": "tool_result",
+                        "name": tool_calls[index].name,
+                        "result": result,
+                    }
+            tool_results = list(zip(tool_calls, results, strict=True))
+            budget.end_iteration(span)
+
+            # Collect sources
+            self._collect_sources(tool_results, sources)
 
             # Add to conversation for next iteration
-            all_messages.append(ChatMessage(role="assistant", content=response.content))
-            all_messages.append(ChatMessage(
-                role="user",
-                content=f"Tool results:\n{json.dumps(tool_results, indent=2)}\n\nPlease provide your response based on these results.",
-            ))
+            self._append_tool_results(all_messages, content, tool_results, formatter)
 
         # Max iterations reached
         yield {
             "type": "content",
-            "content": "I've reached my processing limit. Please try simplifying your request.",
+            "content": MAX_ITERATIONS_MESSAGE,
             "done": True,
         }
-        yield {
-            "type": "done",
-            "tools_used": tools_used,
-            "sources": sources,
-        }
+        yield done_event()
@@ -0,0 +1,193 @@
+"""Compact serialization of tool results for agent prompts.
+
+Tool results are sent back to the model on every later iteration, so their
+size compounds. `ToolResultFormatter` keeps them small:
+
+- compact JSON (no indentation) without empty or bookkeeping fields
+- RAG chunks already shown earlier in the request are replaced by a count
+- each result is cut to a per-tool token budget
+
+One formatter is used per agent request; it records how many tokens the
+compact form saved compared to the previous indented JSON.
+"""
+
+import json
+from typing import Any
+
+from app.config import settings
+
+# Rough token estimate, same ratio as the document chunker (~4 chars/token)
+CHARS_PER_TOKEN = 4
+
+# Metadata repeated from the call parameters or only useful for logging
+REDUNDANT_METADATA = {
+    "query", "top_k", "count", "style", "max_length", "model", "usage", "chunks", "cached_chunks",
+}
+
+TRUNCATION_MARKER = "…[truncated]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a string."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class ToolResultFormatter:
+    """Format tool results compactly and track the tokens saved."""
+
+    def __init__(self, default_budget: int | None = None) -> None:
+        """Initialize formatter.
+
+        Args:
+            default_budget: Token budget per tool result (defaults to
+                settings.agent_tool_result_token_budget)
+        """
+        self.default_budget = default_budget or settings.agent_tool_result_token_budget
+        self._seen_chunks: set[tuple[str, Any]] = set()
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.truncated = 0
+        self.deduplicated = 0
+
+    def format(self, tool_name: str, result: dict[str, Any], budget: int | None = None) -> str:
+        """Serialize one tool result for the prompt.
+
+        Args:
+            tool_name: Name of the tool that produced the result
+            result: Result dict from ToolResult.to_dict()
+            budget: Token budget for this result (default: formatter default)
+
+        Returns:
+            Compact JSON string
+        """
+        self.tokens_before += estimate_tokens(json.dumps(result, indent=2, default=str))
+
+        compact = self._compact(tool_name, result)
+        text = self._fit(compact, budget or self.default_budget)
+
+        self.tokens_after += estimate_tokens(text)
+        return text
+
+    def format_batch(self, results: list[tuple[str, dict[str, Any], int | None]]) -> str:
+        """Serialize several results as one list (prompt mode).
+
+        Args:
+            results: (tool name, result, budget) tuples
+
+        Returns:
+            Compact JSON array of {"tool": ..., "result": ...}
+        """
+        items = [
+            f'{{"tool":{_dumps(name)},"result":{self.format(name, result, budget)}}}'
+            for name, result, budget in results
+        ]
+        return f"[{','.join(items)}]"
+
+    def _compact(self, tool_name: str, result: dict[str, Any]) -> dict[str, Any]:
+        """Drop empty and redundant fields and already-shown chunks."""
+        if not result.get("success", False):
+            return {"success": False, "error": result.get("error") or "Unknown error"}
+
+        compact: dict[str, Any] = {}
+        data = result.get("data")
+        if isinstance(data, list) and data and all(isinstance(item, dict) for item in data):
+            chunks, repeated = self._dedupe_chunks(data)
+            compact["data"] = chunks
+            if repeated:
+                compact["already_shown"] = repeated
+        elif data is not None:
+            compact["data"] = data
+
+        metadata = {
+            key: value
+            for key, value in (result.get("metadata") or {}).items()
+            if key not in REDUNDANT_METADATA and value not in (None, "", [], {})
+        }
+        if metadata:
+            compact["metadata"] = metadata
+        return compact
+
+    def _dedupe_chunks(self, chunks: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], int]:
+        """Remove chunks sent in earlier iterations and trim chunk fields."""
+        fresh = []
+        repeated = 0
+        for chunk in chunks:
+            key = (chunk.get("document_id"), chunk.get("chunk_index"))
+            if key[0] is not None and key in self._seen_chunks:
+                repeated += 1
+                continue
+            self._seen_chunks.add(key)
+            item = {k: v for k, v in chunk.items() if v not in (None, "")}
+            if isinstance(item.get("score"), float):
+                item["score"] = round(item["score"], 3)
+            fresh.append(item)
+        self.deduplicated += repeated
+        return fresh, repeated
+
+    def _fit(self, compact: dict[str, Any], budget: int) -> str:
+        """Serialize, cutting the data down until it fits the token budget."""
+        text = _dumps(compact)
+        if estimate_tokens(text) <= budget:
+            return text
+
+        self.truncated += 1
+        max_chars = budget * CHARS_PER_TOKEN
+        data = compact.get("data")
+
+        if isinstance(data, list):
+            # Keep the highest-ranked items that fit, then trim the last one
+            kept: list[Any] = []
+            for item in data:
+                candidate = _dumps({**compact, "data": kept + [item]})
+                if len(candidate) > max_chars:
+                    break
+                kept.append(item)
+            result = {**compact, "data": kept, "omitted": len(data) - len(kept)}
+            text = _dumps(result)
+            if len(kept) < len(data) and isinstance(data[len(kept)], dict):
+                partial = self._trim_item(data[len(kept)], max_chars - len(text) - 16)
+                if partial is not None:
+                    result = {**compact, "data": kept + [partial], "omitted": len(data) - len(kept) - 1}
+                    text = _dumps(result)
+            return text
+
+        if isinstance(data, str):
+            overhead = len(_dumps({**compact, "data": ""}))
+            keep = max(0, max_chars - overhead - len(TRUNCATION_MARKER))
+            return _dumps({**compact, "data": data[:keep] + TRUNCATION_MARKER})
+
+        # Other data (dicts, numbers): a preview of its JSON inside a valid
+        # wrapper, shortened by the overflow since quotes in it get escaped
+        serialized = _dumps(data)
+        keep = max_chars
+        while True:
+            preview = serialized[:keep] + TRUNCATION_MARKER
+            text = _dumps({**compact, "data": {"truncated": True, "preview": preview}})
+            if len(text) <= max_chars or keep == 0:
+                return text
+            keep = max(0, keep - (len(text) - max_chars))
+
+    def _trim_item(self, item: dict[str, Any], max_chars: int) -> dict[str, Any] | None:
+        """Shorten an item's content so the item fits in max_chars."""
+        content = item.get("content")
+        if not isinstance(content, str):
+            return None
+        overhead = len(_dumps({**item, "content": ""})) + len(TRUNCATION_MARKER)
+        keep = max_chars - overhead
+        if keep < 100:
+            return None
+        return {**item, "content": content[:keep] + TRUNCATION_MARKER}
+
+    def stats(self) -> dict[str, int]:
+        """Get token savings for this request."""
+        return {
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_before - self.tokens_after,
+            "truncated": self.truncated,
+            "deduplicated_chunks": self.deduplicated,
+        }
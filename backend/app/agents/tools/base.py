@@ -29,6 +29,13 @@ class BaseTool(ABC):
 
     name: str = "base_tool"
     description: str = "Base tool"
+    # Tools that query the database get their own session when several of
+    # them run concurrently
+    uses_db: bool = False
+    # Execution timeout in seconds (None = settings.agent_tool_timeout_seconds)
+    timeout_seconds: float | None = None
+    # Prompt token budget for results (None = settings.agent_tool_result_token_budget)
+    result_token_budget: int | None = None
 
     @abstractmethod
     async def execute(self, **kwargs: Any) -> ToolResult:
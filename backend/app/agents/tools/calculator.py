@@ -1,12 +1,25 @@
-"""Calculator tool for safe mathematical expression evaluation."""
+"""Calculator tool for safe mathematical expression evaluation.
+
+Expressions are parsed and validated once, compiled into nested closures
+and cached (`compile_expression`), so repeated and batched evaluations
+skip parsing and AST walking. Limits on node count, nesting depth,
+integer size and exponents keep pathological inputs such as `9**9**9`
+from pinning a CPU, and evaluation runs in a small thread pool with a
+timeout so it never blocks the event loop.
+"""
 
 import ast
+import asyncio
 import math
 import operator
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 from app.agents.tools.base import BaseTool, ToolResult
-
+from app.config import settings
 
 # Safe operators for evaluation
 SAFE_OPERATORS = {
@@ -41,56 +54,146 @@ SAFE_FUNCTIONS = {
     "e": math.e,
 }
 
+# Limits for untrusted expressions
+MAX_EXPRESSION_LENGTH = 1000
+MAX_NODES = 200
+MAX_DEPTH = 32
+MAX_INT_BITS = 1024  # ~308 decimal digits
+MAX_EXPONENT = 10_000
+MAX_BATCH_SIZE = 1000
+
+Number = int | float
+Evaluate = Callable[[Mapping[str, Number]], Any]
+
+
+def _check_int(value: Any) -> Any:
+    """Reject integers above the size limit."""
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise ValueError(f"Result too large (over {MAX_INT_BITS} bits)")
+    return value
+
+
+def _safe_pow(base: Any, exponent: Any) -> Any:
+    """Power with limits on the exponent and the result size."""
+    if isinstance(exponent, (int, float)) and abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"Exponent too large (limit {MAX_EXPONENT})")
+    # Result has about bit_length(base) * exponent bits; check before computing
+    if (
+        isinstance(base, int)
+        and isinstance(exponent, int)
+        and exponent > 0
+        and (abs(base).bit_length() - 1) * exponent > MAX_INT_BITS
+    ):
+        raise ValueError(f"Result too large (over {MAX_INT_BITS} bits)")
+    return base ** exponent
+
+
+def _safe_mul(left: Any, right: Any) -> Any:
+    """Multiplication that checks integer size before computing."""
+    # Sequence repetition ([0] * 10**9) would allocate without limit
+    if isinstance(left, (list, tuple, str)) or isinstance(right, (list, tuple, str)):
+        raise ValueError("Lists cannot be multiplied")
+    if (
+        isinstance(left, int)
+        and isinstance(right, int)
+        and abs(left).bit_length() + abs(right).bit_length() > MAX_INT_BITS + 1
+    ):
+        raise ValueError(f"Result too large (over {MAX_INT_BITS} bits)")
+    return left * right
+
+
+# Operators that can grow integers without bound get checked versions
+CHECKED_OPERATORS = {
+    **SAFE_OPERATORS,
+    ast.Mult: _safe_mul,
+    ast.Pow: _safe_pow,
+}
 
-class SafeEvaluator(ast.NodeVisitor):
-    """Safe AST evaluator for mathematical expressions."""
-
-    def visit_Expression(self, node: ast.Expression) -> Any:
-        return self.visit(node.body)
 
-    def visit_Constant(self, node: ast.Constant) -> Any:
-        if isinstance(node.value, (int, float)):
-            return node.value
-        raise ValueError(f"Unsupported constant type: {type(node.value)}")
+class ExpressionCompiler:
+    """Validate an expression AST and compile it into closures.
 
-    def visit_Num(self, node: ast.Num) -> Any:
-        # For Python < 3.8 compatibility
-        return node.n
+    All validation happens here, once; evaluation only calls closures.
+    """
 
-    def visit_Name(self, node: ast.Name) -> Any:
-        if node.id in SAFE_FUNCTIONS:
-            value = SAFE_FUNCTIONS[node.id]
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.names: set[str] = set()
+
+    def compile(self, node: ast.AST, depth: int = 0) -> Evaluate:
+        self.nodes += 1
+        if self.nodes > MAX_NODES:
+            raise ValueError(f"Expression too complex (more than {MAX_NODES} nodes)")
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Expression nested too deeply (more than {MAX_DEPTH} levels)")
+
+        method = getattr(self, f"compile_{type(node).__name__}", None)
+        if method is None:
+            raise ValueError(f"Unsupported expression type: {type(node).__name__}")
+        return method(node, depth + 1)
+
+    def compile_Expression(self, node: ast.Expression, depth: int) -> Evaluate:
+        return self.compile(node.body, depth)
+
+    def compile_Constant(self, node: ast.Constant, depth: int) -> Evaluate:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant type: {type(node.value)}")
+        value = _check_int(node.value)
+        return lambda env: value
+
+    def compile_Name(self, node: ast.Name, depth: int) -> Evaluate:
+        name = node.id
+        if name in SAFE_FUNCTIONS:
+            value = SAFE_FUNCTIONS[name]
             if callable(value):
-                raise ValueError(f"Function '{node.id}' must be called with arguments")
-            return value
-        raise ValueError(f"Unknown variable: {node.id}")
+                raise ValueError(f"Function '{name}' must be called with arguments")
+            return lambda env: value
 
-    def visit_BinOp(self, node: ast.BinOp) -> Any:
-        left = self.visit(node.left)
-        right = self.visit(node.right)
-        op_type = type(node.op)
+        # Anything else is a variable, bound at evaluation time
+        self.names.add(name)
 
-        if op_type not in SAFE_OPERATORS:
+        def load(env: Mapping[str, Number]) -> Any:
+            try:
+                return env[name]
+            except KeyError:
+                raise ValueError(f"Unknown variable: {name}") from None
+
+        return load
+
+    def compile_BinOp(self, node: ast.BinOp, depth: int) -> Evaluate:
+        op_type = type(node.op)
+        if op_type not in CHECKED_OPERATORS:
             raise ValueError(f"Unsupported operator: {op_type.__name__}")
 
-        # Prevent division by zero
-        if op_type in (ast.Div, ast.FloorDiv, ast.Mod) and right == 0:
-            raise ValueError("Division by zero")
+        left = self.compile(node.left, depth)
+        right = self.compile(node.right, depth)
+        op = CHECKED_OPERATORS[op_type]
+        checks_zero = op_type in (ast.Div, ast.FloorDiv, ast.Mod)
 
-        return SAFE_OPERATORS[op_type](left, right)
+        def evaluate(env: Mapping[str, Number]) -> Any:
+            a = left(env)
+            b = right(env)
+            # Prevent division by zero
+            if checks_zero and b == 0:
+                raise ValueError("Division by zero")
+            return _check_int(op(a, b))
 
-    def visit_UnaryOp(self, node: ast.UnaryOp) -> Any:
-        operand = self.visit(node.operand)
-        op_type = type(node.op)
+        return evaluate
 
+    def compile_UnaryOp(self, node: ast.UnaryOp, depth: int) -> Evaluate:
+        op_type = type(node.op)
         if op_type not in SAFE_OPERATORS:
             raise ValueError(f"Unsupported unary operator: {op_type.__name__}")
 
-        return SAFE_OPERATORS[op_type](operand)
+        operand = self.compile(node.operand, depth)
+        op = SAFE_OPERATORS[op_type]
+        return lambda env: op(operand(env))
 
-    def visit_Call(self, node: ast.Call) -> Any:
+    def compile_Call(self, node: ast.Call, depth: int) -> Evaluate:
         if not isinstance(node.func, ast.Name):
             raise ValueError("Only simple function calls are supported")
+        if node.keywords:
+            raise ValueError("Keyword arguments are not supported")
 
         func_name = node.func.id
         if func_name not in SAFE_FUNCTIONS:
@@ -100,18 +203,77 @@ class SafeEvaluator(ast.NodeVisitor):
         if not callable(func):
             raise ValueError(f"'{func_name}' is not callable")
 
-        args = [self.visit(arg) for arg in node.args]
-        return func(*args)
+        args = [self.compile(arg, depth) for arg in node.args]
+        return lambda env: _check_int(func(*[arg(env) for arg in args]))
+
+    def compile_List(self, node: ast.List, depth: int) -> Evaluate:
+        # Only as an argument, e.g. sum([1, 2, 3])
+        items = [self.compile(item, depth) for item in node.elts]
+        return lambda env: [item(env) for item in items]
+
+    compile_Tuple = compile_List
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """A validated expression, ready to evaluate."""
+
+    source: str
+    names: frozenset[str]
+    _evaluate: Evaluate
+
+    def evaluate(self, variables: Mapping[str, Number] | None = None) -> Number:
+        """Evaluate with the given variable values.
+
+        Raises:
+            ValueError: If the result is not a number or a limit is exceeded
+        """
+        try:
+            result = self._evaluate(variables or {})
+        except (OverflowError, ZeroDivisionError) as e:
+            raise ValueError(f"Math error: {e}") from None
+        except TypeError as e:
+            raise ValueError(f"Invalid arguments: {e}") from None
+
+        # Ensure result is a number
+        if isinstance(result, bool) or not isinstance(result, (int, float)):
+            raise ValueError(f"Result is not a number: {type(result)}")
+        return result
+
+
+@lru_cache(maxsize=512)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse, validate and compile an expression (cached).
+
+    Args:
+        expression: Mathematical expression string
+
+    Returns:
+        Compiled expression
+
+    Raises:
+        ValueError: If expression is invalid, unsafe or over the limits
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression too long (limit {MAX_EXPRESSION_LENGTH} characters)")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression syntax: {e}") from None
+    except (RecursionError, MemoryError):
+        raise ValueError("Expression nested too deeply") from None
 
-    def generic_visit(self, node: ast.AST) -> Any:
-        raise ValueError(f"Unsupported expression type: {type(node).__name__}")
+    compiler = ExpressionCompiler()
+    evaluate = compiler.compile(tree)
+    return CompiledExpression(source=expression, names=frozenset(compiler.names), _evaluate=evaluate)
 
 
-def safe_eval(expression: str) -> float | int:
+def safe_eval(expression: str, variables: Mapping[str, Number] | None = None) -> float | int:
     """Safely evaluate a mathematical expression.
 
     Args:
         expression: Mathematical expression string
+        variables: Optional variable values
 
     Returns:
         Calculated result
@@ -119,29 +281,107 @@ def safe_eval(expression: str) -> float | int:
     Raises:
         ValueError: If expression is invalid or contains unsafe operations
     """
-    try:
-        tree = ast.parse(expression, mode="eval")
-        evaluator = SafeEvaluator()
-        result = evaluator.visit(tree)
+    return compile_expression(expression).evaluate(variables)
 
-        # Ensure result is a number
-        if not isinstance(result, (int, float)):
-            raise ValueError(f"Result is not a number: {type(result)}")
 
-        return result
-    except SyntaxError as e:
-        raise ValueError(f"Invalid expression syntax: {e}")
+def evaluate_batch(
+    expression: str,
+    variables: Mapping[str, Number | list[Number]],
+) -> list[Number | None] | Number:
+    """Evaluate one expression over lists of variable values.
+
+    List variables must all have the same length; scalars are broadcast.
+    The expression is compiled once and evaluated per row.
+
+    Args:
+        expression: Mathematical expression string
+        variables: Variable values; lists are evaluated element-wise
+
+    Returns:
+        One result per row (or a single number if no variable is a list)
+
+    Raises:
+        ValueError: If the expression or variables are invalid
+    """
+    compiled = compile_expression(expression)
+
+    for name, value in variables.items():
+        if not name.isidentifier() or name in SAFE_FUNCTIONS:
+            raise ValueError(f"Invalid variable name: {name}")
+        values = value if isinstance(value, list) else [value]
+        if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values):
+            raise ValueError(f"Variable '{name}' must be a number or a list of numbers")
+        for v in values:
+            _check_int(v)
+
+    lengths = {len(v) for v in variables.values() if isinstance(v, list)}
+    if not lengths:
+        return compiled.evaluate(variables)
+    if len(lengths) > 1:
+        raise ValueError("List variables must all have the same length")
+    size = lengths.pop()
+    if size > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many values (limit {MAX_BATCH_SIZE})")
+
+    results = []
+    for i in range(size):
+        row = {name: (v[i] if isinstance(v, list) else v) for name, v in variables.items()}
+        results.append(compiled.evaluate(row))
+    return results
+
+
+# Dedicated pool: a slow evaluation can't occupy the default executor
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.calculator_workers,
+            thread_name_prefix="calculator",
+        )
+    return _executor
+
+
+async def _run_in_thread(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a function in the calculator pool with the configured timeout."""
+    loop = asyncio.get_running_loop()
+    try:
+        async with asyncio.timeout(settings.calculator_timeout_seconds):
+            return await loop.run_in_executor(_get_executor(), func, *args)
+    except TimeoutError:
+        raise ValueError(
+            f"Calculation timed out after {settings.calculator_timeout_seconds:g}s"
+        ) from None
+
+
+def _evaluate_expressions(expressions: list[str]) -> list[dict[str, Any]]:
+    """Evaluate several independent expressions, one result or error each."""
+    results = []
+    for expression in expressions:
+        try:
+            results.append({"expression": expression, "result": safe_eval(expression.strip())})
+        except ValueError as e:
+            results.append({"expression": expression, "error": str(e)})
+    return results
 
 
 class CalculatorTool(BaseTool):
     """Tool for safely evaluating mathematical expressions."""
 
     name = "calculator"
-    description = "Evaluate mathematical expressions safely"
+    description = (
+        "Evaluate mathematical expressions safely. "
+        "Pass 'expressions' to evaluate several at once, or 'variables' "
+        "with lists of values to evaluate one expression over each value"
+    )
 
     async def execute(
         self,
-        expression: str,
+        expression: str | None = None,
+        expressions: list[str] | None = None,
+        variables: dict[str, Number | list[Number]] | None = None,
         **kwargs: Any,
     ) -> ToolResult:
         """Execute calculation.
@@ -152,10 +392,30 @@ class CalculatorTool(BaseTool):
                        Functions: sqrt, sin, cos, tan, log, log10, exp,
                                  floor, ceil, abs, round, min, max, sum
                        Constants: pi, e
+            expressions: Several expressions to evaluate in one call
+            variables: Variable values for expression; list values are
+                       evaluated element-wise
 
         Returns:
-            ToolResult with calculated value
+            ToolResult with calculated value (or list of values)
         """
+        if expressions:
+            if len(expressions) > MAX_BATCH_SIZE:
+                return ToolResult(
+                    success=False,
+                    error=f"Too many expressions (limit {MAX_BATCH_SIZE})",
+                )
+            try:
+                results = await _run_in_thread(_evaluate_expressions, list(expressions))
+            except ValueError as e:
+                return ToolResult(success=False, error=str(e))
+            # Per-expression errors are reported inline
+            return ToolResult(
+                success=True,
+                data=results,
+                metadata={"count": len(results)},
+            )
+
         if not expression or not expression.strip():
             return ToolResult(
                 success=False,
@@ -166,8 +426,11 @@ class CalculatorTool(BaseTool):
             # Clean expression
             expression = expression.strip()
 
-            # Evaluate safely
-            result = safe_eval(expression)
+            # Evaluate safely, off the event loop
+            if variables:
+                result = await _run_in_thread(evaluate_batch, expression, variables)
+            else:
+                result = await _run_in_thread(safe_eval, expression)
 
             return ToolResult(
                 success=True,
@@ -196,8 +459,26 @@ class CalculatorTool(BaseTool):
                     "type": "string",
                     "description": "Mathematical expression to evaluate (e.g., '2 + 2', 'sqrt(16)', 'sin(pi/2)')",
                 },
+                "expressions": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Several independent expressions to evaluate at once",
+                },
+                "variables": {
+                    "type": "object",
+                    "description": (
+                        "Values for variables used in expression, e.g. {\"x\": [1, 2, 3]}; "
+                        "lists are evaluated element-wise"
+                    ),
+                    "additionalProperties": {
+                        "anyOf": [
+                            {"type": "number"},
+                            {"type": "array", "items": {"type": "number"}},
+                        ],
+                    },
+                },
             },
-            "required": ["expression"],
+            "required": [],
         }
 
 
@@ -14,6 +14,9 @@ class RAGSearchTool(BaseTool):
 
     name = "rag_search"
     description = "Search through documents to find relevant information for answering questions"
+    uses_db = True
+    # Several chunks per call; allow more than the default budget
+    result_token_budget = 3000
 
     async def execute(
         self,
@@ -1,22 +1,41 @@
 """Summarize tool for condensing text content."""
 
+import uuid
 from typing import Any
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.agents.tools.base import BaseTool, ToolResult
-from app.providers.llm import ChatMessage, llm_client
+from app.models.chunk import DocumentChunk
+from app.models.document import Document
+from app.services.summarizer import SummaryResult, summarizer
 
 
 class SummarizeTool(BaseTool):
-    """Tool for summarizing text content using LLM."""
+    """Tool for summarizing text content using LLM.
+
+    Long texts are summarized with map-reduce (see app.services.summarizer).
+    Documents with a summary precomputed at ingestion are served from it.
+    """
 
     name = "summarize"
-    description = "Summarize long text content into a concise summary"
+    description = (
+        "Summarize long text content into a concise summary, "
+        "or summarize a whole document by its document_id"
+    )
+    uses_db = True
+    # Waits on LLM calls of its own (several rounds for long texts)
+    timeout_seconds = 180.0
 
     async def execute(
         self,
-        text: str,
+        text: str | None = None,
         max_length: int = 500,
         style: str = "concise",
+        document_id: str | None = None,
+        db: AsyncSession | None = None,
+        user_id: uuid.UUID | None = None,
         **kwargs: Any,
     ) -> ToolResult:
         """Execute summarization.
@@ -25,10 +44,16 @@ class SummarizeTool(BaseTool):
             text: Text content to summarize
             max_length: Approximate max length of summary in words
             style: Summary style - 'concise', 'detailed', or 'bullet_points'
+            document_id: Summarize this document instead of text
+            db: Database session (for document lookups)
+            user_id: User ID for the document ownership check
 
         Returns:
             ToolResult with summary text
         """
+        if document_id and db is not None and user_id is not None:
+            return await self._summarize_document(db, user_id, document_id, max_length, style)
+
         if not text or not text.strip():
             return ToolResult(
                 success=False,
@@ -36,50 +61,78 @@ class SummarizeTool(BaseTool):
             )
 
         try:
-            # Build prompt based on style
-            style_instructions = {
-                "concise": "Provide a brief, concise summary.",
-                "detailed": "Provide a comprehensive summary covering all key points.",
-                "bullet_points": "Provide a summary as bullet points.",
-            }
-
-            instruction = style_instructions.get(style, style_instructions["concise"])
-
-            messages = [
-                ChatMessage(
-                    role="system",
-                    content=f"""You are a summarization assistant. {instruction}
-Keep the summary under approximately {max_length} words.
-Focus on the most important information and key takeaways.""",
-                ),
-                ChatMessage(
-                    role="user",
-                    content=f"Please summarize the following text:\n\n{text}",
-                ),
-            ]
-
-            response = await llm_client.chat_completion(
-                messages=messages,
-                temperature=0.3,  # Lower temperature for consistent summaries
-                max_tokens=max_length * 2,  # Rough estimate for tokens
-            )
-
+            result = await summarizer.summarize(text, max_length=max_length, style=style)
+            return self._result(result, style, max_length)
+        except Exception as e:
             return ToolResult(
-                success=True,
-                data=response.content,
-                metadata={
-                    "style": style,
-                    "max_length": max_length,
-                    "model": response.model,
-                    "usage": response.usage,
-                },
+                success=False,
+                error=str(e),
             )
+
+    async def _summarize_document(
+        self,
+        db: AsyncSession,
+        user_id: uuid.UUID,
+        document_id: str,
+        max_length: int,
+        style: str,
+    ) -> ToolResult:
+        """Summarize a document, preferring its precomputed summaries."""
+        try:
+            doc_uuid = uuid.UUID(str(document_id))
+        except ValueError:
+            return ToolResult(success=False, error=f"Invalid document_id: {document_id}")
+
+        try:
+            stmt = select(Document).where(Document.id == doc_uuid, Document.user_id == user_id)
+            document = (await db.execute(stmt)).scalar_one_or_none()
+            if document is None:
+                return ToolResult(success=False, error=f"Document {document_id} not found")
+
+            if document.summary and style == "concise":
+                return ToolResult(
+                    success=True,
+                    data=document.summary,
+                    metadata={"document_id": str(doc_uuid), "source": "precomputed"},
+                )
+
+            if document.section_summaries:
+                # Restyle from the section summaries instead of the full text
+                text = "\n\n".join(section["summary"] for section in document.section_summaries)
+            else:
+                stmt = (
+                    select(DocumentChunk.content)
+                    .where(DocumentChunk.document_id == doc_uuid)
+                    .order_by(DocumentChunk.chunk_index)
+                )
+                text = "\n\n".join((await db.execute(stmt)).scalars().all())
+                if not text.strip():
+                    return ToolResult(success=False, error=f"Document {document_id} has no text")
+
+            result = await summarizer.summarize(text, max_length=max_length, style=style)
+            tool_result = self._result(result, style, max_length)
+            tool_result.metadata["document_id"] = str(doc_uuid)
+            return tool_result
         except Exception as e:
             return ToolResult(
                 success=False,
                 error=str(e),
             )
 
+    def _result(self, result: SummaryResult, style: str, max_length: int) -> ToolResult:
+        return ToolResult(
+            success=True,
+            data=result.summary,
+            metadata={
+                "style": style,
+                "max_length": max_length,
+                "model": result.model,
+                "usage": result.usage,
+                "chunks": result.chunks,
+                "cached_chunks": result.cached_chunks,
+            },
+        )
+
     def _get_parameters_schema(self) -> dict[str, Any]:
         """Get parameters schema for summarize tool."""
         return {
@@ -89,6 +142,10 @@ Focus on the most important information and key takeaways.""",
                     "type": "string",
                     "description": "The text content to summarize",
                 },
+                "document_id": {
+                    "type": "string",
+                    "description": "ID of a document to summarize (instead of text)",
+                },
                 "max_length": {
                     "type": "integer",
                     "description": "Approximate max length of summary in words (default: 500)",
@@ -101,7 +158,7 @@ Focus on the most important information and key takeaways.""",
                     "default": "concise",
                 },
             },
-            "required": ["text"],
+            "required": [],
         }
 
 
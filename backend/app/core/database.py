@@ -11,6 +11,18 @@ engine = create_async_engine(
     pool_pre_ping=True,
 )
 
+# Read-only sessions go to the read database if configured, else share
+# the primary's pool
+read_engine = (
+    create_async_engine(
+        settings.database_read_url,
+        echo=settings.debug,
+        pool_pre_ping=True,
+    )
+    if settings.database_read_url
+    else engine
+)
+
 SessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -19,6 +31,14 @@ SessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
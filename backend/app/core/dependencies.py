@@ -5,22 +5,28 @@ from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import SessionLocal
+from app.core.context import get_context
 from app.core.exceptions import InvalidCredentialsError
+from app.core.read_replica import replica_router
 from app.core.security import decode_token
+from app.core.unit_of_work import UnitOfWork
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency to get database session."""
-    async with SessionLocal() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
+async def get_uow() -> AsyncGenerator[UnitOfWork, None]:
+    """
+    Dependency to get the request's unit of work.
+
+    Committed when the request ends, rolled back if it raised.
+    """
+    async with UnitOfWork() as uow:
+        yield uow
+
+
+async def get_db(uow: UnitOfWork = Depends(get_uow)) -> AsyncSession:
+    """Dependency to get the request's database session (one per request)."""
+    return uow.session
 
 
 async def get_current_user_id(
@@ -47,7 +53,10 @@ async def get_current_user_id(
     if not user_id:
         raise InvalidCredentialsError("Invalid token")
 
-    return uuid.UUID(user_id)
+    # Lets commits record the user's writes for read-your-writes routing
+    ctx = get_context()
+    ctx.user_id = uuid.UUID(user_id)
+    return ctx.user_id
 
 
 async def get_optional_user_id(
@@ -74,23 +83,61 @@ async def get_optional_user_id(
     return uuid.UUID(user_id)
 
 
+async def get_read_db(
+    db: AsyncSession = Depends(get_db),
+    user_id: uuid.UUID | None = Depends(get_optional_user_id),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get a session for read-only queries.
+
+    A read-only session on the read replica when `replica_router` allows
+    it (replica configured, not lagging, no recent write by the user),
+    else the request's primary session. Never write through it.
+    """
+    async with replica_router.read_session(user_id) as session:
+        yield session if session is not None else db
+
+
 async def get_current_user(
     user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Dependency to get current user from database.
+    Dependency to get the current user's auth fields.
+
+    Returns a cached `AuthUser` (id, active, superuser, tier, plan), so
+    most requests do not query the users table. Use
+    `get_current_user_model` when the route needs the ORM `User`.
 
     Raises:
         InvalidCredentialsError: If user not found or inactive
     """
-    from sqlalchemy import select
+    from app.services.auth_cache import get_auth_user
 
+    user = await get_auth_user(db, user_id)
+
+    if not user:
+        raise InvalidCredentialsError("User not found")
+
+    if not user.is_active:
+        raise InvalidCredentialsError("User account is disabled")
+
+    return user
+
+
+async def get_current_user_model(
+    auth_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Dependency to load the current user's full `User` row.
+
+    Raises:
+        InvalidCredentialsError: If user not found or inactive
+    """
     from app.models.user import User
 
-    stmt = select(User).where(User.id == user_id)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
+    user = await db.get(User, auth_user.id)
 
     if not user:
         raise InvalidCredentialsError("User not found")
@@ -181,6 +228,46 @@ async def require_token_quota(
     return current_user
 
 
+async def require_rate_limit(
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Dependency to enforce the plan's requests per minute and per day.
+
+    Limits come from the cached quota snapshot and counters live in Redis,
+    so an allowed request normally does not query the database here.
+
+    Raises:
+        HTTPException 429: If a rate limit is exceeded, with a Retry-After header
+    """
+    from fastapi import HTTPException
+
+    from app.services.quota import get_quota_snapshot
+    from app.services.rate_limit import check_rate_limit
+
+    snapshot = await get_quota_snapshot(db, current_user.id)
+    result = await check_rate_limit(snapshot)
+
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "error": "rate_limited",
+                "quota_type": result.exceeded.name,
+                "message": (
+                    f"Rate limit of {result.exceeded.limit} "
+                    f"{result.exceeded.name.replace('_', ' ')} exceeded. "
+                    f"Try again in {result.retry_after} seconds."
+                ),
+                "retry_after": result.retry_after,
+            },
+            headers={"Retry-After": str(result.retry_after)},
+        )
+
+    return current_user
+
+
 async def require_document_quota(
     current_user=Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
@@ -0,0 +1,266 @@
+"""Routing of read-heavy queries to the read replica.
+
+`get_read_db` hands list, search, stats and retrieval queries a read-only
+session on the replica (`DATABASE_READ_URL`) when `replica_router` allows
+it, and the request's primary session otherwise:
+
+- Lag: the replica's replay lag is measured at most once per
+  `settings.read_replica_lag_check_interval_seconds`. Reads fall back to
+  the primary while it exceeds `settings.read_replica_max_lag_seconds`,
+  or while the replica cannot be reached.
+- Read-your-writes: a commit that wrote something records the request's
+  user's write time, per worker and in Redis. That user's reads stay on
+  the primary until the replica has caught up with the write (the lag at
+  the time plus `settings.read_replica_sticky_seconds` of margin).
+
+The decision is made once per request, when the dependency resolves, so a
+route that reads back its own writes in the same request must use `db`.
+Pointing DATABASE_READ_URL at the primary itself exercises the same path
+(`pg_is_in_recovery()` is false there, so the lag is 0).
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import settings
+from app.core.context import get_context
+from app.core.database import engine, read_engine
+from app.core.redis import get_redis
+from app.core.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+# Session.info key set once the current transaction has written
+WROTE = "wrote"
+
+# Replay lag in seconds, 0 on a primary or a replica that has replayed
+# everything it received (an idle primary leaves the replay timestamp old)
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+LAG_CHECK_TIMEOUT_SECONDS = 2.0
+
+# Errors that make the replica count as unavailable
+REPLICA_ERRORS = (OSError, SQLAlchemyError, asyncio.TimeoutError)
+
+# Local write times are pruned past this many users
+MAX_LOCAL_WRITES = 10000
+
+
+class ReplicaRouter:
+    """Decides per request whether reads may go to the replica."""
+
+    def __init__(self) -> None:
+        self._lag: float | None = None  # None while unknown or unreachable
+        self._checked_at = 0.0
+        self._checking = False
+        self._writes: dict[uuid.UUID, float] = {}
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.lag_fallbacks = 0
+        self.unavailable_fallbacks = 0
+        self.sticky_reads = 0
+        self.lag_checks = 0
+        self.writes_recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a separate read database is configured and routing is on."""
+        return settings.read_replica_enabled and read_engine is not engine
+
+    @staticmethod
+    def _key(user_id: uuid.UUID) -> str:
+        return f"lastwrite:{user_id}"
+
+    @property
+    def _sticky_ttl(self) -> int:
+        # Past the max lag reads fall back anyway
+        return int(settings.read_replica_max_lag_seconds + settings.read_replica_sticky_seconds) + 1
+
+    async def check_lag(self) -> float | None:
+        """Measure the replica's replay lag (None if it cannot be reached)."""
+        self.lag_checks += 1
+        try:
+            lag = await asyncio.wait_for(self._query_lag(), timeout=LAG_CHECK_TIMEOUT_SECONDS)
+        except REPLICA_ERRORS as e:
+            logger.warning(f"Read replica lag check failed: {e}")
+            lag = None
+        self._lag = float(lag) if lag is not None else None
+        self._checked_at = time.monotonic()
+        return self._lag
+
+    @staticmethod
+    async def _query_lag() -> Any:
+        async with read_engine.connect() as conn:
+            return await conn.scalar(LAG_QUERY)
+
+    async def replica_lag(self) -> float | None:
+        """Get the replica lag, re-measured at most once per check interval."""
+        due = time.monotonic() - self._checked_at >= settings.read_replica_lag_check_interval_seconds
+        if due and not self._checking:
+            # Concurrent requests use the previous value meanwhile
+            self._checking = True
+            try:
+                await self.check_lag()
+            finally:
+                self._checking = False
+        return self._lag
+
+    def mark_unavailable(self, error: BaseException) -> None:
+        """Send reads to the primary until the next lag check."""
+        logger.warning(f"Read replica unavailable: {error}")
+        self._lag = None
+        self._checked_at = time.monotonic()
+
+    def record_write(self, user_id: uuid.UUID) -> None:
+        """Note that a user's write was just committed."""
+        self.writes_recorded += 1
+        now = time.time()
+        if len(self._writes) >= MAX_LOCAL_WRITES:
+            horizon = now - self._sticky_ttl
+            self._writes = {k: t for k, t in self._writes.items() if t > horizon}
+        self._writes[user_id] = now
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Outside the app; other workers may read the replica early
+        task = loop.create_task(self._publish_write(user_id, now))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+    async def _publish_write(self, user_id: uuid.UUID, written_at: float) -> None:
+        try:
+            await get_redis().set(self._key(user_id), repr(written_at), ex=self._sticky_ttl)
+        except RedisError as e:
+            logger.warning(f"Recording last write failed: {e}")
+
+    async def last_write_at(self, user_id: uuid.UUID) -> float | None:
+        """Get a user's last recorded write time from any worker (None if none recent)."""
+        written_at = self._writes.get(user_id)
+        try:
+            raw = await get_redis().get(self._key(user_id))
+        except RedisError as e:
+            logger.warning(f"Reading last write failed: {e}")
+            raw = None
+        if raw is not None:
+            with contextlib.suppress(ValueError):
+                written_at = max(written_at or 0.0, float(raw))
+        return written_at
+
+    async def use_replica(self, user_id: uuid.UUID | None) -> bool:
+        """Whether this request's reads may go to the replica."""
+        if not self.enabled:
+            return False
+
+        lag = await self.replica_lag()
+        if lag is None:
+            self.unavailable_fallbacks += 1
+            return False
+        if lag > settings.read_replica_max_lag_seconds:
+            self.lag_fallbacks += 1
+            return False
+
+        if user_id is not None:
+            written_at = await self.last_write_at(user_id)
+            window = lag + settings.read_replica_sticky_seconds
+            if written_at is not None and time.time() - written_at < window:
+                self.sticky_reads += 1
+                return False
+        return True
+
+    @asynccontextmanager
+    async def read_session(self, user_id: uuid.UUID | None) -> AsyncIterator[AsyncSession | None]:
+        """
+        Open a read-only session on the replica if this request may use it.
+
+        Yields:
+            The replica session, or None when reads should use the primary
+        """
+        read_uow = None
+        if await self.use_replica(user_id):
+            read_uow = UnitOfWork(read_only=True)
+            try:
+                await read_uow.begin()
+            except REPLICA_ERRORS as e:
+                self.unavailable_fallbacks += 1
+                self.mark_unavailable(e)
+                read_uow = None
+
+        if read_uow is None:
+            self.primary_reads += 1
+            yield None
+            return
+
+        self.replica_reads += 1
+        try:
+            yield read_uow.session
+        finally:
+            await read_uow.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Get routing metrics."""
+        reads = self.replica_reads + self.primary_reads
+        return {
+            "enabled": self.enabled,
+            # -1 until the first lag check (or while the replica is unreachable)
+            "lag_seconds": round(self._lag, 3) if self._lag is not None else -1,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "replica_ratio": round(self.replica_reads / reads, 4) if reads else 0.0,
+            "lag_fallbacks": self.lag_fallbacks,
+            "unavailable_fallbacks": self.unavailable_fallbacks,
+            "sticky_reads": self.sticky_reads,
+            "lag_checks": self.lag_checks,
+            "writes_recorded": self.writes_recorded,
+        }
+
+
+# Last-write tasks started after commit, referenced until done
+_background: set[asyncio.Task] = set()
+
+# Singleton instance
+replica_router = ReplicaRouter()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flush(session: Session, flush_context: Any) -> None:
+    session.info[WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_dml(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session) -> None:
+    if not session.info.pop(WROTE, False) or not replica_router.enabled:
+        return
+    user_id = get_context().user_id
+    if user_id is not None:
+        replica_router.record_write(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_write(session: Session) -> None:
+    session.info.pop(WROTE, None)
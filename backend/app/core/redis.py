@@ -0,0 +1,28 @@
+"""Shared Redis client."""
+
+import redis.asyncio as redis
+
+from app.config import settings
+
+_client: redis.Redis | None = None
+
+
+def get_redis() -> redis.Redis:
+    """Get the shared async Redis client (created on first use)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            decode_responses=True,
+            socket_timeout=5.0,
+        )
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client (on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
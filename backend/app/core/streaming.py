@@ -0,0 +1,183 @@
+"""Server-Sent Events helpers for streaming chat responses."""
+
+import asyncio
+import json
+import time
+from typing import Any
+
+from starlette.requests import Request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# How often to check whether the client is still connected (seconds)
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+def dumps(data: Any) -> str:
+    """Serialize data to a compact JSON string, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(data, default=str, separators=(",", ":"))
+
+
+def sse_event(data: dict[str, Any]) -> str:
+    """Format a dict as a single SSE `data:` frame."""
+    return f"data: {dumps(data)}\n\n"
+
+
+class SSEStreamWriter:
+    """
+    Builds SSE frames for a streamed chat answer.
+
+    Constant fields are serialized once, deltas are collected in a list
+    (joined only once via `text`), and deltas can optionally be coalesced
+    into fewer frames. Coalescing is checked when a delta arrives: a frame
+    is emitted once `flush_interval_ms` has elapsed since the last frame,
+    or once at least `flush_bytes` of UTF-8 encoded content is pending.
+    With both at 0, every delta is sent as its own frame.
+
+    Usage:
+        writer = SSEStreamWriter(conversation_id=str(conversation_id))
+        async for chunk in llm_client.chat_completion_stream(...):
+            if frame := writer.add(chunk):
+                yield frame
+        if frame := writer.flush():
+            yield frame
+        full_response = writer.text
+    """
+
+    def __init__(
+        self,
+        conversation_id: str,
+        flush_interval_ms: int = 0,
+        flush_bytes: int = 0,
+    ) -> None:
+        self.conversation_id = conversation_id
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_bytes = flush_bytes
+        self.frames_sent = 0
+
+        self._parts: list[str] = []
+        self._pending: list[str] = []
+        self._pending_size = 0
+        self._last_flush = time.perf_counter()
+
+        # The first frame carries conversation_id so clients can pick it up;
+        # later frames only need the content.
+        self._first_prefix = (
+            f'data: {{"conversation_id":{dumps(conversation_id)},'
+            '"done":false,"content":'
+        )
+        self._prefix = 'data: {"done":false,"content":'
+        self._suffix = "}\n\n"
+
+    @property
+    def coalescing(self) -> bool:
+        """Whether deltas are batched into fewer frames."""
+        return self.flush_interval > 0 or self.flush_bytes > 0
+
+    @property
+    def text(self) -> str:
+        """Full response text accumulated so far."""
+        return "".join(self._parts)
+
+    def add(self, chunk: str) -> str | None:
+        """Add a content delta.
+
+        Returns:
+            An SSE frame to send now, or None if the delta was buffered
+        """
+        self._parts.append(chunk)
+
+        if not self.coalescing:
+            return self._frame(chunk)
+
+        self._pending.append(chunk)
+        self._pending_size += len(chunk.encode())
+
+        if self.flush_bytes and self._pending_size >= self.flush_bytes:
+            return self.flush()
+        if self.flush_interval and time.perf_counter() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return None
+
+    def flush(self) -> str | None:
+        """Emit any buffered deltas as a single frame."""
+        if not self._pending:
+            return None
+
+        content = "".join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        return self._frame(content)
+
+    def done(self, **fields: Any) -> str:
+        """Build the final frame with done=true plus any extra fields."""
+        return sse_event({
+            "content": "",
+            "done": True,
+            "conversation_id": self.conversation_id,
+            **fields,
+        })
+
+    def _frame(self, content: str) -> str:
+        prefix = self._first_prefix if self.frames_sent == 0 else self._prefix
+        self.frames_sent += 1
+        self._last_flush = time.perf_counter()
+        return f"{prefix}{dumps(content)}{self._suffix}"
+
+
+class DisconnectWatcher:
+    """
+    Cancel the task streaming a response as soon as the client disconnects.
+
+    Starlette only notices disconnects on some ASGI servers, and only when
+    it next sends a frame, so a stalled upstream read would keep running.
+    The watcher polls the request and cancels the current task; that
+    cancellation is absorbed on exit and `disconnected` is set, so the
+    generator can persist partial output and return normally.
+
+    Usage:
+        async with DisconnectWatcher(request) as watcher:
+            async for chunk in llm_client.chat_completion_stream(...):
+                yield chunk
+        if watcher.disconnected:
+            ...
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        poll_interval: float = DISCONNECT_POLL_INTERVAL,
+    ) -> None:
+        self.request = request
+        self.poll_interval = poll_interval
+        self.disconnected = False
+        self._task: asyncio.Task | None = None
+        self._watcher: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "DisconnectWatcher":
+        self._task = asyncio.current_task()
+        self._watcher = asyncio.create_task(self._watch())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if self._watcher is not None:
+            self._watcher.cancel()
+
+        # Swallow only the cancellation we triggered ourselves
+        if self.disconnected and exc_type is asyncio.CancelledError and self._task is not None:
+            self._task.uncancel()
+            return True
+        return False
+
+    async def _watch(self) -> None:
+        while not await self.request.is_disconnected():
+            await asyncio.sleep(self.poll_interval)
+
+        self.disconnected = True
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,185 @@
+"""Request-scoped unit of work and database instrumentation.
+
+Each request gets one `UnitOfWork` from `get_uow` (`get_db` hands out its
+session), shared by every dependency in the chain. Services flush;
+routes commit at explicit points with `uow.commit()` / `db.commit()`, and
+whatever is left is committed when the request ends (rolled back if it
+raised). A read-only unit of work uses `ReadSessionLocal` (the read
+database if configured), runs its transaction READ ONLY and refuses to
+flush or commit.
+
+Sessions, commits, rollbacks and SQL statements are counted per request
+on the RequestContext (set up by TraceContextMiddleware) and aggregated
+in `db_request_metrics`.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.context import get_context
+from app.core.database import ReadSessionLocal, SessionLocal, engine, read_engine
+
+logger = logging.getLogger(__name__)
+
+READ_ONLY = "read_only"
+
+
+class ReadOnlySessionError(RuntimeError):
+    """Raised when a read-only unit of work tries to write."""
+
+
+@dataclass
+class SessionStats:
+    """Database activity of one request."""
+
+    sessions: int = 0
+    commits: int = 0
+    rollbacks: int = 0
+    queries: int = 0
+    _seen: set[int] = field(default_factory=set, repr=False)
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "sessions": self.sessions,
+            "commits": self.commits,
+            "rollbacks": self.rollbacks,
+            "queries": self.queries,
+        }
+
+
+class UnitOfWork:
+    """One session with explicit commit points."""
+
+    def __init__(self, read_only: bool = False) -> None:
+        self.read_only = read_only
+        self.session: AsyncSession = (ReadSessionLocal if read_only else SessionLocal)()
+        self.session.info[READ_ONLY] = read_only
+
+    async def __aenter__(self) -> "UnitOfWork":
+        await self.begin()
+        return self
+
+    async def begin(self) -> None:
+        """Start a read-only unit's transaction (connects; closes the session if that fails)."""
+        if self.read_only:
+            try:
+                # Begin the transaction READ ONLY (SET TRANSACTION on asyncpg)
+                await self.session.connection(execution_options={"postgresql_readonly": True})
+            except BaseException:
+                await self.session.close()
+                raise
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if not self.read_only:
+                if exc_type is None:
+                    await self.session.commit()
+                else:
+                    await self.session.rollback()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Release the session (ends a read-only transaction without a ROLLBACK of its own)."""
+        await self.session.close()
+
+    async def commit(self) -> None:
+        """Commit the work so far (a new transaction starts on next use)."""
+        if self.read_only:
+            raise ReadOnlySessionError("Cannot commit a read-only unit of work")
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        """Discard the work since the last commit."""
+        await self.session.rollback()
+
+
+def _current_stats() -> SessionStats | None:
+    """Stats of the current request (None outside requests)."""
+    return get_context().get("db_stats")
+
+
+class DbRequestMetrics:
+    """Database activity aggregated over requests."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.sessions = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.over_threshold = 0
+
+    def record(self, path: str, stats: SessionStats) -> None:
+        """Add one finished request."""
+        self.requests += 1
+        self.sessions += stats.sessions
+        self.commits += stats.commits
+        self.rollbacks += stats.rollbacks
+        self.queries += stats.queries
+        self.max_queries = max(self.max_queries, stats.queries)
+        if stats.queries > settings.db_request_queries_warn_threshold:
+            self.over_threshold += 1
+            logger.warning(f"{path} ran {stats.queries} SQL statements ({stats.as_dict()})")
+
+    def stats(self) -> dict[str, int | float]:
+        """Get per-request averages and totals."""
+        requests = self.requests or 1
+        return {
+            "requests": self.requests,
+            "sessions_per_request": round(self.sessions / requests, 2),
+            "commits_per_request": round(self.commits / requests, 2),
+            "queries_per_request": round(self.queries / requests, 2),
+            "max_queries": self.max_queries,
+            "rollbacks": self.rollbacks,
+            "over_threshold": self.over_threshold,
+        }
+
+
+# Singleton instance
+db_request_metrics = DbRequestMetrics()
+
+
+def _count_query(*args: Any) -> None:
+    stats = _current_stats()
+    if stats is not None:
+        stats.queries += 1
+
+
+for _engine in {engine, read_engine}:
+    event.listen(_engine.sync_engine, "before_cursor_execute", _count_query)
+
+
+@event.listens_for(Session, "before_flush")
+def _refuse_read_only_flush(session: Session, flush_context: Any, instances: Any) -> None:
+    if session.info.get(READ_ONLY):
+        raise ReadOnlySessionError("Cannot flush changes in a read-only unit of work")
+
+
+@event.listens_for(Session, "after_begin")
+def _count_session(session: Session, transaction: Any, connection: Any) -> None:
+    stats = _current_stats()
+    if stats is not None and id(session) not in stats._seen:
+        stats._seen.add(id(session))
+        stats.sessions += 1
+
+
+@event.listens_for(Session, "after_commit")
+def _count_commit(session: Session) -> None:
+    stats = _current_stats()
+    if stats is not None:
+        stats.commits += 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _count_rollback(session: Session) -> None:
+    stats = _current_stats()
+    if stats is not None:
+        stats.rollbacks += 1
@@ -34,6 +34,10 @@ from app.routes.admin import system as admin_system
 from app.routes.admin import usage as admin_usage
 from app.routes.admin import users as admin_users
 from app.schemas.base import ErrorResponse
+from app.services.agent_loader import agent_loader
+from app.services.document_summary import document_summary_worker
+from app.services.usage_buffer import usage_buffer
+from app.services.user_counters import user_counters_reconciler
 
 
 @asynccontextmanager
@@ -41,8 +45,16 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
     setup_telemetry()
+    # Parse all agent configs once; later edits are picked up by mtime checks
+    agent_loader.reload(force=True)
+    document_summary_worker.start()
+    await usage_buffer.start()
+    user_counters_reconciler.start()
     yield
-    # Shutdown (cleanup if needed)
+    # Shutdown
+    await document_summary_worker.stop()
+    await usage_buffer.stop()
+    await user_counters_reconciler.stop()
 
 
 app = FastAPI(
@@ -5,6 +5,7 @@ from starlette.requests import Request
 from starlette.responses import Response
 
 from app.core.context import RequestContext, reset_context, set_context
+from app.core.unit_of_work import SessionStats, db_request_metrics
 
 
 class TraceContextMiddleware(BaseHTTPMiddleware):
@@ -14,13 +15,16 @@ class TraceContextMiddleware(BaseHTTPMiddleware):
     This middleware:
     1. Creates a new RequestContext at the start of each request
     2. Makes it available via get_context() throughout the request
-    3. Adds X-Trace-Id header to the response
-    4. Resets context after request completes
+    3. Counts the request's database sessions, commits and queries
+    4. Adds X-Trace-Id header to the response
+    5. Resets context after request completes
     """
 
     async def dispatch(self, request: Request, call_next) -> Response:
         # Create new context for this request
         ctx = RequestContext()
+        db_stats = SessionStats()
+        ctx.set("db_stats", db_stats)
         set_context(ctx)
 
         try:
@@ -32,5 +36,7 @@ class TraceContextMiddleware(BaseHTTPMiddleware):
 
             return response
         finally:
+            # Streamed bodies may still query after this point
+            db_request_metrics.record(request.url.path, db_stats)
             # Reset context after request
             reset_context()
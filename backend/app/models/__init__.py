@@ -21,7 +21,8 @@ from app.models.notification import (
     NotificationPriority,
 )
 from app.models.notification_preference import NotificationPreference
-from app.models.usage import UsageRecord, UsageSummary, RequestType
+from app.models.usage import UsageRecord, UsageSummary, UsageHourly, UsageDaily, RequestType
+from app.models.user_counters import UserCounters
 
 __all__ = [
     "TimestampMixin",
@@ -56,5 +57,8 @@ __all__ = [
     "NotificationPreference",
     "UsageRecord",
     "UsageSummary",
+    "UsageHourly",
+    "UsageDaily",
     "RequestType",
+    "UserCounters",
 ]
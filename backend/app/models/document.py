@@ -4,7 +4,7 @@ import uuid
 from enum import Enum
 
 from sqlalchemy import BigInteger, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.dialects.postgresql import ARRAY, JSON, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -50,6 +50,12 @@ class Document(Base, TimestampMixin):
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     tags: Mapped[list[str] | None] = mapped_column(ARRAY(String(50)), nullable=True)
+    # Precomputed at ingestion when document summaries are enabled
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    section_summaries: Mapped[list[dict] | None] = mapped_column(
+        JSON,
+        nullable=True,
+    )  # [{"section", "chunk_start", "chunk_end", "summary"}]
 
     # Relationships
     user: Mapped["User"] = relationship(back_populates="documents")
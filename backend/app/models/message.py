@@ -3,7 +3,7 @@
 import enum
 import uuid
 
-from sqlalchemy import Enum, ForeignKey, Index, Integer, Text
+from sqlalchemy import Boolean, Enum, ForeignKey, Index, Integer, Text, false
 from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -33,7 +33,6 @@ class Message(Base, TimestampMixin):
         UUID(as_uuid=True),
         ForeignKey("conversations.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     role: Mapped[MessageRole] = mapped_column(
         Enum(MessageRole),
@@ -47,19 +46,29 @@ class Message(Base, TimestampMixin):
         Integer,
         nullable=True,
     )
+    # True when a streamed answer was cut off by a client disconnect
+    truncated: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+    )
     # Full-text search vector (auto-updated by trigger)
     search_vector: Mapped[str | None] = mapped_column(
         TSVECTOR,
         nullable=True,
     )
 
-    # GIN index for full-text search
     __table_args__ = (
+        # GIN index for full-text search
         Index(
             'ix_messages_search_vector',
             'search_vector',
             postgresql_using='gin'
         ),
+        # History and per-period lookups by conversation (also serves
+        # conversation_id-only lookups, replacing ix_messages_conversation_id)
+        Index('ix_messages_conversation_created', 'conversation_id', 'created_at'),
     )
 
     # Relationships
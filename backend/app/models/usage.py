@@ -5,6 +5,7 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     DateTime,
     Enum,
@@ -170,5 +171,60 @@ class UsageSummary(Base, TimestampMixin):
         return f"<UsageSummary(user_id={self.user_id}, period={self.period}, requests={self.total_requests})>"
 
 
+class UsageRollupMixin(TimestampMixin):
+    """Usage totals per (user, model, request type) and time bucket.
+
+    Maintained incrementally by the usage pipeline together with
+    UsageSummary; analytics read these instead of raw usage records.
+    """
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # Start of the bucket (naive UTC); indexed for backfills by date range
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(), nullable=False, index=True)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    request_type: Mapped[RequestType] = mapped_column(Enum(RequestType), nullable=False)
+
+    requests: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    tokens_input: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    tokens_output: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    tokens_total: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    credits: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    cost: Mapped[float] = mapped_column(Numeric(14, 6), default=0.0, nullable=False)
+
+
+class UsageHourly(UsageRollupMixin, Base):
+    """Hourly usage rollup."""
+
+    __tablename__ = "usage_hourly"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "bucket_start", "model", "request_type", name="uq_usage_hourly_bucket"
+        ),
+    )
+
+
+class UsageDaily(UsageRollupMixin, Base):
+    """Daily usage rollup."""
+
+    __tablename__ = "usage_daily"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "bucket_start", "model", "request_type", name="uq_usage_daily_bucket"
+        ),
+    )
+
+
 # Import at the end to avoid circular imports
 from app.models.user import User  # noqa: E402, F401
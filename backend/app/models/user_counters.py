@@ -0,0 +1,39 @@
+"""Per-user counters for profile stats."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.base import TimestampMixin
+
+
+class UserCounters(Base, TimestampMixin):
+    """Row counts of a user's conversations, documents, agents and messages.
+
+    Kept current by database triggers on those tables (see the
+    add_user_counters migration) and corrected periodically by the
+    reconciler in app.services.user_counters.
+    """
+
+    __tablename__ = "user_counters"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    conversations_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    documents_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    agents_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    messages_count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    # Last time the reconciler recounted this row
+    reconciled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<UserCounters(user_id={self.user_id}, messages={self.messages_count})>"
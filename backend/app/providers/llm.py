@@ -2,8 +2,9 @@
 
 import json
 import logging
+import time
 from collections.abc import AsyncIterator
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 import httpx
@@ -15,12 +16,31 @@ logger = logging.getLogger(__name__)
 tracer = get_tracer(__name__)
 
 
+@dataclass
+class ToolCallRequest:
+    """Function call requested by the model in native tool-calling mode."""
+
+    id: str
+    name: str
+    arguments: str  # JSON-encoded, as sent by the provider
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to the OpenAI `tool_calls` entry format."""
+        return {
+            "id": self.id,
+            "type": "function",
+            "function": {"name": self.name, "arguments": self.arguments},
+        }
+
+
 @dataclass
 class ChatMessage:
     """Chat message structure."""
 
-    role: str  # system, user, assistant
+    role: str  # system, user, assistant, tool
     content: str
+    tool_calls: list[ToolCallRequest] | None = None  # assistant messages only
+    tool_call_id: str | None = None  # tool messages only
 
 
 @dataclass
@@ -31,6 +51,97 @@ class ChatCompletionResponse:
     role: str
     model: str
     usage: dict[str, int] | None = None
+    tool_calls: list[ToolCallRequest] = field(default_factory=list)
+
+
+@dataclass
+class StreamStats:
+    """Usage and latency metrics collected while consuming a stream.
+
+    Pass an instance to `chat_completion_stream` and read it once the
+    stream is exhausted.
+    """
+
+    model: str | None = None
+    usage: dict[str, int] | None = None
+    chunk_count: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: float | None = None
+    last_token_at: float | None = None
+    # Tool-call deltas assembled by index (native tool-calling mode)
+    _tool_call_parts: dict[int, dict[str, str]] = field(default_factory=dict, repr=False)
+
+    def mark_token(self) -> None:
+        """Record the arrival of a content chunk."""
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.last_token_at = now
+        self.chunk_count += 1
+
+    def add_tool_call_deltas(self, deltas: list[dict[str, Any]]) -> None:
+        """Merge streamed `tool_calls` deltas.
+
+        Providers send the call ID and function name once, then the JSON
+        arguments in fragments, all keyed by the call's index.
+        """
+        for delta in deltas:
+            part = self._tool_call_parts.setdefault(
+                delta.get("index", 0), {"id": "", "name": "", "arguments": ""}
+            )
+            if delta.get("id"):
+                part["id"] = delta["id"]
+            function = delta.get("function") or {}
+            if function.get("name"):
+                part["name"] += function["name"]
+            if function.get("arguments"):
+                part["arguments"] += function["arguments"]
+
+    @property
+    def tool_calls(self) -> list[ToolCallRequest]:
+        """Tool calls assembled so far, in index order."""
+        return [
+            ToolCallRequest(id=part["id"], name=part["name"], arguments=part["arguments"])
+            for _, part in sorted(self._tool_call_parts.items())
+        ]
+
+    @property
+    def ttft_ms(self) -> int | None:
+        """Time to first token in milliseconds."""
+        if self.first_token_at is None:
+            return None
+        return int((self.first_token_at - self.started_at) * 1000)
+
+    @property
+    def inter_token_ms(self) -> float | None:
+        """Mean gap between consecutive content chunks in milliseconds."""
+        if self.chunk_count < 2 or self.first_token_at is None or self.last_token_at is None:
+            return None
+        elapsed = self.last_token_at - self.first_token_at
+        return round(elapsed * 1000 / (self.chunk_count - 1), 2)
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        """Output throughput after the first token.
+
+        Uses completion tokens reported by the provider, falling back to the
+        number of content chunks when usage is unavailable.
+        """
+        if self.first_token_at is None or self.last_token_at is None:
+            return None
+        elapsed = self.last_token_at - self.first_token_at
+        if elapsed <= 0:
+            return None
+        tokens = (self.usage or {}).get("completion_tokens") or self.chunk_count
+        return round(tokens / elapsed, 2)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert latency metrics to dictionary."""
+        return {
+            "ttft_ms": self.ttft_ms,
+            "inter_token_ms": self.inter_token_ms,
+            "tokens_per_second": self.tokens_per_second,
+        }
 
 
 class LLMClient:
@@ -63,9 +174,28 @@ class LLMClient:
             headers["Authorization"] = f"Bearer {self.api_key}"
         return headers
 
-    def _format_messages(self, messages: list[ChatMessage]) -> list[dict[str, str]]:
+    def _format_messages(self, messages: list[ChatMessage]) -> list[dict[str, Any]]:
         """Format messages for API request."""
-        return [{"role": msg.role, "content": msg.content} for msg in messages]
+        formatted = []
+        for msg in messages:
+            item: dict[str, Any] = {"role": msg.role, "content": msg.content}
+            if msg.tool_calls:
+                item["tool_calls"] = [call.to_dict() for call in msg.tool_calls]
+            if msg.tool_call_id is not None:
+                item["tool_call_id"] = msg.tool_call_id
+            formatted.append(item)
+        return formatted
+
+    def _parse_tool_calls(self, raw_calls: list[dict[str, Any]] | None) -> list[ToolCallRequest]:
+        """Parse `tool_calls` from a non-streaming response message."""
+        return [
+            ToolCallRequest(
+                id=call.get("id", ""),
+                name=call.get("function", {}).get("name", ""),
+                arguments=call.get("function", {}).get("arguments") or "{}",
+            )
+            for call in raw_calls or []
+        ]
 
     async def chat_completion(
         self,
@@ -77,6 +207,8 @@ class LLMClient:
         frequency_penalty: float | None = None,
         presence_penalty: float | None = None,
         user: str | None = None,
+        tools: list[dict[str, Any]] | None = None,
+        tool_choice: str | dict[str, Any] | None = None,
         **kwargs: Any,
     ) -> ChatCompletionResponse:
         """
@@ -91,6 +223,8 @@ class LLMClient:
             frequency_penalty: Frequency penalty for token repetition
             presence_penalty: Presence penalty for new topics
             user: User identifier for usage tracking
+            tools: OpenAI function schemas for native tool calling
+            tool_choice: Tool choice ("auto", "none" or a specific function)
             **kwargs: Additional parameters
 
         Returns:
@@ -116,6 +250,10 @@ class LLMClient:
             payload["frequency_penalty"] = frequency_penalty
         if presence_penalty is not None:
             payload["presence_penalty"] = presence_penalty
+        if tools:
+            payload["tools"] = tools
+            if tool_choice is not None:
+                payload["tool_choice"] = tool_choice
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             # Add tracing if enabled
@@ -149,10 +287,12 @@ class LLMClient:
 
         choice = data["choices"][0]
         return ChatCompletionResponse(
-            content=choice["message"]["content"],
+            # Content is null when the model only requests tool calls
+            content=choice["message"].get("content") or "",
             role=choice["message"]["role"],
             model=data.get("model", model),
             usage=data.get("usage"),
+            tool_calls=self._parse_tool_calls(choice["message"].get("tool_calls")),
         )
 
     async def chat_completion_stream(
@@ -165,6 +305,9 @@ class LLMClient:
         frequency_penalty: float | None = None,
         presence_penalty: float | None = None,
         user: str | None = None,
+        tools: list[dict[str, Any]] | None = None,
+        tool_choice: str | dict[str, Any] | None = None,
+        stats: StreamStats | None = None,
         **kwargs: Any,
     ) -> AsyncIterator[str]:
         """
@@ -179,6 +322,10 @@ class LLMClient:
             frequency_penalty: Frequency penalty for token repetition
             presence_penalty: Presence penalty for new topics
             user: User identifier for usage tracking
+            tools: OpenAI function schemas for native tool calling
+            tool_choice: Tool choice ("auto", "none" or a specific function)
+            stats: Optional StreamStats filled with usage, latency metrics and
+                requested tool calls
             **kwargs: Additional parameters
 
         Yields:
@@ -192,6 +339,8 @@ class LLMClient:
             "messages": self._format_messages(messages),
             "temperature": temperature,
             "stream": True,
+            # Ask for a final chunk carrying token usage
+            "stream_options": {"include_usage": True},
             **kwargs,
         }
         if user is not None:
@@ -204,6 +353,13 @@ class LLMClient:
             payload["frequency_penalty"] = frequency_penalty
         if presence_penalty is not None:
             payload["presence_penalty"] = presence_penalty
+        if tools:
+            payload["tools"] = tools
+            if tool_choice is not None:
+                payload["tool_choice"] = tool_choice
+
+        if stats is not None:
+            stats.started_at = time.perf_counter()
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             async with client.stream(
@@ -227,16 +383,27 @@ class LLMClient:
 
                         try:
                             data = json.loads(data_str)
-                            choices = data.get("choices", [])
-                            if choices:
-                                delta = choices[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
                         except json.JSONDecodeError:
                             logger.warning(f"Failed to parse SSE data: {data_str}")
                             continue
 
+                        if stats is not None:
+                            if data.get("usage"):
+                                stats.usage = data["usage"]
+                            if data.get("model"):
+                                stats.model = data["model"]
+
+                        choices = data.get("choices", [])
+                        if choices:
+                            delta = choices[0].get("delta", {})
+                            if stats is not None and delta.get("tool_calls"):
+                                stats.add_tool_call_deltas(delta["tool_calls"])
+                            content = delta.get("content", "")
+                            if content:
+                                if stats is not None:
+                                    stats.mark_token()
+                                yield content
+
     async def health_check(self) -> bool:
         """Check if LiteLLM is reachable."""
         try:
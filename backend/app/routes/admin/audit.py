@@ -8,13 +8,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
 from app.core.dependencies import get_db, require_admin
-from app.models.user import User
 from app.schemas.admin import (
     AuditLogListResponse,
     AuditLogResponse,
 )
 from app.schemas.base import BaseResponse
 from app.services import audit_log as audit_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/audit", tags=["admin-audit"])
 
@@ -31,7 +31,7 @@ async def list_audit_logs(
     end_date: datetime | None = None,
     search: str | None = None,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[AuditLogListResponse]:
     """
     List audit logs with optional filters (admin only).
@@ -83,7 +83,7 @@ async def list_audit_logs(
 
 @router.get("/actions")
 async def get_action_types(
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[list[dict]]:
     """Get all available audit action types for filter dropdown (admin only)."""
     ctx = get_context()
@@ -98,7 +98,7 @@ async def get_action_types(
 
 @router.get("/target-types")
 async def get_target_types(
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[list[str]]:
     """Get all available target types for filter dropdown (admin only)."""
     ctx = get_context()
@@ -114,7 +114,7 @@ async def get_target_types(
 @router.get("/admins")
 async def get_admins(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[list[dict]]:
     """Get all admins for filter dropdown (admin only)."""
     ctx = get_context()
@@ -131,7 +131,7 @@ async def get_admins(
 async def get_audit_log(
     log_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[AuditLogResponse]:
     """Get a single audit log entry by ID (admin only)."""
     ctx = get_context()
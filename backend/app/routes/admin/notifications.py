@@ -22,6 +22,7 @@ from app.schemas.notification import (
 )
 from app.services import audit_log as audit_service
 from app.services import notification as notification_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/notifications", tags=["admin-notifications"])
 
@@ -73,7 +74,7 @@ class SendNotificationResponse(BaseModel):
 @router.get("/stats")
 async def get_notification_stats(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[NotificationStatsResponse]:
     """
     Get notification statistics for admin dashboard.
@@ -156,7 +157,7 @@ async def broadcast_notification(
     data: BroadcastNotificationCreate,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[BroadcastNotificationResponse]:
     """
     Broadcast a notification to multiple users.
@@ -282,7 +283,7 @@ async def send_notification_to_users(
     data: SendNotificationRequest,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SendNotificationResponse]:
     """
     Send a notification to specific users by their IDs.
@@ -392,7 +393,7 @@ async def get_recent_notifications(
     category: str | None = None,
     notification_type: str | None = None,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[dict]:
     """
     Get recent notifications across all users (admin view).
@@ -8,7 +8,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.context import get_context
 from app.core.dependencies import get_db, require_admin
 from app.models.audit_log import AuditAction
-from app.models.user import User
 from app.schemas.base import BaseResponse, MessageResponse
 from app.schemas.plan import (
     PlanCreate,
@@ -19,6 +18,7 @@ from app.schemas.plan import (
 )
 from app.services import audit_log as audit_service
 from app.services import plan as plan_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/plans", tags=["admin-plans"])
 
@@ -29,7 +29,7 @@ async def list_plans(
     per_page: int = 20,
     include_inactive: bool = True,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[PlanListResponse]:
     """List all plans with subscriber counts (admin only)."""
     ctx = get_context()
@@ -73,7 +73,7 @@ async def create_plan(
     data: PlanCreate,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[PlanResponse]:
     """Create a new plan (admin only)."""
     ctx = get_context()
@@ -113,7 +113,7 @@ async def create_plan(
 async def get_plan(
     plan_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[PlanWithSubscriberCountResponse]:
     """Get a plan by ID with subscriber count (admin only)."""
     ctx = get_context()
@@ -139,7 +139,7 @@ async def update_plan(
     data: PlanUpdate,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[PlanResponse]:
     """Update a plan (admin only)."""
     ctx = get_context()
@@ -188,7 +188,7 @@ async def delete_plan(
     plan_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Delete a plan (admin only). Cannot delete plans with active subscribers."""
     ctx = get_context()
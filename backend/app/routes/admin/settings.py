@@ -7,7 +7,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.context import get_context
 from app.core.dependencies import get_db, require_admin
 from app.models.audit_log import AuditAction
-from app.models.user import User
 from app.schemas.admin import (
     AllSettingsResponse,
     AllSettingsUpdate,
@@ -21,6 +20,7 @@ from app.schemas.admin import (
 from app.schemas.base import BaseResponse, MessageResponse
 from app.services import audit_log as audit_service
 from app.services import settings as settings_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/settings", tags=["admin-settings"])
 
@@ -28,7 +28,7 @@ router = APIRouter(prefix="/settings", tags=["admin-settings"])
 @router.get("")
 async def get_all_settings(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[AllSettingsResponse]:
     """Get all settings structured for frontend (admin only).
 
@@ -49,7 +49,7 @@ async def update_all_settings(
     data: AllSettingsUpdate,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[AllSettingsResponse]:
     """Update all settings at once (admin only).
 
@@ -105,7 +105,7 @@ async def update_all_settings(
 @router.get("/general")
 async def get_general_settings(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[GeneralSettings]:
     """Get general settings (admin only)."""
     ctx = get_context()
@@ -123,7 +123,7 @@ async def update_general_settings(
     data: GeneralSettings,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[GeneralSettings]:
     """Update general settings (admin only)."""
     ctx = get_context()
@@ -156,7 +156,7 @@ async def update_general_settings(
 @router.get("/payment")
 async def get_payment_settings(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[PaymentSettings]:
     """Get payment/Stripe settings (admin only)."""
     ctx = get_context()
@@ -174,7 +174,7 @@ async def update_payment_settings(
     data: PaymentSettings,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[PaymentSettings]:
     """Update payment/Stripe settings (admin only)."""
     ctx = get_context()
@@ -207,7 +207,7 @@ async def update_payment_settings(
 @router.get("/litellm")
 async def get_litellm_settings(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[LiteLLMSettings]:
     """Get LiteLLM settings (admin only)."""
     ctx = get_context()
@@ -225,7 +225,7 @@ async def update_litellm_settings(
     data: LiteLLMSettings,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[LiteLLMSettings]:
     """Update LiteLLM settings (admin only)."""
     ctx = get_context()
@@ -258,7 +258,7 @@ async def update_litellm_settings(
 @router.get("/notification")
 async def get_notification_settings(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[NotificationSettings]:
     """Get notification settings (admin only)."""
     ctx = get_context()
@@ -276,7 +276,7 @@ async def update_notification_settings(
     data: NotificationSettings,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[NotificationSettings]:
     """Update notification settings (admin only)."""
     ctx = get_context()
@@ -310,7 +310,7 @@ async def update_notification_settings(
 async def initialize_settings(
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Initialize default settings (admin only).
 
@@ -345,7 +345,7 @@ async def initialize_settings(
 async def get_all_settings_raw(
     category: str | None = None,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[list[SettingResponse]]:
     """Get all settings as raw key-value pairs (admin only).
 
@@ -387,7 +387,7 @@ async def update_setting_raw(
     data: SettingUpdate,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SettingResponse]:
     """Update a single setting by key (admin only)."""
     ctx = get_context()
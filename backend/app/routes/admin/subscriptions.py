@@ -8,7 +8,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.context import get_context
 from app.core.dependencies import get_db, require_admin
 from app.models.subscription import SubscriptionStatus
-from app.models.user import User
 from app.schemas.base import BaseResponse
 from app.schemas.subscription import (
     PlanSummary,
@@ -23,6 +22,7 @@ from app.schemas.subscription import (
     UserSummary,
 )
 from app.services import subscription as subscription_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/subscriptions", tags=["admin-subscriptions"])
 
@@ -54,7 +54,7 @@ async def list_subscriptions(
     plan_id: uuid.UUID | None = None,
     user_id: uuid.UUID | None = None,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SubscriptionListResponse]:
     """List all subscriptions with optional filters (admin only)."""
     ctx = get_context()
@@ -97,7 +97,7 @@ async def list_subscriptions(
 async def create_subscription(
     data: SubscriptionCreate,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SubscriptionDetailResponse]:
     """Create a new subscription for a user (admin only)."""
     ctx = get_context()
@@ -122,7 +122,7 @@ async def create_subscription(
 async def get_subscription(
     subscription_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SubscriptionDetailResponse]:
     """Get a subscription by ID (admin only)."""
     ctx = get_context()
@@ -142,7 +142,7 @@ async def upgrade_subscription(
     subscription_id: uuid.UUID,
     data: SubscriptionUpgrade,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SubscriptionDetailResponse]:
     """Upgrade a subscription to a higher tier plan (admin only)."""
     ctx = get_context()
@@ -172,7 +172,7 @@ async def downgrade_subscription(
     subscription_id: uuid.UUID,
     data: SubscriptionDowngrade,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SubscriptionDetailResponse]:
     """Downgrade a subscription to a lower tier plan (admin only)."""
     ctx = get_context()
@@ -202,7 +202,7 @@ async def cancel_subscription(
     subscription_id: uuid.UUID,
     data: SubscriptionCancel,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SubscriptionDetailResponse]:
     """Cancel a subscription (admin only)."""
     ctx = get_context()
@@ -231,7 +231,7 @@ async def cancel_subscription(
 async def reactivate_subscription(
     subscription_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SubscriptionDetailResponse]:
     """Reactivate a canceled subscription (admin only)."""
     ctx = get_context()
@@ -5,10 +5,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
 from app.core.dependencies import get_db, require_admin
-from app.models.user import User
 from app.schemas.admin import SystemHealthResponse, SystemMetrics
 from app.schemas.base import BaseResponse
 from app.services import system_health
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/system", tags=["admin-system"])
 
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/system", tags=["admin-system"])
 @router.get("/health")
 async def get_system_health_status(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SystemHealthResponse]:
     """Get system health status (admin only)."""
     ctx = get_context()
@@ -32,7 +32,7 @@ async def get_system_health_status(
 @router.get("/metrics")
 async def get_system_metrics_data(
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[SystemMetrics]:
     """Get system performance metrics (admin only)."""
     ctx = get_context()
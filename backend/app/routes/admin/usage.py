@@ -4,10 +4,10 @@ from fastapi import APIRouter, Depends
 
 from app.core.context import get_context
 from app.core.dependencies import require_admin
-from app.models.user import User
 from app.schemas.admin import UsageAnalyticsResponse
 from app.schemas.base import BaseResponse
 from app.services import admin_usage as usage_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/usage", tags=["admin-usage"])
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/usage", tags=["admin-usage"])
 @router.get("")
 async def get_usage_analytics(
     days: int = 30,
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[UsageAnalyticsResponse]:
     """Get usage analytics for admin dashboard (admin only)."""
     ctx = get_context()
@@ -6,9 +6,8 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
-from app.core.dependencies import get_db, require_admin
+from app.core.dependencies import get_db, get_read_db, require_admin
 from app.models.audit_log import AuditAction
-from app.models.user import User
 from app.schemas.admin import (
     AdminUserListResponse,
     AdminUserResponse,
@@ -23,6 +22,7 @@ from app.schemas.admin import (
 from app.schemas.base import BaseResponse, MessageResponse
 from app.services import admin_users as user_service
 from app.services import audit_log as audit_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/users", tags=["admin-users"])
 
@@ -34,8 +34,8 @@ async def list_users(
     search: str | None = None,
     plan: str | None = None,
     status: str | None = None,
-    db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[AdminUserListResponse]:
     """List all users with subscription and usage details (admin only)."""
     ctx = get_context()
@@ -74,7 +74,7 @@ async def list_users(
 async def get_user(
     user_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[AdminUserResponse]:
     """Get a user by ID (admin only)."""
     ctx = get_context()
@@ -99,7 +99,7 @@ async def get_user(
 async def get_user_detail(
     user_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[UserDetailResponse]:
     """Get complete user details for admin detail page (admin only)."""
     ctx = get_context()
@@ -121,7 +121,7 @@ async def update_user(
     data: AdminUserUpdate,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Update a user (admin only)."""
     ctx = get_context()
@@ -160,7 +160,7 @@ async def change_user_plan(
     data: ChangeUserPlanRequest,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Change a user's subscription plan (admin only)."""
     ctx = get_context()
@@ -205,7 +205,7 @@ async def suspend_user(
     request: Request,
     data: SuspendUserRequest | None = None,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Suspend a user account (admin only)."""
     ctx = get_context()
@@ -246,7 +246,7 @@ async def activate_user(
     user_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Activate a suspended user account (admin only)."""
     ctx = get_context()
@@ -284,7 +284,7 @@ async def ban_user(
     request: Request,
     data: SuspendUserRequest | None = None,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Ban a user account (admin only)."""
     ctx = get_context()
@@ -325,7 +325,7 @@ async def delete_user(
     user_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_admin),
+    admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[MessageResponse]:
     """Delete a user and all their data (admin only)."""
     ctx = get_context()
@@ -373,7 +373,7 @@ async def delete_user(
 async def bulk_user_action(
     data: BulkUserAction,
     db: AsyncSession = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: AuthUser = Depends(require_admin),
 ) -> BaseResponse[BulkActionResponse]:
     """Perform bulk actions on multiple users (admin only)."""
     ctx = get_context()
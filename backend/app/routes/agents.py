@@ -8,11 +8,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
 from app.core.dependencies import get_current_user, get_db
-from app.models.user import User
 from app.schemas.agent import AgentCreate, AgentInfo, AgentSource, AgentUpdate
 from app.schemas.base import BaseResponse
 from app.services import agent as agent_service
 from app.services.agent_loader import agent_loader
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
@@ -74,7 +74,7 @@ class AgentListResponse(BaseModel):
 
 @router.get("")
 async def list_agents(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[AgentListResponse]:
     """List all available agents (system + user's own)."""
@@ -108,7 +108,7 @@ async def list_agents(
 @router.post("")
 async def create_agent(
     data: AgentCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[AgentInfo]:
     """Create a new user agent."""
@@ -130,7 +130,7 @@ async def create_agent(
 @router.get("/{slug}")
 async def get_agent(
     slug: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[AgentDetailResponse]:
     """Get agent details by slug."""
@@ -190,7 +190,7 @@ async def get_agent(
 async def update_agent(
     agent_id: uuid.UUID,
     data: AgentUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[AgentInfo]:
     """Update a user agent (owner only)."""
@@ -215,7 +215,7 @@ async def update_agent(
 @router.delete("/{agent_id}")
 async def delete_agent(
     agent_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[dict]:
     """Delete a user agent (owner only)."""
@@ -234,7 +234,7 @@ async def delete_agent(
 @router.get("/{slug}/tools")
 async def get_agent_tools(
     slug: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[AgentToolsResponse]:
     """Get tools available for an agent."""
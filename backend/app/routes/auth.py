@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import get_current_user_model, get_db
 from app.models.user import User
 from app.schemas.auth import LoginRequest, RefreshTokenRequest, TokenResponse
 from app.schemas.base import BaseResponse, MessageResponse
@@ -73,7 +73,7 @@ async def logout() -> BaseResponse[MessageResponse]:
 
 @router.get("/me")
 async def get_me(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
 ) -> BaseResponse[UserResponse]:
     """Get current authenticated user."""
     ctx = get_context()
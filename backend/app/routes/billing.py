@@ -8,7 +8,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import get_current_user_model, get_db
 from app.models.plan import Plan
 from app.models.user import User
 from app.schemas.base import BaseResponse
@@ -48,7 +48,7 @@ class PortalResponse(BaseModel):
 @router.post("/checkout")
 async def create_checkout(
     request: CheckoutRequest,
-    user: User = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[CheckoutResponse]:
     """
@@ -95,7 +95,7 @@ async def create_checkout(
 @router.post("/portal")
 async def create_portal_session(
     request: PortalRequest,
-    user: User = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
 ) -> BaseResponse[PortalResponse]:
     """
     Create a Stripe customer portal session.
@@ -1,23 +1,32 @@
 """Chat API routes."""
 
-import json
+import asyncio
 import logging
 import time
 import uuid
+from contextlib import aclosing
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.definitions import agent_definitions
 from app.agents.engine import AgentEngine
+from app.config import settings
 from app.core.context import get_context
-from app.core.dependencies import get_current_user, get_db, require_token_quota
+from app.core.dependencies import (
+    get_current_user,
+    get_db,
+    get_read_db,
+    require_rate_limit,
+    require_token_quota,
+)
+from app.core.streaming import DisconnectWatcher, SSEStreamWriter, sse_event
 from app.models.usage import RequestType
-from app.models.user import User
 from app.providers.llm import ChatMessage as LLMChatMessage
-from app.providers.llm import llm_client
+from app.providers.llm import StreamStats, llm_client
 from app.schemas.base import BaseResponse
 from app.schemas.chat import (
     AgentChatResponse,
@@ -28,12 +37,14 @@ from app.schemas.chat import (
     UsageInfo,
 )
 from app.schemas.usage import UsageRecordCreate, get_credits_for_model
-from app.services import agent as agent_service
 from app.services import conversation as conversation_service
 from app.services import rag as rag_service
+from app.services import stream_replay
 from app.services import usage as usage_service
+from app.services.auth_cache import AuthUser
+from app.services.credits import CreditReservation, credit_accounting
 from app.services.models import fetch_models_from_litellm
-from app.services.quota import check_all_quotas
+from app.services.quota import reserve_quota
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["chat"])
@@ -49,10 +60,16 @@ async def record_chat_usage(
     message_id: uuid.UUID | None = None,
     agent_id: uuid.UUID | None = None,
     latency_ms: int | None = None,
+    extra_data: dict | None = None,
+    reservation: CreditReservation | None = None,
 ) -> None:
     """
     Record usage after a chat request completes.
 
+    Settles the request's credit reservation with the credits recorded (once
+    `db` commits if the usage is written in it), or releases it if recording
+    fails.
+
     Args:
         db: Database session
         user_id: User ID
@@ -63,6 +80,8 @@ async def record_chat_usage(
         message_id: Optional message ID
         agent_id: Optional agent ID
         latency_ms: Optional latency in milliseconds
+        extra_data: Optional metadata (e.g. streaming latency metrics)
+        reservation: Credits reserved for the request by `reserve_quota`
     """
     try:
         tokens_input = usage.get("prompt_tokens", 0) if usage else 0
@@ -85,14 +104,100 @@ async def record_chat_usage(
             conversation_id=conversation_id,
             message_id=message_id,
             agent_id=agent_id,
+            extra_data=extra_data,
         )
 
-        await usage_service.record_usage(db, user_id, record)
+        await usage_service.record_usage(db, user_id, record, reservation)
         logger.debug(f"Recorded usage for user {user_id}: model={model}, tokens={tokens_total}, credits={credits}")
 
     except Exception as e:
         # Don't fail the request if usage recording fails
         logger.error(f"Failed to record usage: {e}")
+        if reservation is not None:
+            await credit_accounting.release(reservation)
+
+
+async def save_stream_response(
+    conversation_id: uuid.UUID,
+    user_id: uuid.UUID,
+    content: str,
+    model: str,
+    usage: dict[str, int] | None,
+    request_type: RequestType,
+    latency_ms: int,
+    extra_data: dict,
+    agent_id: uuid.UUID | None = None,
+    truncated: bool = False,
+    reservation: CreditReservation | None = None,
+) -> None:
+    """
+    Persist a streamed assistant message and record its usage.
+
+    Uses its own session since stream generation outlives the request.
+    """
+    from app.core.database import SessionLocal
+
+    tokens_used = usage.get("total_tokens") if usage else None
+    async with SessionLocal() as session:
+        await conversation_service.add_message(
+            db=session,
+            conversation_id=conversation_id,
+            role="assistant",
+            content=content,
+            tokens_used=tokens_used,
+            truncated=truncated,
+        )
+
+        await record_chat_usage(
+            db=session,
+            user_id=user_id,
+            model=model,
+            usage=usage,
+            request_type=request_type,
+            conversation_id=conversation_id,
+            agent_id=agent_id,
+            latency_ms=latency_ms,
+            extra_data={**extra_data, "truncated": truncated},
+            reservation=reservation,
+        )
+        await session.commit()
+
+
+async def get_agent_engine(
+    db: AsyncSession,
+    agent_slug: str,
+    user_id: uuid.UUID,
+) -> tuple[AgentEngine, uuid.UUID | None]:
+    """
+    Create the engine for a user agent (DB) or system agent (YAML).
+
+    Definitions come from the agent definition cache, so repeated requests
+    skip the DB lookup and prompt compilation.
+
+    Returns:
+        Tuple of (engine, user agent ID or None for system agents)
+
+    Raises:
+        HTTPException: 404 if the agent does not exist
+    """
+    definition = await agent_definitions.get(db, agent_slug, user_id)
+    if definition is None:
+        raise HTTPException(status_code=404, detail=f"Agent not found: {agent_slug}")
+    return AgentEngine(agent_slug, definition=definition), definition.agent_id
+
+
+def format_agent_sources(sources: list[dict]) -> list[SourceInfo]:
+    """Convert rag_search chunks collected by an agent to SourceInfo."""
+    return [
+        SourceInfo(
+            document_id=s.get("document_id", ""),
+            filename=s.get("filename", "Unknown"),
+            chunk_index=s.get("chunk_index", 0),
+            score=s.get("score", 0.0),
+            content=s.get("content", ""),
+        )
+        for s in sources
+    ]
 
 
 class ModelInfo(BaseModel):
@@ -122,7 +227,7 @@ class ModelsResponse(BaseModel):
 
 @router.get("/models")
 async def get_models(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[ModelsResponse]:
     """
     Get available models for chat.
@@ -203,11 +308,12 @@ async def build_messages_from_history(
     return messages
 
 
-@router.post("")
+@router.post("", dependencies=[Depends(require_rate_limit)])
 async def chat(
     data: ChatRequest,
-    current_user: User = Depends(require_token_quota),
+    current_user: AuthUser = Depends(require_token_quota),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ) -> BaseResponse[ChatResponse | AgentChatResponse]:
     """
     Send a chat message and get a response (non-streaming).
@@ -216,7 +322,7 @@ async def chat(
     Messages are saved to the database.
     If agent_slug is provided, uses AgentEngine with tools.
 
-    Requires authentication. Returns 429 if token quota is exceeded.
+    Requires authentication. Returns 429 if the token, request or credit quota is exceeded.
     """
     ctx = get_context()
     ctx.user_id = current_user.id
@@ -227,6 +333,7 @@ async def chat(
         "agent_slug": data.agent_slug,
     })
 
+    reservation: CreditReservation | None = None
     try:
         # Get or create conversation
         conversation_id = await get_or_create_conversation(
@@ -258,36 +365,15 @@ async def chat(
 
         # If agent_slug is provided, use AgentEngine
         if data.agent_slug:
-            # Try to find user agent in DB first
-            user_agent = await agent_service.get_agent_by_slug(
-                db=db,
-                slug=data.agent_slug,
-                user_id=current_user.id,
-            )
+            engine, agent_id = await get_agent_engine(db, data.agent_slug, current_user.id)
 
-            # Check quota before making agent call
+            # Reserve credits before making agent call
             agent_model = data.model or llm_client.default_model
             credits_needed = get_credits_for_model(agent_model)
-            allowed, error_msg = await check_all_quotas(db, current_user.id, credits_needed)
-            if not allowed:
+            reservation, error_msg = await reserve_quota(db, current_user.id, credits_needed)
+            if reservation is None:
                 raise HTTPException(status_code=429, detail=error_msg)
 
-            if user_agent:
-                # User agent from DB - pass config to engine
-                engine = AgentEngine(
-                    agent_slug=data.agent_slug,
-                    document_ids=user_agent.document_ids,
-                    system_prompt=user_agent.system_prompt,
-                    tools_list=user_agent.tools,
-                    config=user_agent.config,
-                )
-            else:
-                # System agent from YAML
-                try:
-                    engine = AgentEngine(data.agent_slug)
-                except ValueError as e:
-                    raise HTTPException(status_code=404, detail=str(e))
-
             # Process with agent
             start_time = time.time()
             agent_response = await engine.process(
@@ -315,23 +401,19 @@ async def chat(
                 usage=agent_response.usage,
                 request_type=RequestType.AGENT,
                 conversation_id=conversation_id,
-                agent_id=user_agent.id if user_agent else None,
+                agent_id=agent_id,
                 latency_ms=latency_ms,
+                extra_data={
+                    "tool_results": agent_response.tool_result_stats,
+                    "budget": agent_response.budget,
+                },
+                reservation=reservation,
             )
 
             # Build sources from agent response
             sources = None
             if agent_response.sources:
-                sources = [
-                    SourceInfo(
-                        document_id=s.get("document_id", ""),
-                        filename=s.get("filename", "Unknown"),
-                        chunk_index=s.get("chunk_index", 0),
-                        score=s.get("score", 0.0),
-                        content=s.get("content", ""),
-                    )
-                    for s in agent_response.sources
-                ]
+                sources = format_agent_sources(agent_response.sources)
 
             # Build agent response
             usage_info = UsageInfo(**agent_response.usage) if agent_response.usage else None
@@ -360,7 +442,7 @@ async def chat(
         sources: list[SourceInfo] | None = None
         if data.use_rag:
             chunks = await rag_service.retrieve_context(
-                db=db,
+                db=read_db,
                 query=data.message,
                 user_id=current_user.id,
                 top_k=data.rag_top_k,
@@ -369,7 +451,7 @@ async def chat(
             )
             if chunks:
                 # Build RAG system prompt
-                rag_prompt = await rag_service.build_rag_prompt(db, chunks)
+                rag_prompt = await rag_service.build_rag_prompt(read_db, chunks)
                 # Prepend system message
                 messages.insert(0, LLMChatMessage(role="system", content=rag_prompt))
                 # Fetch document names for sources
@@ -378,7 +460,7 @@ async def chat(
                 from app.models.document import Document
                 document_ids = list(set(chunk.document_id for chunk in chunks))
                 stmt = select(Document.id, Document.filename).where(Document.id.in_(document_ids))
-                result = await db.execute(stmt)
+                result = await read_db.execute(stmt)
                 doc_names = {row.id: row.filename for row in result.all()}
                 # Build sources list
                 sources = [
@@ -392,11 +474,11 @@ async def chat(
                     for info in rag_service.format_sources(chunks, doc_names)
                 ]
 
-        # Check quota before making LLM call
+        # Reserve credits before making LLM call
         model_to_use = data.model or llm_client.default_model
         credits_needed = get_credits_for_model(model_to_use)
-        allowed, error_msg = await check_all_quotas(db, current_user.id, credits_needed)
-        if not allowed:
+        reservation, error_msg = await reserve_quota(db, current_user.id, credits_needed)
+        if reservation is None:
             raise HTTPException(status_code=429, detail=error_msg)
 
         # Call LLM with user_id for usage tracking
@@ -433,6 +515,7 @@ async def chat(
             request_type=request_type,
             conversation_id=conversation_id,
             latency_ms=latency_ms,
+            reservation=reservation,
         )
 
         # Build response
@@ -459,13 +542,19 @@ async def chat(
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
+    finally:
+        # No-op once usage was recorded
+        if reservation is not None:
+            await credit_accounting.release(reservation)
 
 
-@router.post("/stream")
+@router.post("/stream", dependencies=[Depends(require_rate_limit)])
 async def chat_stream(
+    request: Request,
     data: ChatRequest,
-    current_user: User = Depends(require_token_quota),
+    current_user: AuthUser = Depends(require_token_quota),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ):
     """
     Send a chat message and get a streaming response (SSE).
@@ -473,8 +562,15 @@ async def chat_stream(
     If conversation_id is not provided, a new conversation will be created.
     Messages are saved to the database.
 
-    Requires authentication. Returns 429 if token quota is exceeded.
-    Returns Server-Sent Events with X-Trace-Id header.
+    Every event carries an `id: <stream_id>:<seq>`. Generation runs in the
+    background and is buffered, so a client that reconnects with a
+    `Last-Event-ID` header resumes from the buffer without a new LLM call.
+    If no client is connected for `stream_resume_grace_seconds`, the
+    upstream LLM stream is cancelled and the partial answer is saved with
+    truncated=True.
+
+    Requires authentication. Returns 429 if the token, request or credit quota is exceeded.
+    Returns Server-Sent Events with X-Trace-Id and X-Stream-Id headers.
     """
     ctx = get_context()
     ctx.user_id = current_user.id
@@ -484,6 +580,11 @@ async def chat_stream(
         "message_length": len(data.message),
     })
 
+    # Resume an interrupted stream from the replay buffer
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        return await resume_chat_stream(request, last_event_id, current_user.id)
+
     # Get or create conversation before streaming starts
     conversation_id = await get_or_create_conversation(
         db=db,
@@ -519,7 +620,7 @@ async def chat_stream(
     if data.use_rag:
         retrieval_start = time.time()
         chunks = await rag_service.retrieve_context(
-            db=db,
+            db=read_db,
             query=data.message,
             user_id=current_user.id,
             top_k=data.rag_top_k,
@@ -528,7 +629,7 @@ async def chat_stream(
         )
         if chunks:
             # Build RAG system prompt
-            rag_prompt = await rag_service.build_rag_prompt(db, chunks)
+            rag_prompt = await rag_service.build_rag_prompt(read_db, chunks)
             # Prepend system message
             messages.insert(0, LLMChatMessage(role="system", content=rag_prompt))
             # Fetch document names for sources
@@ -537,17 +638,52 @@ async def chat_stream(
             from app.models.document import Document
             document_ids = list(set(chunk.document_id for chunk in chunks))
             stmt = select(Document.id, Document.filename).where(Document.id.in_(document_ids))
-            result = await db.execute(stmt)
+            result = await read_db.execute(stmt)
             doc_names = {row.id: row.filename for row in result.all()}
             # Build sources list for streaming response
             sources_data = rag_service.format_sources(chunks, doc_names)
             retrieval_latency_ms = int((time.time() - retrieval_start) * 1000)
 
+    # Reserve credits before making LLM call
+    credits_needed = get_credits_for_model(data.model or llm_client.default_model)
+    reservation, error_msg = await reserve_quota(db, current_user.id, credits_needed)
+    if reservation is None:
+        raise HTTPException(status_code=429, detail=error_msg)
+
     # Get user_id for closure
     user_id_str = str(current_user.id)
 
-    async def event_generator():
-        full_response = ""
+    async def save_response(
+        content: str,
+        stats: StreamStats,
+        llm_latency_ms: int,
+        truncated: bool = False,
+    ) -> None:
+        """Persist the assistant message and usage with streaming latency metrics."""
+        await save_stream_response(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            content=content,
+            model=stats.model or data.model or llm_client.default_model,
+            usage=stats.usage,
+            request_type=RequestType.RAG if data.use_rag else RequestType.CHAT,
+            latency_ms=llm_latency_ms,
+            extra_data={"stream": stats.to_dict()},
+            truncated=truncated,
+            reservation=reservation,
+        )
+
+    stream_id = uuid.uuid4().hex
+    user_id = current_user.id
+    replay_store = stream_replay.get_replay_store()
+
+    async def produce() -> None:
+        writer = SSEStreamWriter(
+            conversation_id=str(conversation_id),
+            flush_interval_ms=settings.sse_flush_interval_ms,
+            flush_bytes=settings.sse_flush_bytes,
+        )
+        stats = StreamStats()
         llm_start = time.time()
         try:
             # Stream response with user_id for usage tracking
@@ -560,56 +696,276 @@ async def chat_stream(
                 frequency_penalty=data.frequency_penalty,
                 presence_penalty=data.presence_penalty,
                 user=user_id_str,
+                stats=stats,
             ):
-                full_response += chunk
                 # SSE format: data: {"content": "...", "done": false}
-                event_data = json.dumps({
-                    "content": chunk,
-                    "done": False,
-                    "conversation_id": str(conversation_id),
-                })
-                yield f"data: {event_data}\n\n"
+                frame = writer.add(chunk)
+                if frame:
+                    await replay_store.append(stream_id, frame)
+
+            frame = writer.flush()
+            if frame:
+                await replay_store.append(stream_id, frame)
 
             # Calculate LLM latency
             llm_latency_ms = int((time.time() - llm_start) * 1000)
 
             # Save assistant message after streaming completes
-            # Note: We can't get token count from streaming response
-            await conversation_service.add_message(
-                db=db,
-                conversation_id=conversation_id,
-                role="assistant",
-                content=full_response,
-                tokens_used=None,
-            )
+            await save_response(writer.text, stats, llm_latency_ms)
 
-            # Send done signal with sources and latency data
-            done_data = {
-                "content": "",
-                "done": True,
-                "conversation_id": str(conversation_id),
-            }
+            # Send done signal with sources, usage and latency data
+            done_data = {}
             if sources_data:
                 done_data["sources"] = sources_data
+            if stats.usage:
+                done_data["usage"] = stats.usage
 
             # Add latency data
             done_data["latency"] = {
                 "retrieval_ms": retrieval_latency_ms,
                 "llm_ms": llm_latency_ms,
+                **stats.to_dict(),
             }
 
-            yield f"data: {json.dumps(done_data)}\n\n"
+            await replay_store.append(stream_id, writer.done(**done_data))
+
+        except asyncio.CancelledError:
+            # No client reattached within the grace period
+            logger.info(f"Stream {stream_id} abandoned, saving partial response")
+            llm_latency_ms = int((time.time() - llm_start) * 1000)
+            await save_response(writer.text, stats, llm_latency_ms, truncated=True)
 
         except Exception as e:
             logger.error(f"Chat stream error: {e}")
-            error_data = json.dumps({"error": str(e), "done": True})
-            yield f"data: {error_data}\n\n"
+            await replay_store.append(stream_id, sse_event({"error": str(e), "done": True}))
+
+        finally:
+            await credit_accounting.release(reservation)
+            await replay_store.finish(stream_id)
+
+    try:
+        await replay_store.create(stream_id, str(user_id))
+        # Make the user message visible to the producer's own session
+        await db.commit()
+    except BaseException:
+        # The producer never starts, so it cannot release the credits
+        await credit_accounting.release(reservation)
+        raise
+    stream_replay.start_producer(stream_id, produce())
+
+    return StreamingResponse(
+        stream_events(request, stream_id),
+        media_type="text/event-stream",
+        headers={
+            "X-Trace-Id": ctx.trace_id,
+            "X-Stream-Id": stream_id,
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
+
+
+@router.post("/agent/stream", dependencies=[Depends(require_rate_limit)])
+async def chat_agent_stream(
+    request: Request,
+    data: ChatRequest,
+    current_user: AuthUser = Depends(require_token_quota),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Chat with an agent and get a streaming response (SSE).
+
+    Runs `AgentEngine.process_stream` and forwards its events as
+    `{"type": "thinking" | "tool_call" | "tool_result" | "content", ...}`.
+    The final `{"type": "done", "done": true, ...}` event carries the
+    conversation ID, tools used, sources, usage summed over all LLM calls
+    and latency. The answer and usage are saved like `/chat` does.
+
+    Resumable with `Last-Event-ID` like `/chat/stream`.
+
+    Requires authentication and `agent_slug`. Returns 429 if quota is exceeded.
+    """
+    ctx = get_context()
+    ctx.user_id = current_user.id
+    ctx.set_data({
+        "action": "chat_agent_stream",
+        "model": data.model or llm_client.default_model,
+        "message_length": len(data.message),
+        "agent_slug": data.agent_slug,
+    })
+
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        return await resume_chat_stream(request, last_event_id, current_user.id)
+
+    if not data.agent_slug:
+        raise HTTPException(status_code=400, detail="agent_slug is required")
+
+    engine, agent_id = await get_agent_engine(db, data.agent_slug, current_user.id)
 
+    conversation_id = await get_or_create_conversation(
+        db=db,
+        user_id=current_user.id,
+        conversation_id=data.conversation_id,
+    )
+
+    if not data.skip_user_save:
+        await conversation_service.add_message(
+            db=db,
+            conversation_id=conversation_id,
+            role="user",
+            content=data.message,
+        )
+
+    messages = await build_messages_from_history(
+        db=db,
+        conversation_id=conversation_id,
+        user_id=current_user.id,
+        new_message=data.message,
+    )
+    if not data.skip_user_save:
+        messages = messages[:-1]
+    messages.append(LLMChatMessage(role="user", content=data.message))
+
+    # Reserve credits before making agent call
+    agent_model = data.model or llm_client.default_model
+    reservation, error_msg = await reserve_quota(db, current_user.id, get_credits_for_model(agent_model))
+    if reservation is None:
+        raise HTTPException(status_code=429, detail=error_msg)
+
+    stream_id = uuid.uuid4().hex
+    user_id = current_user.id
+    replay_store = stream_replay.get_replay_store()
+
+    async def produce() -> None:
+        from app.core.database import SessionLocal
+
+        content_parts: list[str] = []
+        done_event: dict = {}
+        start = time.perf_counter()
+        first_content_at: float | None = None
+
+        async def save(truncated: bool = False) -> int:
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            ttft_ms = int((first_content_at - start) * 1000) if first_content_at else None
+            await save_stream_response(
+                conversation_id=conversation_id,
+                user_id=user_id,
+                content="".join(content_parts),
+                model=done_event.get("model") or agent_model,
+                usage=done_event.get("usage"),
+                request_type=RequestType.AGENT,
+                latency_ms=latency_ms,
+                extra_data={
+                    "stream": {"ttft_ms": ttft_ms},
+                    "tools_used": done_event.get("tools_used", []),
+                    "tool_results": done_event.get("tool_result_stats"),
+                    "budget": done_event.get("budget"),
+                },
+                agent_id=agent_id,
+                truncated=truncated,
+                reservation=reservation,
+            )
+            return latency_ms
+
+        try:
+            # Tools get a session of their own: the request's is closed by now
+            async with SessionLocal() as session, aclosing(
+                engine.process_stream(messages=messages, db=session, user_id=user_id)
+            ) as events:
+                async for event in events:
+                    if event["type"] == "done":
+                        done_event = event
+                        continue
+                    if event["type"] == "thinking":
+                        # Text so far led up to tool calls; save only the final turn like /chat
+                        content_parts.clear()
+                    if event["type"] == "content":
+                        if first_content_at is None:
+                            first_content_at = time.perf_counter()
+                        content_parts.append(event["content"])
+                        # Only the final "done" event ends the stream for clients
+                        event = {**event, "done": False}
+                    await replay_store.append(stream_id, sse_event(event))
+
+            latency_ms = await save()
+            ttft_ms = int((first_content_at - start) * 1000) if first_content_at else None
+            await replay_store.append(stream_id, sse_event({
+                "type": "done",
+                "done": True,
+                "conversation_id": str(conversation_id),
+                "tools_used": done_event.get("tools_used", []),
+                "sources": [
+                    source.model_dump() for source in format_agent_sources(done_event.get("sources", []))
+                ],
+                "usage": done_event.get("usage"),
+                "latency": {"llm_ms": latency_ms, "ttft_ms": ttft_ms},
+            }))
+
+        except asyncio.CancelledError:
+            logger.info(f"Agent stream {stream_id} abandoned, saving partial response")
+            await save(truncated=True)
+
+        except Exception as e:
+            logger.error(f"Agent stream error: {e}")
+            await replay_store.append(
+                stream_id, sse_event({"type": "error", "error": str(e), "done": True})
+            )
+
+        finally:
+            await credit_accounting.release(reservation)
+            await replay_store.finish(stream_id)
+
+    try:
+        await replay_store.create(stream_id, str(user_id))
+        # Make the user message visible to the producer's own session
+        await db.commit()
+    except BaseException:
+        # The producer never starts, so it cannot release the credits
+        await credit_accounting.release(reservation)
+        raise
+    stream_replay.start_producer(stream_id, produce())
+
+    return StreamingResponse(
+        stream_events(request, stream_id),
+        media_type="text/event-stream",
+        headers={
+            "X-Trace-Id": ctx.trace_id,
+            "X-Stream-Id": stream_id,
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
+
+
+async def stream_events(request: Request, stream_id: str, after: int = 0):
+    """Send buffered stream frames to the client until done or disconnected."""
+    async with DisconnectWatcher(request):
+        async for frame in stream_replay.tail(stream_id, after):
+            yield frame
+
+
+async def resume_chat_stream(
+    request: Request,
+    last_event_id: str,
+    user_id: uuid.UUID,
+) -> StreamingResponse:
+    """Resume a stream after the event given in Last-Event-ID."""
+    parsed = stream_replay.parse_event_id(last_event_id)
+    if not parsed:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    stream_id, after = parsed
+    if not await stream_replay.can_resume(stream_id, after, str(user_id)):
+        raise HTTPException(status_code=410, detail="Stream can no longer be resumed")
+
+    ctx = get_context()
     return StreamingResponse(
-        event_generator(),
+        stream_events(request, stream_id, after),
         media_type="text/event-stream",
         headers={
             "X-Trace-Id": ctx.trace_id,
+            "X-Stream-Id": stream_id,
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
         },
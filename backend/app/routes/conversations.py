@@ -6,8 +6,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
-from app.core.dependencies import get_current_user, get_db
-from app.models.user import User
+from app.core.dependencies import get_current_user, get_db, get_read_db
 from app.schemas.base import BaseResponse, MessageResponse
 from app.schemas.conversation import (
     ConversationCreate,
@@ -22,6 +21,7 @@ from app.schemas.conversation import (
     MessageResponse as ConversationMessageResponse,
 )
 from app.services import conversation as conversation_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
@@ -30,8 +30,8 @@ router = APIRouter(prefix="/conversations", tags=["conversations"])
 async def search_conversations(
     q: str = Query(..., min_length=1, max_length=200, description="Search query"),
     limit: int = Query(default=20, ge=1, le=50, description="Max results"),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> BaseResponse[ConversationSearchResponse]:
     """
     Full-text search conversations by message content.
@@ -81,8 +81,8 @@ async def search_conversations(
 async def list_conversations(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> BaseResponse[ConversationListResponse]:
     """
     List user's conversations with pagination.
@@ -134,7 +134,7 @@ async def list_conversations(
 @router.post("")
 async def create_conversation(
     data: ConversationCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[ConversationResponse]:
     """Create a new conversation."""
@@ -164,7 +164,7 @@ async def create_conversation(
 @router.get("/{conversation_id}")
 async def get_conversation(
     conversation_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[ConversationDetailResponse]:
     """Get a conversation with all its messages."""
@@ -204,7 +204,7 @@ async def get_conversation(
 async def update_conversation(
     conversation_id: uuid.UUID,
     data: ConversationUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[ConversationResponse]:
     """Update a conversation (title)."""
@@ -241,7 +241,7 @@ async def update_conversation(
 @router.delete("/{conversation_id}")
 async def delete_conversation(
     conversation_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[MessageResponse]:
     """Delete a conversation and all its messages."""
@@ -7,8 +7,13 @@ from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
-from app.core.dependencies import get_current_user, get_db, require_document_quota
-from app.models.user import User
+from app.core.dependencies import (
+    get_current_user,
+    get_db,
+    get_read_db,
+    require_document_quota,
+    require_rate_limit,
+)
 from app.schemas.base import BaseResponse, MessageResponse
 from app.schemas.document import (
     ChunkSummary,
@@ -18,6 +23,7 @@ from app.schemas.document import (
     DocumentUpdate,
 )
 from app.services import document as document_service
+from app.services.auth_cache import AuthUser
 from app.services.storage import get_storage_service
 
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -26,12 +32,12 @@ ALLOWED_FILE_TYPES = {"pdf", "docx", "txt", "md", "csv"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
 
-@router.post("", status_code=201)
+@router.post("", status_code=201, dependencies=[Depends(require_rate_limit)])
 async def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_document_quota),
+    current_user: AuthUser = Depends(require_document_quota),
 ) -> BaseResponse[DocumentResponse]:
     """
     Upload a document and start processing.
@@ -107,8 +113,8 @@ async def _process_document_background(document_id: uuid.UUID) -> None:
 async def list_documents(
     page: int = 1,
     per_page: int = 20,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[DocumentListResponse]:
     """List user documents with pagination."""
     ctx = get_context()
@@ -143,7 +149,7 @@ async def list_documents(
 async def get_document(
     document_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[DocumentDetailResponse]:
     """Get document detail with chunks summary."""
     ctx = get_context()
@@ -183,6 +189,8 @@ async def get_document(
             error_message=document.error_message,
             description=document.description,
             tags=document.tags,
+            summary=document.summary,
+            section_summaries=document.section_summaries,
             created_at=document.created_at,
             updated_at=document.updated_at,
             chunks=chunks_summary,
@@ -195,7 +203,7 @@ async def update_document(
     document_id: uuid.UUID,
     data: DocumentUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[DocumentResponse]:
     """
     Update document metadata.
@@ -224,7 +232,7 @@ async def update_document(
 async def delete_document(
     document_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[MessageResponse]:
     """Delete a document and all its chunks."""
     ctx = get_context()
@@ -258,7 +266,7 @@ CONTENT_TYPES = {
 async def get_document_file(
     document_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> Response:
     """
     Get the raw file content of a document.
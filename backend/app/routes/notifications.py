@@ -7,7 +7,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
 from app.core.dependencies import get_current_user, get_db
-from app.models.user import User
 from app.schemas.base import BaseResponse
 from app.schemas.notification import (
     MarkAllAsReadResponse,
@@ -19,6 +18,7 @@ from app.schemas.notification import (
     UnreadCountResponse,
 )
 from app.services import notification as notification_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -29,7 +29,7 @@ async def list_notifications(
     per_page: int = 20,
     unread_only: bool = False,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[NotificationListResponse]:
     """
     List notifications for the current user.
@@ -73,7 +73,7 @@ async def list_notifications(
 @router.get("/unread-count")
 async def get_unread_count(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[UnreadCountResponse]:
     """Get the count of unread notifications for badge display."""
     ctx = get_context()
@@ -93,7 +93,7 @@ async def get_unread_count(
 async def mark_as_read(
     notification_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[MarkAsReadResponse]:
     """Mark a single notification as read."""
     ctx = get_context()
@@ -122,7 +122,7 @@ async def mark_as_read(
 @router.post("/read-all")
 async def mark_all_as_read(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[MarkAllAsReadResponse]:
     """Mark all notifications as read for the current user."""
     ctx = get_context()
@@ -145,7 +145,7 @@ async def mark_all_as_read(
 async def delete_notification(
     notification_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[dict]:
     """Delete a notification (soft delete)."""
     ctx = get_context()
@@ -171,7 +171,7 @@ async def delete_notification(
 @router.get("/preferences")
 async def get_preferences(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[NotificationPreferenceResponse]:
     """Get notification preferences for the current user."""
     ctx = get_context()
@@ -191,7 +191,7 @@ async def get_preferences(
 async def update_preferences(
     data: NotificationPreferenceUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[NotificationPreferenceResponse]:
     """Update notification preferences for the current user."""
     ctx = get_context()
@@ -1,17 +1,21 @@
 from datetime import datetime
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import and_, func, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import (
+    get_current_user,
+    get_current_user_model,
+    get_db,
+    get_read_db,
+)
 from app.core.exceptions import ConflictError
-from app.models.agent import Agent
 from app.models.conversation import Conversation
-from app.models.document import Document
 from app.models.message import Message
 from app.models.user import User
+from app.models.user_counters import UserCounters
 from app.schemas.base import BaseResponse, MessageResponse
 from app.schemas.stats import (
     QuotaStatusResponse,
@@ -27,7 +31,10 @@ from app.schemas.user import (
     UserUpdate,
 )
 from app.services.auth import change_password, delete_account
+from app.services.auth_cache import AuthUser
 from app.services.quota import get_user_quota
+from app.services.usage_rollups import get_usage_totals
+from app.services.user_counters import get_user_counters
 
 # Token limits by tier
 TIER_LIMITS: dict[str, int | None] = {
@@ -45,7 +52,7 @@ router = APIRouter(prefix="/profile", tags=["profile"])
 
 @router.get("")
 async def get_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
 ) -> BaseResponse[UserProfileResponse]:
     """Get current user's profile."""
     ctx = get_context()
@@ -58,7 +65,7 @@ async def get_profile(
 @router.put("")
 async def update_profile(
     data: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[UserProfileResponse]:
     """Update current user's profile."""
@@ -90,7 +97,7 @@ async def update_profile(
 @router.post("/change-password")
 async def change_user_password(
     data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[MessageResponse]:
     """Change current user's password."""
@@ -112,7 +119,7 @@ async def change_user_password(
 @router.post("/delete-account")
 async def delete_user_account(
     data: DeleteAccountRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[MessageResponse]:
     """Delete current user's account (soft delete)."""
@@ -132,55 +139,34 @@ async def delete_user_account(
 
 @router.get("/stats")
 async def get_user_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ) -> BaseResponse[UserStatsResponse]:
     """Get current user's usage statistics."""
     ctx = get_context()
 
-    # Count conversations
-    conv_result = await db.execute(
-        select(func.count(Conversation.id)).where(
-            Conversation.user_id == current_user.id
-        )
-    )
-    conversations_count = conv_result.scalar() or 0
-
-    # Count documents
-    doc_result = await db.execute(
-        select(func.count(Document.id)).where(Document.user_id == current_user.id)
-    )
-    documents_count = doc_result.scalar() or 0
-
-    # Count agents (user-created only)
-    agent_result = await db.execute(
-        select(func.count(Agent.id)).where(Agent.user_id == current_user.id)
-    )
-    agents_count = agent_result.scalar() or 0
-
-    # Count total messages (via conversations)
-    msg_result = await db.execute(
-        select(func.count(Message.id))
-        .join(Conversation, Message.conversation_id == Conversation.id)
-        .where(Conversation.user_id == current_user.id)
-    )
-    total_messages = msg_result.scalar() or 0
+    # Counters maintained by triggers, one row lookup (a missing row is
+    # created from scratch on the primary)
+    counters = await read_db.get(UserCounters, current_user.id)
+    if counters is None:
+        counters = await get_user_counters(db, current_user.id)
 
     return BaseResponse(
         trace_id=ctx.trace_id,
         data=UserStatsResponse(
-            conversations_count=conversations_count,
-            documents_count=documents_count,
-            agents_count=agents_count,
-            total_messages=total_messages,
+            conversations_count=counters.conversations_count,
+            documents_count=counters.documents_count,
+            agents_count=counters.agents_count,
+            total_messages=counters.messages_count,
         ),
     )
 
 
 @router.get("/usage")
 async def get_usage(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> BaseResponse[UserUsageResponse]:
     """Get user's token usage statistics."""
     ctx = get_context()
@@ -189,52 +175,24 @@ async def get_usage(
     now = datetime.utcnow()
     month_start = datetime(now.year, now.month, 1)
 
-    # Get user's conversation IDs
-    conv_stmt = select(Conversation.id).where(Conversation.user_id == current_user.id)
-    conv_result = await db.execute(conv_stmt)
-    conv_ids = [row[0] for row in conv_result.all()]
-
-    if not conv_ids:
-        # No conversations, return zeros
-        return BaseResponse(
-            trace_id=ctx.trace_id,
-            data=UserUsageResponse(
-                total_tokens=0,
-                total_messages=0,
-                tokens_this_month=0,
-                messages_this_month=0,
-                estimated_cost=0.0,
-                cost_this_month=0.0,
-                quota=None,
-            ),
-        )
-
-    # Total tokens and messages (all time)
-    total_stmt = select(
-        func.coalesce(func.sum(Message.tokens_used), 0).label("total_tokens"),
-        func.count(Message.id).label("total_messages"),
-    ).where(Message.conversation_id.in_(conv_ids))
-
-    total_result = await db.execute(total_stmt)
-    total_row = total_result.one()
-    total_tokens = int(total_row.total_tokens)
-    total_messages = int(total_row.total_messages)
-
-    # This month tokens and messages
-    month_stmt = select(
-        func.coalesce(func.sum(Message.tokens_used), 0).label("tokens"),
-        func.count(Message.id).label("messages"),
-    ).where(
-        and_(
-            Message.conversation_id.in_(conv_ids),
-            Message.created_at >= month_start,
+    # Tokens from the daily usage rollups
+    all_time, this_month = await get_usage_totals(db, current_user.id, since=month_start)
+    total_tokens = all_time.tokens_total
+    tokens_this_month = this_month.tokens_total
+
+    # Messages (all time and this month), one join over the user's
+    # conversations backed by ix_messages_conversation_created
+    message_stmt = (
+        select(
+            func.count(Message.id).label("total_messages"),
+            func.count(Message.id).filter(Message.created_at >= month_start).label("messages"),
         )
+        .join(Conversation, Message.conversation_id == Conversation.id)
+        .where(Conversation.user_id == current_user.id)
     )
-
-    month_result = await db.execute(month_stmt)
-    month_row = month_result.one()
-    tokens_this_month = int(month_row.tokens)
-    messages_this_month = int(month_row.messages)
+    message_row = (await db.execute(message_stmt)).one()
+    total_messages = int(message_row.total_messages)
+    messages_this_month = int(message_row.messages)
 
     # Calculate costs
     estimated_cost = (total_tokens / 1_000_000) * COST_PER_1M_TOKENS
@@ -267,7 +225,7 @@ async def get_usage(
 
 @router.get("/quota")
 async def get_quota(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> BaseResponse[UserQuotaResponse]:
     """
@@ -6,8 +6,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.context import get_context
-from app.core.dependencies import get_current_user, get_db, require_project_quota
-from app.models.user import User
+from app.core.dependencies import (
+    get_current_user,
+    get_db,
+    get_read_db,
+    require_project_quota,
+)
 from app.schemas.base import BaseResponse, MessageResponse
 from app.schemas.document import DocumentResponse
 from app.schemas.project import (
@@ -20,6 +24,7 @@ from app.schemas.project import (
     RemoveDocumentsRequest,
 )
 from app.services import project as project_service
+from app.services.auth_cache import AuthUser
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -28,7 +33,7 @@ router = APIRouter(prefix="/projects", tags=["projects"])
 async def create_project(
     data: ProjectCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_project_quota),
+    current_user: AuthUser = Depends(require_project_quota),
 ) -> BaseResponse[ProjectResponse]:
     """Create a new project. Returns 429 if project quota is exceeded."""
     ctx = get_context()
@@ -50,8 +55,8 @@ async def create_project(
 async def list_projects(
     page: int = 1,
     per_page: int = 20,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[ProjectListResponse]:
     """List user projects with pagination."""
     ctx = get_context()
@@ -86,7 +91,7 @@ async def list_projects(
 async def get_project(
     project_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[ProjectDetailResponse]:
     """Get project detail with document and conversation counts."""
     ctx = get_context()
@@ -120,7 +125,7 @@ async def update_project(
     project_id: uuid.UUID,
     data: ProjectUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[ProjectResponse]:
     """Update a project."""
     ctx = get_context()
@@ -148,7 +153,7 @@ async def update_project(
 async def delete_project(
     project_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[MessageResponse]:
     """Delete a project."""
     ctx = get_context()
@@ -175,7 +180,7 @@ async def assign_documents(
     project_id: uuid.UUID,
     data: AssignDocumentsRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[MessageResponse]:
     """Assign documents to a project."""
     ctx = get_context()
@@ -202,7 +207,7 @@ async def remove_documents(
     project_id: uuid.UUID,
     data: RemoveDocumentsRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[MessageResponse]:
     """Remove documents from a project."""
     ctx = get_context()
@@ -228,7 +233,7 @@ async def remove_documents(
 async def list_project_documents(
     project_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
 ) -> BaseResponse[list[DocumentResponse]]:
     """List documents in a project."""
     ctx = get_context()
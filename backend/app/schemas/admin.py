@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from enum import Enum
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class UserStats(BaseModel):
@@ -440,6 +440,7 @@ class SystemMetrics(BaseModel):
     error_rate_percent: float = 0
     active_users: int = 0
     uptime_seconds: float = 0
+    caches: dict[str, dict[str, bool | int | float]] = Field(default_factory=dict)
 
 
 # Audit Log schemas
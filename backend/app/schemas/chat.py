@@ -81,6 +81,9 @@ class LatencyInfo(BaseModel):
 
     retrieval_ms: int | None = None
     llm_ms: int | None = None
+    ttft_ms: int | None = None  # Time to first token (streaming only)
+    inter_token_ms: float | None = None  # Mean gap between chunks (streaming only)
+    tokens_per_second: float | None = None  # Output throughput (streaming only)
 
 
 class SourceInfo(BaseModel):
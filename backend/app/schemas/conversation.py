@@ -29,6 +29,7 @@ class MessageResponse(BaseModel):
     content: str
     created_at: datetime
     tokens_used: int | None = None
+    truncated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
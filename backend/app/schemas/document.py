@@ -26,6 +26,7 @@ class DocumentResponse(BaseModel):
     error_message: str | None
     description: str | None
     tags: list[str] | None
+    summary: str | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -65,6 +66,8 @@ class DocumentDetailResponse(BaseModel):
     error_message: str | None
     description: str | None
     tags: list[str] | None
+    summary: str | None = None
+    section_summaries: list[dict] | None = None
     created_at: datetime
     updated_at: datetime
     chunks: list[ChunkSummary]
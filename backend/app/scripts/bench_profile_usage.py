@@ -0,0 +1,189 @@
+"""Benchmark /profile/usage and monthly token queries for a heavy user.
+
+Before, both loaded every conversation ID of the user and sent them back
+in an `IN (...)` list. Token totals now come from the daily usage rollups
+and message counts from one join over the user's conversations, using
+the (conversation_id, created_at) index on messages.
+
+Seeds a throwaway user with `--conversations` conversations (two messages
+and one usage record each, spread over the last 90 days), runs the old
+and new queries, then deletes the user. Requires a migrated database.
+
+Run with: uv run python -m app.scripts.bench_profile_usage [--conversations 50000] [-n 20] [--keep]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.models.conversation import Conversation
+from app.models.message import Message, MessageRole
+from app.models.usage import RequestType
+from app.models.user import User
+from app.schemas.usage import UsageRecordCreate
+from app.scripts.bench_quota import measure, report
+from app.services.quota import get_tokens_used_this_month
+from app.services.usage import UsageEvent, write_usage_events
+from app.services.usage_rollups import get_usage_totals
+
+SEED_CHUNK_SIZE = 5000
+
+
+async def seed_user(db: AsyncSession, conversations: int) -> uuid.UUID:
+    """Create a user with the given number of conversations and their usage."""
+    user_id = uuid.uuid4()
+    suffix = user_id.hex[:12]
+    await db.execute(
+        insert(User).values(
+            id=user_id,
+            email=f"bench-{suffix}@example.com",
+            username=f"bench_{suffix}",
+            hashed_password="!",
+        )
+    )
+
+    now = datetime.now(UTC)
+    rng = random.Random(0)
+    for start in range(0, conversations, SEED_CHUNK_SIZE):
+        count = min(SEED_CHUNK_SIZE, conversations - start)
+        conv_rows, message_rows, events = [], [], []
+        for _ in range(count):
+            conv_id = uuid.uuid4()
+            created_at = now - timedelta(minutes=rng.randrange(90 * 24 * 60))
+            conv_rows.append({"id": conv_id, "user_id": user_id, "title": "bench", "created_at": created_at})
+            for offset, role in enumerate((MessageRole.USER, MessageRole.ASSISTANT)):
+                message_rows.append({
+                    "id": uuid.uuid4(),
+                    "conversation_id": conv_id,
+                    "role": role,
+                    "content": "bench",
+                    "tokens_used": 150 if role == MessageRole.ASSISTANT else None,
+                    "created_at": created_at + timedelta(seconds=offset),
+                })
+            events.append(
+                UsageEvent(
+                    user_id=user_id,
+                    data=UsageRecordCreate(
+                        request_type=RequestType.CHAT,
+                        model="gpt-4o-mini",
+                        tokens_input=50,
+                        tokens_output=100,
+                        tokens_total=150,
+                        conversation_id=conv_id,
+                    ),
+                    credits=1,
+                    period=created_at.strftime("%Y-%m"),
+                    created_at=created_at,
+                )
+            )
+        await db.execute(insert(Conversation).values(conv_rows))
+        await db.execute(insert(Message).values(message_rows))
+        await write_usage_events(db, events)
+        await db.commit()
+        print(f"seeded {start + count}/{conversations} conversations")
+
+    # Fresh statistics so the planner sees the seeded rows
+    for table in ("conversations", "messages", "usage_daily"):
+        await db.execute(text(f"ANALYZE {table}"))
+    await db.commit()
+    return user_id
+
+
+async def legacy_profile_usage(db: AsyncSession, user_id: uuid.UUID, month_start: datetime) -> tuple:
+    """The previous /profile/usage queries."""
+    conv_result = await db.execute(select(Conversation.id).where(Conversation.user_id == user_id))
+    conv_ids = [row[0] for row in conv_result.all()]
+    if not conv_ids:
+        return 0, 0, 0, 0
+
+    total_row = (
+        await db.execute(
+            select(
+                func.coalesce(func.sum(Message.tokens_used), 0),
+                func.count(Message.id),
+            ).where(Message.conversation_id.in_(conv_ids))
+        )
+    ).one()
+    month_row = (
+        await db.execute(
+            select(
+                func.coalesce(func.sum(Message.tokens_used), 0),
+                func.count(Message.id),
+            ).where(and_(Message.conversation_id.in_(conv_ids), Message.created_at >= month_start))
+        )
+    ).one()
+    return int(total_row[0]), int(total_row[1]), int(month_row[0]), int(month_row[1])
+
+
+async def profile_usage(db: AsyncSession, user_id: uuid.UUID, month_start: datetime) -> tuple:
+    """The /profile/usage queries: rollups for tokens, one join for messages."""
+    all_time, this_month = await get_usage_totals(db, user_id, since=month_start)
+    message_row = (
+        await db.execute(
+            select(
+                func.count(Message.id),
+                func.count(Message.id).filter(Message.created_at >= month_start),
+            )
+            .join(Conversation, Message.conversation_id == Conversation.id)
+            .where(Conversation.user_id == user_id)
+        )
+    ).one()
+    return all_time.tokens_total, int(message_row[0]), this_month.tokens_total, int(message_row[1])
+
+
+async def run(conversations: int, iterations: int, keep: bool) -> None:
+    async with SessionLocal() as db:
+        started = time.perf_counter()
+        user_id = await seed_user(db, conversations)
+        print(f"seeded user {user_id} in {time.perf_counter() - started:.1f} s")
+
+        now = datetime.utcnow()
+        month_start = datetime(now.year, now.month, 1)
+        try:
+            async def legacy_usage() -> None:
+                await legacy_profile_usage(db, user_id, month_start)
+
+            async def current_usage() -> None:
+                await profile_usage(db, user_id, month_start)
+
+            async def tokens_this_month() -> None:
+                await get_tokens_used_this_month(db, user_id)
+
+            # (total tokens, total messages, tokens this month, messages this month)
+            print(f"results {await profile_usage(db, user_id, month_start)}")
+            try:
+                print(f"legacy results {await legacy_profile_usage(db, user_id, month_start)}")
+                report("/profile/usage, IN list", *await measure(legacy_usage, iterations))
+            except Exception as e:
+                # asyncpg allows at most 32767 bind parameters per statement
+                print(f"/profile/usage, IN list: failed ({type(e).__name__}: {e})")
+                await db.rollback()
+
+            report("/profile/usage, rollups + join", *await measure(current_usage, iterations))
+            report("get_tokens_used_this_month", *await measure(tokens_this_month, iterations))
+        finally:
+            await db.rollback()
+            if not keep:
+                # Conversations, messages and usage rows cascade
+                await db.execute(delete(User).where(User.id == user_id))
+                await db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=50_000)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded user")
+    args = parser.parse_args()
+    asyncio.run(run(args.conversations, args.iterations, args.keep))
+
+
+if __name__ == "__main__":
+    main()
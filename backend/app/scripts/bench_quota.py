@@ -0,0 +1,138 @@
+"""Benchmark quota check latency and SQL statements per chat request.
+
+A chat request reads the user's quota snapshot three times (rate limit
+and token quota dependencies, then the credit reservation) and records
+usage once, which invalidates the cached snapshot. This benchmark replays
+that sequence with the quota cache disabled and enabled.
+
+Requires a migrated database with at least one user (and Redis if
+`QUOTA_CACHE_REDIS_ENABLED` is on).
+
+Run with: uv run python -m app.scripts.bench_quota [--user-id UUID] [-n 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy import event, select
+
+from app.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.user import User
+from app.services.credits import credit_accounting
+from app.services.quota import (
+    check_token_quota,
+    fetch_quota_snapshot,
+    get_quota_snapshot,
+    get_user_quota,
+    invalidate_user_quota,
+    quota_cache,
+    reserve_quota,
+)
+
+
+class QueryCounter:
+    """Count SQL statements sent through the app's engine."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def _on_execute(self, *args: Any) -> None:
+        self.count += 1
+
+    @contextmanager
+    def track(self) -> Iterator["QueryCounter"]:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        try:
+            yield self
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+
+async def measure(
+    func: Callable[[], Awaitable[Any]],
+    iterations: int,
+    warmup: int = 3,
+) -> tuple[list[float], int]:
+    """Run an async callable repeatedly.
+
+    Returns:
+        (latencies in ms, total SQL statements over the measured runs)
+    """
+    for _ in range(warmup):
+        await func()
+
+    counter = QueryCounter()
+    latencies = []
+    with counter.track():
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await func()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, counter.count
+
+
+def report(name: str, latencies: list[float], queries: int) -> None:
+    """Print one result line."""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{name:<44} p50 {statistics.median(ordered):8.2f} ms   "
+        f"p95 {p95:8.2f} ms   queries/run {queries / len(latencies):5.1f}"
+    )
+
+
+async def run(user_id: uuid.UUID | None, iterations: int) -> None:
+    async with SessionLocal() as db:
+        if user_id is None:
+            user_id = (await db.execute(select(User.id).limit(1))).scalar_one_or_none()
+            if user_id is None:
+                raise SystemExit("No users in the database; pass --user-id or create one")
+
+        async def snapshot_query() -> None:
+            await fetch_quota_snapshot(db, user_id)
+
+        async def cached_lookup() -> None:
+            await get_user_quota(db, user_id)
+
+        async def chat_request() -> None:
+            # Same checks as POST /chat, then the invalidation from recording usage
+            await get_quota_snapshot(db, user_id)
+            await check_token_quota(db, user_id)
+            reservation, _ = await reserve_quota(db, user_id, credits_needed=1)
+            if reservation is not None:
+                await credit_accounting.release(reservation)
+            await invalidate_user_quota(user_id)
+
+        print(f"user {user_id}, {iterations} iterations, redis={settings.quota_cache_redis_enabled}")
+
+        report("snapshot query (uncached)", *await measure(snapshot_query, iterations))
+
+        settings.quota_cache_enabled = False
+        report("chat request quota checks, cache off", *await measure(chat_request, iterations))
+
+        settings.quota_cache_enabled = True
+        report("chat request quota checks, cache on", *await measure(chat_request, iterations))
+
+        await invalidate_user_quota(user_id)
+        report("get_user_quota, warm cache", *await measure(cached_lookup, iterations))
+
+        print(f"cache stats: {quota_cache.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.user_id, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
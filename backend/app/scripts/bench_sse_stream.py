@@ -0,0 +1,105 @@
+"""Load benchmark for the chat SSE streaming path.
+
+Drives many concurrent fake token streams through the legacy framing
+(json.dumps of a fresh dict per delta, string +=) and through
+SSEStreamWriter, and reports CPU time per 1k streams.
+
+Run with: uv run python -m app.scripts.bench_sse_stream [--streams 1000] [--tokens 300]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable
+
+from app.core.streaming import SSEStreamWriter, orjson
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FAKE_TOKENS = ["Hello", " world", ",", " this", " is", " a", " streamed", " answer", ".", "\n"]
+
+
+async def fake_token_stream(tokens: int) -> AsyncIterator[str]:
+    """Yield tokens like an upstream LLM stream, yielding to the loop each time."""
+    for i in range(tokens):
+        yield FAKE_TOKENS[i % len(FAKE_TOKENS)]
+        await asyncio.sleep(0)
+
+
+async def legacy_stream(conversation_id: str, tokens: int) -> int:
+    """Framing as done before SSEStreamWriter."""
+    full_response = ""
+    sent = 0
+    async for chunk in fake_token_stream(tokens):
+        full_response += chunk
+        event_data = json.dumps({
+            "content": chunk,
+            "done": False,
+            "conversation_id": conversation_id,
+        })
+        sent += len(f"data: {event_data}\n\n")
+    return sent
+
+
+def writer_stream_factory(flush_interval_ms: int, flush_bytes: int) -> Callable:
+    """Build a stream function using SSEStreamWriter with the given flush policy."""
+
+    async def writer_stream(conversation_id: str, tokens: int) -> int:
+        writer = SSEStreamWriter(
+            conversation_id=conversation_id,
+            flush_interval_ms=flush_interval_ms,
+            flush_bytes=flush_bytes,
+        )
+        sent = 0
+        async for chunk in fake_token_stream(tokens):
+            frame = writer.add(chunk)
+            if frame:
+                sent += len(frame)
+        frame = writer.flush()
+        if frame:
+            sent += len(frame)
+        _ = writer.text
+        return sent
+
+    return writer_stream
+
+
+async def run_case(name: str, stream_fn: Callable, streams: int, tokens: int) -> None:
+    """Run `streams` concurrent streams and log CPU per 1k streams."""
+    conversation_ids = [str(uuid.uuid4()) for _ in range(streams)]
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    sizes = await asyncio.gather(*(stream_fn(cid, tokens) for cid in conversation_ids))
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    logger.info(
+        f"{name:<28} cpu/1k streams={cpu * 1000 / streams:8.3f}s "
+        f"wall={wall:6.2f}s bytes/stream={sum(sizes) // streams}"
+    )
+
+
+async def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=300)
+    args = parser.parse_args()
+
+    logger.info(
+        f"{args.streams} concurrent streams x {args.tokens} tokens "
+        f"(orjson {'enabled' if orjson else 'not installed'})"
+    )
+    await run_case("legacy json.dumps", legacy_stream, args.streams, args.tokens)
+    await run_case("writer (per delta)", writer_stream_factory(0, 0), args.streams, args.tokens)
+    await run_case("writer (256 chars)", writer_stream_factory(0, 256), args.streams, args.tokens)
+    await run_case("writer (50 ms)", writer_stream_factory(50, 0), args.streams, args.tokens)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Backfill and check the hourly and daily usage rollups.
+
+`backfill` rebuilds the rollups of each day in the range from the raw
+usage records (run it once after the rollup migration, covering all
+existing usage). `check` compares the rollups with the raw records and
+lists the buckets that differ; with `--fix` it rebuilds the affected days.
+
+Run with:
+    uv run python -m app.scripts.usage_rollups backfill [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+    uv run python -m app.scripts.usage_rollups check [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--fix]
+
+`--until` is exclusive and defaults to tomorrow (UTC). `--since` defaults
+to the first usage record for `backfill` and to 7 days ago for `check`.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core.database import SessionLocal
+from app.models.usage import UsageRecord
+from app.services.usage_rollups import backfill_rollups, check_rollups
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill(since: date | None, until: date) -> None:
+    async with SessionLocal() as session:
+        if since is None:
+            first = (await session.execute(select(func.min(UsageRecord.created_at)))).scalar_one_or_none()
+            if first is None:
+                logger.info("No usage records, nothing to backfill")
+                return
+            since = first.astimezone(UTC).date()
+        days = await backfill_rollups(session, since, until)
+    logger.info(f"Rebuilt usage rollups for {days} days ({since} to {until})")
+
+
+async def check(since: date, until: date, fix: bool) -> int:
+    async with SessionLocal() as session:
+        mismatches = await check_rollups(session, since, until)
+        for mismatch in mismatches:
+            logger.warning(
+                f"{mismatch.granularity} {mismatch.bucket_start} user={mismatch.user_id} "
+                f"model={mismatch.model} type={mismatch.request_type}: "
+                f"raw={mismatch.raw} rollup={mismatch.rollup}"
+            )
+        logger.info(f"{len(mismatches)} mismatched rollup buckets between {since} and {until}")
+
+        if fix and mismatches:
+            for day in sorted({mismatch.bucket_start.date() for mismatch in mismatches}):
+                await backfill_rollups(session, day, day + timedelta(days=1))
+    return len(mismatches)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    tomorrow = datetime.now(UTC).date() + timedelta(days=1)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Rebuild rollups from raw usage records")
+    backfill_parser.add_argument("--since", type=date.fromisoformat, default=None)
+    backfill_parser.add_argument("--until", type=date.fromisoformat, default=tomorrow)
+
+    check_parser = subparsers.add_parser("check", help="Compare rollups with raw usage records")
+    check_parser.add_argument("--since", type=date.fromisoformat, default=tomorrow - timedelta(days=8))
+    check_parser.add_argument("--until", type=date.fromisoformat, default=tomorrow)
+    check_parser.add_argument("--fix", action="store_true", help="Rebuild the days that differ")
+
+    args = parser.parse_args()
+    if args.command == "backfill":
+        asyncio.run(backfill(args.since, args.until))
+    else:
+        mismatches = asyncio.run(check(args.since, args.until, args.fix))
+        # Non-zero exit lets a cron job alert on drift
+        sys.exit(1 if mismatches and not args.fix else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,8 @@ from app.models.plan import Plan
 from app.models.subscription import BillingInterval, Subscription, SubscriptionStatus
 from app.models.user import User
 from app.schemas.admin import AdminUserUpdate
+from app.services.auth_cache import invalidate_auth_user
+from app.services.quota import invalidate_user_quota
 
 
 @traced()
@@ -155,6 +157,7 @@ async def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
 
+    await invalidate_auth_user(db, user_id)
     return user
 
 
@@ -178,6 +181,8 @@ async def suspend_user(
             sub.canceled_at = datetime.utcnow()
             sub.cancel_reason = reason or "Account suspended by admin"
 
+    await invalidate_user_quota(user_id, db)
+    await invalidate_auth_user(db, user_id)
     return user
 
 
@@ -192,6 +197,7 @@ async def activate_user(
         return None
 
     user.is_active = True
+    await invalidate_auth_user(db, user_id)
     return user
 
 
@@ -217,6 +223,7 @@ async def delete_user(
         return False
 
     await db.delete(user)
+    await invalidate_auth_user(db, user_id)
     return True
 
 
@@ -260,6 +267,8 @@ async def change_user_plan(
     # Update user tier
     user.tier = plan.plan_type
 
+    await invalidate_user_quota(user_id, db)
+    await invalidate_auth_user(db, user_id)
     return new_subscription
 
 
@@ -7,6 +7,7 @@ from typing import Any
 from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.definitions import agent_definitions
 from app.core.telemetry import traced
 from app.models.agent import Agent, AgentSource
 from app.schemas.agent import AgentCreate, AgentUpdate
@@ -52,6 +53,7 @@ async def create_agent(
     db.add(agent)
     await db.flush()
     await db.refresh(agent)
+    agent_definitions.invalidate_slug(agent.slug, db)
 
     logger.info(f"Created agent {agent.id} ({agent.slug}) for user {user_id}")
     return agent
@@ -249,6 +251,7 @@ async def update_agent(
         logger.warning(f"Attempt to update system agent {agent_id}")
         return None
 
+    old_slug = agent.slug
     if data.name is not None:
         agent.name = data.name
     if data.slug is not None:
@@ -272,6 +275,8 @@ async def update_agent(
 
     await db.flush()
     await db.refresh(agent)
+    agent_definitions.invalidate_slug(old_slug, db)
+    agent_definitions.invalidate_slug(agent.slug, db)
     logger.info(f"Updated agent {agent_id}")
     return agent
 
@@ -304,6 +309,7 @@ async def delete_agent(
 
     await db.delete(agent)
     await db.flush()
+    agent_definitions.invalidate_slug(agent.slug, db)
 
     logger.info(f"Deleted agent {agent_id}")
     return True
@@ -1,14 +1,38 @@
 """Agent configuration loader from YAML files."""
 
-from functools import lru_cache
+import copy
+import logging
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _ConfigFile:
+    """A parsed agent YAML file and the mtime it was parsed at."""
+
+    mtime_ns: int
+    config: dict[str, Any]
+
 
 class AgentLoader:
-    """Load and cache agent configurations from YAML files."""
+    """Load and cache agent configurations from YAML files.
+
+    All YAML files are parsed once into a snapshot that serves both
+    `load_agent` and `list_agents`. The directory is re-checked at most every
+    `settings.agent_config_check_interval_seconds`; only files whose mtime
+    changed are re-parsed, and the new snapshot replaces the old one in a
+    single assignment, so readers never see a half-reloaded set. A file that
+    fails to parse keeps its previous version.
+    """
 
     def __init__(self, config_dir: Path | None = None) -> None:
         """Initialize the agent loader.
@@ -23,12 +47,80 @@ class AgentLoader:
         else:
             self._config_dir = config_dir
 
+        # File stem -> parsed file
+        self._files: dict[str, _ConfigFile] = {}
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
     @property
     def config_dir(self) -> Path:
         """Get the config directory path."""
         return self._config_dir
 
-    @lru_cache(maxsize=32)
+    def reload(self, force: bool = False) -> bool:
+        """Re-scan the config directory and re-parse changed files.
+
+        Args:
+            force: Scan even if the last check is more recent than the interval
+
+        Returns:
+            True if any agent was added, changed or removed
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._checked_at is not None
+            and now - self._checked_at < settings.agent_config_check_interval_seconds
+        ):
+            return False
+
+        with self._lock:
+            current = self._files
+            files: dict[str, _ConfigFile] = {}
+            if self._config_dir.exists():
+                for yaml_file in sorted(self._config_dir.glob("*.yaml")):
+                    try:
+                        mtime_ns = yaml_file.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+                    previous = current.get(yaml_file.stem)
+                    if previous is not None and previous.mtime_ns == mtime_ns:
+                        files[yaml_file.stem] = previous
+                        continue
+                    try:
+                        files[yaml_file.stem] = _ConfigFile(mtime_ns, self._load_yaml(yaml_file))
+                    except (OSError, yaml.YAMLError) as e:
+                        logger.error(f"Failed to load agent config {yaml_file}: {e}")
+                        if previous is not None:
+                            files[yaml_file.stem] = previous
+
+            changed = files.keys() != current.keys() or any(
+                files[stem] is not current[stem] for stem in files
+            )
+            if changed:
+                logger.info(f"Loaded {len(files)} agent configs from {self._config_dir}")
+            self._files = files
+            self._checked_at = now
+            return changed
+
+    def _get_file(self, slug: str) -> _ConfigFile | None:
+        """Get the parsed file for a slug (as-is, or with '-' replaced by '_')."""
+        self.reload()
+        files = self._files
+        return files.get(slug) or files.get(slug.replace("-", "_"))
+
+    def get_version(self, slug: str) -> str | None:
+        """Get a version tag for an agent's config (changes when the file does).
+
+        Args:
+            slug: The agent slug
+
+        Returns:
+            The file's modification time in nanoseconds, or None if not found
+        """
+        config_file = self._get_file(slug)
+        return str(config_file.mtime_ns) if config_file else None
+
     def load_agent(self, slug: str) -> dict[str, Any] | None:
         """Load agent configuration by slug.
 
@@ -36,17 +128,12 @@ class AgentLoader:
             slug: The agent slug (e.g., 'general', 'hr', 'mental-health')
 
         Returns:
-            Agent configuration dict or None if not found
+            Agent configuration dict (a copy) or None if not found
         """
-        # Try with slug as-is, then with underscore replacement
-        possible_names = [slug, slug.replace("-", "_")]
-
-        for name in possible_names:
-            config_file = self._config_dir / f"{name}.yaml"
-            if config_file.exists():
-                return self._load_yaml(config_file)
-
-        return None
+        config_file = self._get_file(slug)
+        if config_file is None or not config_file.config:
+            return None
+        return copy.deepcopy(config_file.config)
 
     def _load_yaml(self, file_path: Path) -> dict[str, Any]:
         """Load and parse a YAML file.
@@ -60,32 +147,28 @@ class AgentLoader:
         with open(file_path, encoding="utf-8") as f:
             return yaml.safe_load(f)
 
-    @lru_cache(maxsize=1)
     def list_agents(self) -> list[dict[str, Any]]:
         """List all available agents.
 
         Returns:
             List of agent info dicts with basic metadata
         """
+        self.reload()
         agents = []
 
-        if not self._config_dir.exists():
-            return agents
-
-        for yaml_file in sorted(self._config_dir.glob("*.yaml")):
-            config = self._load_yaml(yaml_file)
+        for config_file in self._files.values():
+            config = config_file.config
             if config and "agent" in config:
-                agent_info = config["agent"].copy()
+                agent_info = copy.deepcopy(config["agent"])
                 # Add tools and settings info
-                agent_info["tools"] = config.get("tools", [])
-                agent_info["settings"] = config.get("settings", {})
+                agent_info["tools"] = copy.deepcopy(config.get("tools", []))
+                agent_info["settings"] = copy.deepcopy(config.get("settings", {}))
                 if "privacy" in config:
-                    agent_info["privacy"] = config["privacy"]
+                    agent_info["privacy"] = copy.deepcopy(config["privacy"])
                 agents.append(agent_info)
 
         return agents
 
-    @lru_cache(maxsize=32)
     def get_system_prompt(self, slug: str) -> str | None:
         """Get the system prompt for an agent.
 
@@ -95,9 +178,9 @@ class AgentLoader:
         Returns:
             System prompt string or None if not found
         """
-        config = self.load_agent(slug)
-        if config and "persona" in config:
-            return config["persona"].get("system_prompt")
+        config_file = self._get_file(slug)
+        if config_file and config_file.config and "persona" in config_file.config:
+            return config_file.config["persona"].get("system_prompt")
         return None
 
     def get_agent_settings(self, slug: str) -> dict[str, Any]:
@@ -129,10 +212,10 @@ class AgentLoader:
         return []
 
     def clear_cache(self) -> None:
-        """Clear all cached configurations."""
-        self.load_agent.cache_clear()
-        self.list_agents.cache_clear()
-        self.get_system_prompt.cache_clear()
+        """Clear all cached configurations (the next access re-parses every file)."""
+        with self._lock:
+            self._files = {}
+            self._checked_at = None
 
 
 # Singleton instance
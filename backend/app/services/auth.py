@@ -14,6 +14,7 @@ from app.core.security import (
 from app.models.user import User
 from app.schemas.auth import TokenResponse
 from app.schemas.user import UserCreate
+from app.services.auth_cache import invalidate_auth_user
 
 
 async def register_user(db: AsyncSession, data: UserCreate) -> User:
@@ -138,6 +139,7 @@ async def delete_account(db: AsyncSession, user: User, password: str) -> User:
         raise InvalidCredentialsError("Password is incorrect")
 
     user.is_active = False
+    await invalidate_auth_user(db, user.id)
     await db.commit()
     await db.refresh(user)
     return user
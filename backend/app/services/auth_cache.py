@@ -0,0 +1,227 @@
+"""Cache of the user fields needed to authorize a request.
+
+`get_current_user` used to load the full `User` row on every
+authenticated request. It now resolves an `AuthUser` (active, superuser,
+tier, active plan) through a two-level cache: a per-worker dict with a
+short TTL, and Redis shared between workers. Routes that need the ORM
+object depend on `get_current_user_model` instead.
+
+Admin changes to a user (update, suspend/ban, activate, delete, plan
+change) call `invalidate_auth_user`, which drops the entry right away and
+once more after the session commits, so a request that re-read the user
+before the commit cannot keep stale fields cached. Other workers' local
+entries expire within `settings.auth_cache_local_ttl_seconds`; other
+subscription changes reach `plan_id` within `settings.auth_cache_ttl_seconds`.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+
+from redis.exceptions import RedisError
+from sqlalchemy import and_, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.redis import get_redis
+from app.core.telemetry import traced
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Session.info key of user IDs to invalidate again after commit
+PENDING_INVALIDATIONS = "auth_cache_invalidations"
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """Authorization-relevant fields of a user."""
+
+    id: uuid.UUID
+    is_active: bool
+    is_superuser: bool
+    tier: str
+    plan_id: uuid.UUID | None  # Plan of the active subscription
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "id": str(self.id),
+            "is_active": self.is_active,
+            "is_superuser": self.is_superuser,
+            "tier": self.tier,
+            "plan_id": str(self.plan_id) if self.plan_id else None,
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "AuthUser":
+        data = json.loads(raw)
+        return cls(
+            id=uuid.UUID(data["id"]),
+            is_active=data["is_active"],
+            is_superuser=data["is_superuser"],
+            tier=data["tier"],
+            plan_id=uuid.UUID(data["plan_id"]) if data["plan_id"] else None,
+        )
+
+
+@traced()
+async def fetch_auth_user(db: AsyncSession, user_id: uuid.UUID) -> AuthUser | None:
+    """Read a user's auth fields and active plan in one query (None if not found)."""
+    active_plan_id = (
+        select(Subscription.plan_id)
+        .where(
+            and_(
+                Subscription.user_id == user_id,
+                Subscription.status == SubscriptionStatus.ACTIVE,
+            )
+        )
+        .order_by(Subscription.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = select(
+        User.id, User.is_active, User.is_superuser, User.tier, active_plan_id
+    ).where(User.id == user_id)
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    return AuthUser(
+        id=row[0], is_active=row[1], is_superuser=row[2], tier=row[3], plan_id=row[4]
+    )
+
+
+class AuthUserCache:
+    """Two-level cache of AuthUser entries (per-worker dict, then Redis)."""
+
+    def __init__(self) -> None:
+        self._local: dict[uuid.UUID, tuple[float, AuthUser]] = {}
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(user_id: uuid.UUID) -> str:
+        return f"authuser:{user_id}"
+
+    async def get(self, user_id: uuid.UUID) -> AuthUser | None:
+        entry = self._local.get(user_id)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at > time.monotonic():
+                self.hits += 1
+                return user
+            del self._local[user_id]
+
+        if settings.auth_cache_redis_enabled:
+            try:
+                raw = await get_redis().get(self._key(user_id))
+            except RedisError as e:
+                logger.warning(f"Auth cache read failed: {e}")
+                raw = None
+            try:
+                user = AuthUser.from_json(raw) if raw else None
+            except (KeyError, TypeError, ValueError):
+                user = None  # Written by an older version
+            if user is not None:
+                self.redis_hits += 1
+                self._set_local(user)
+                return user
+
+        self.misses += 1
+        return None
+
+    async def set(self, user: AuthUser) -> None:
+        self._set_local(user)
+        if settings.auth_cache_redis_enabled:
+            try:
+                await get_redis().set(
+                    self._key(user.id), user.to_json(), ex=settings.auth_cache_ttl_seconds
+                )
+            except RedisError as e:
+                logger.warning(f"Auth cache write failed: {e}")
+
+    def _set_local(self, user: AuthUser) -> None:
+        expires_at = time.monotonic() + settings.auth_cache_local_ttl_seconds
+        self._local[user.id] = (expires_at, user)
+
+    async def invalidate(self, user_id: uuid.UUID) -> None:
+        self.invalidations += 1
+        self._local.pop(user_id, None)
+        if settings.auth_cache_redis_enabled:
+            try:
+                await get_redis().delete(self._key(user_id))
+            except RedisError as e:
+                logger.warning(f"Auth cache invalidation failed: {e}")
+
+    def clear(self) -> None:
+        """Drop this worker's entries (Redis entries expire by TTL)."""
+        self._local.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Get cache metrics."""
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "entries": len(self._local),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+auth_user_cache = AuthUserCache()
+
+
+async def get_auth_user(db: AsyncSession, user_id: uuid.UUID) -> AuthUser | None:
+    """Get a user's auth fields, from the cache when possible (None if not found)."""
+    if settings.auth_cache_enabled:
+        user = await auth_user_cache.get(user_id)
+        if user is not None:
+            return user
+
+    user = await fetch_auth_user(db, user_id)
+    if user is not None and settings.auth_cache_enabled:
+        await auth_user_cache.set(user)
+    return user
+
+
+async def invalidate_auth_user(db: AsyncSession, user_id: uuid.UUID) -> None:
+    """Drop a user's cached auth fields now and again after `db` commits."""
+    await auth_user_cache.invalidate(user_id)
+    db.sync_session.info.setdefault(PENDING_INVALIDATIONS, set()).add(user_id)
+
+
+# Invalidation tasks started after commit, referenced until done
+_background: set[asyncio.Task] = set()
+
+
+async def _invalidate_all(user_ids: set[uuid.UUID]) -> None:
+    for user_id in user_ids:
+        await auth_user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids = session.info.pop(PENDING_INVALIDATIONS, None)
+    if not user_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # Sync session outside the app; the entries expire by TTL
+    task = loop.create_task(_invalidate_all(user_ids))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
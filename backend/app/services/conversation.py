@@ -223,6 +223,7 @@ async def add_message(
     role: str,
     content: str,
     tokens_used: int | None = None,
+    truncated: bool = False,
 ) -> Message:
     """Add a message to a conversation."""
     # Convert string role to MessageRole enum
@@ -233,6 +234,7 @@ async def add_message(
         role=message_role,
         content=content,
         tokens_used=tokens_used,
+        truncated=truncated,
     )
     db.add(message)
     await db.flush()
@@ -0,0 +1,384 @@
+"""Reserve-then-commit credit accounting.
+
+Reading the remaining credits and recording usage after the LLM call lets
+concurrent requests all pass the check and overspend the plan. Instead,
+requests reserve their estimated credits atomically before the call and
+settle the actual amount afterwards:
+
+    reservation, error = await reserve_quota(db, user_id, credits_needed)
+    ...  # LLM call, record_usage
+    await credit_accounting.commit(reservation, actual_credits)  # or release()
+
+When the usage is written in the caller's transaction, `commit_after`
+settles the reservation once that transaction commits instead, and
+releases it if the transaction ends without committing.
+
+The ledger keeps, per user and period, the credits used (seeded from the
+usage summary on first use) and the outstanding reservations. A request
+is admitted only while used + reserved + amount fits the limit.
+Reservations that are never settled (crashed worker, lost task) expire
+after `settings.credit_reservation_ttl_seconds` and are reclaimed by the
+next reservation. A ledger idle for `settings.credit_ledger_ttl_seconds`
+is dropped and re-seeded from Postgres.
+
+The Redis ledger does each operation in one Lua script and is shared by
+all workers; the in-memory ledger is per worker (tests, single worker).
+If Redis is unavailable, requests are admitted on the cached quota check
+alone and their reservations are not tracked.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Session.info key of (reservation, credits) pairs to settle on commit
+PENDING_SETTLEMENTS = "credit_settlements"
+
+# KEYS: ledger hash, reservation expiry zset
+# ARGV: reservation ID, amount, limit (-1 = unlimited), seed used, reservation TTL (ms), ledger TTL (ms)
+# Returns {admitted (0/1), used, reserved, reclaimed reservations}
+RESERVE_SCRIPT = """
+-- Needed before Redis 5 to write after reading TIME (no-op since)
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('HSETNX', KEYS[1], 'used', ARGV[4])
+redis.call('HSETNX', KEYS[1], 'reserved', 0)
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+if #expired > 0 then
+    local reclaimed = 0
+    for _, id in ipairs(expired) do
+        reclaimed = reclaimed + tonumber(redis.call('HGET', KEYS[1], 'r:' .. id) or '0')
+        redis.call('HDEL', KEYS[1], 'r:' .. id)
+    end
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    redis.call('HINCRBY', KEYS[1], 'reserved', -reclaimed)
+end
+
+local used = tonumber(redis.call('HGET', KEYS[1], 'used'))
+local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved'))
+local amount = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local admitted = 0
+if limit < 0 or used + reserved + amount <= limit then
+    admitted = 1
+    reserved = redis.call('HINCRBY', KEYS[1], 'reserved', amount)
+    redis.call('HSET', KEYS[1], 'r:' .. ARGV[1], amount)
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[5]), ARGV[1])
+end
+
+redis.call('PEXPIRE', KEYS[1], ARGV[6])
+redis.call('PEXPIRE', KEYS[2], ARGV[6])
+return {admitted, used, reserved, #expired}
+"""
+
+# KEYS: ledger hash, reservation expiry zset
+# ARGV: reservation ID, actual credits
+# Returns 1 if settled, 0 if the ledger expired (it is re-seeded from Postgres)
+SETTLE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local amount = redis.call('HGET', KEYS[1], 'r:' .. ARGV[1])
+if amount then
+    redis.call('HINCRBY', KEYS[1], 'reserved', -tonumber(amount))
+    redis.call('HDEL', KEYS[1], 'r:' .. ARGV[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+end
+redis.call('HINCRBY', KEYS[1], 'used', ARGV[2])
+return 1
+"""
+
+
+@dataclass
+class CreditReservation:
+    """Credits held for one request until it is settled."""
+
+    user_id: uuid.UUID
+    period: str
+    amount: int
+    reservation_id: str
+    tracked: bool = True  # False if admitted without a ledger (Redis down)
+    settled: bool = False
+
+
+@dataclass(frozen=True)
+class ReserveResult:
+    """Outcome of a reservation attempt."""
+
+    reservation: CreditReservation | None  # None if refused
+    used: int
+    reserved: int  # Including this reservation if admitted
+
+    def available(self, limit: int) -> int:
+        """Credits not used or reserved (-1 if unlimited)."""
+        return -1 if limit < 0 else max(0, limit - self.used - self.reserved)
+
+
+class CreditLedger(Protocol):
+    """Storage backend for credit reservations."""
+
+    async def reserve(
+        self, user_id: uuid.UUID, period: str, amount: int, limit: int, used: int
+    ) -> ReserveResult: ...
+
+    async def settle(self, reservation: CreditReservation, actual: int) -> None: ...
+
+
+@dataclass
+class _MemoryAccount:
+    """Credits of one user and period."""
+
+    used: int
+    expires_at: float
+    reservations: dict[str, tuple[int, float]]  # ID -> (amount, expires at)
+
+    @property
+    def reserved(self) -> int:
+        return sum(amount for amount, _ in self.reservations.values())
+
+
+class MemoryCreditLedger:
+    """Per-process credit ledger."""
+
+    def __init__(self) -> None:
+        self._accounts: dict[tuple[uuid.UUID, str], _MemoryAccount] = {}
+        self.reclaimed = 0
+
+    def _account(self, user_id: uuid.UUID, period: str) -> _MemoryAccount | None:
+        account = self._accounts.get((user_id, period))
+        if account is not None and account.expires_at < time.monotonic():
+            del self._accounts[(user_id, period)]
+            return None
+        return account
+
+    async def reserve(
+        self, user_id: uuid.UUID, period: str, amount: int, limit: int, used: int
+    ) -> ReserveResult:
+        now = time.monotonic()
+        account = self._account(user_id, period)
+        if account is None:
+            account = _MemoryAccount(used=used, expires_at=0.0, reservations={})
+            self._accounts[(user_id, period)] = account
+        account.expires_at = now + settings.credit_ledger_ttl_seconds
+
+        for reservation_id, (_, expires_at) in list(account.reservations.items()):
+            if expires_at < now:
+                del account.reservations[reservation_id]
+                self.reclaimed += 1
+
+        reserved = account.reserved
+        if limit >= 0 and account.used + reserved + amount > limit:
+            return ReserveResult(reservation=None, used=account.used, reserved=reserved)
+
+        reservation_id = uuid.uuid4().hex
+        account.reservations[reservation_id] = (amount, now + settings.credit_reservation_ttl_seconds)
+        return ReserveResult(
+            reservation=CreditReservation(user_id, period, amount, reservation_id),
+            used=account.used,
+            reserved=reserved + amount,
+        )
+
+    async def settle(self, reservation: CreditReservation, actual: int) -> None:
+        account = self._account(reservation.user_id, reservation.period)
+        if account is None:
+            return
+        account.reservations.pop(reservation.reservation_id, None)
+        account.used += actual
+
+
+class RedisCreditLedger:
+    """Credit ledger in Redis, shared by all workers."""
+
+    def __init__(self) -> None:
+        self._reserve = None
+        self._settle = None
+        self.reclaimed = 0
+
+    @staticmethod
+    def _keys(user_id: uuid.UUID, period: str) -> list[str]:
+        # Braces keep both keys in the same Redis Cluster slot
+        base = f"credits:{{{user_id}}}:{period}"
+        return [base, f"{base}:expiry"]
+
+    async def reserve(
+        self, user_id: uuid.UUID, period: str, amount: int, limit: int, used: int
+    ) -> ReserveResult:
+        client = get_redis()
+        if self._reserve is None:
+            self._reserve = client.register_script(RESERVE_SCRIPT)
+
+        reservation_id = uuid.uuid4().hex
+        admitted, ledger_used, reserved, reclaimed = await self._reserve(
+            keys=self._keys(user_id, period),
+            args=[
+                reservation_id,
+                amount,
+                limit,
+                used,
+                int(settings.credit_reservation_ttl_seconds * 1000),
+                int(settings.credit_ledger_ttl_seconds * 1000),
+            ],
+            client=client,
+        )
+        if reclaimed:
+            self.reclaimed += int(reclaimed)
+            logger.info(f"Reclaimed {reclaimed} expired credit reservations for user {user_id}")
+
+        reservation = CreditReservation(user_id, period, amount, reservation_id) if admitted else None
+        return ReserveResult(reservation=reservation, used=int(ledger_used), reserved=int(reserved))
+
+    async def settle(self, reservation: CreditReservation, actual: int) -> None:
+        client = get_redis()
+        if self._settle is None:
+            self._settle = client.register_script(SETTLE_SCRIPT)
+        await self._settle(
+            keys=self._keys(reservation.user_id, reservation.period),
+            args=[reservation.reservation_id, actual],
+            client=client,
+        )
+
+
+class CreditAccounting:
+    """Reserve and settle credits on the configured ledger."""
+
+    def __init__(self) -> None:
+        self._ledger: CreditLedger | None = None
+        self.admitted = 0
+        self.refused = 0
+        self.untracked = 0
+
+    @property
+    def ledger(self) -> CreditLedger:
+        if self._ledger is None:
+            if settings.credit_ledger_backend == "redis":
+                self._ledger = RedisCreditLedger()
+            else:
+                self._ledger = MemoryCreditLedger()
+        return self._ledger
+
+    async def reserve(
+        self, user_id: uuid.UUID, period: str, amount: int, limit: int, used: int
+    ) -> ReserveResult:
+        """
+        Atomically reserve credits if the plan has room for them.
+
+        Args:
+            user_id: User ID
+            period: Usage period (YYYY-MM)
+            amount: Credits to reserve (the request's estimate)
+            limit: Plan credit limit (-1 = unlimited)
+            used: Credits used this period per Postgres, to seed a new ledger
+
+        Returns:
+            ReserveResult; `reservation` is None if the credits don't fit
+        """
+        try:
+            result = await self.ledger.reserve(user_id, period, amount, limit, used)
+        except RedisError as e:
+            logger.warning(f"Credit ledger unavailable, admitting on quota check only: {e}")
+            self.untracked += 1
+            return ReserveResult(
+                reservation=CreditReservation(user_id, period, amount, "", tracked=False),
+                used=used,
+                reserved=amount,
+            )
+
+        if result.reservation is None:
+            self.refused += 1
+        else:
+            self.admitted += 1
+        return result
+
+    async def commit(self, reservation: CreditReservation, actual: int) -> None:
+        """Settle a reservation with the credits actually recorded."""
+        if reservation.settled or not reservation.tracked:
+            return
+        reservation.settled = True
+        await self._settle(reservation, actual)
+
+    def commit_after(self, db: AsyncSession, reservation: CreditReservation, actual: int) -> None:
+        """
+        Settle a reservation once the session's transaction commits.
+
+        The reservation is released instead if the transaction rolls back or
+        the session is closed without committing. Later `commit`/`release`
+        calls for it are no-ops.
+        """
+        if reservation.settled or not reservation.tracked:
+            return
+        reservation.settled = True
+        db.sync_session.info.setdefault(PENDING_SETTLEMENTS, []).append((reservation, actual))
+
+    async def _settle(self, reservation: CreditReservation, actual: int) -> None:
+        try:
+            await self.ledger.settle(reservation, actual)
+        except RedisError as e:
+            # The reservation expires; the ledger re-seeds once idle
+            logger.warning(f"Failed to settle credit reservation: {e}")
+
+    async def release(self, reservation: CreditReservation) -> None:
+        """Return a reservation's credits (the request did not complete)."""
+        await self.commit(reservation, 0)
+
+    def stats(self) -> dict[str, int]:
+        """Get reservation metrics."""
+        return {
+            "admitted": self.admitted,
+            "refused": self.refused,
+            "untracked": self.untracked,
+            "reclaimed": getattr(self._ledger, "reclaimed", 0),
+        }
+
+
+# Singleton instance
+credit_accounting = CreditAccounting()
+
+# Settlement tasks started after commit, referenced until done
+_background: set[asyncio.Task] = set()
+
+
+async def _settle_all(pending: list[tuple[CreditReservation, int]]) -> None:
+    for reservation, actual in pending:
+        await credit_accounting._settle(reservation, actual)
+
+
+def _settle_in_background(pending: list[tuple[CreditReservation, int]]) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # Sync session outside the app; the reservations expire by TTL
+    task = loop.create_task(_settle_all(pending))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+@event.listens_for(Session, "after_commit")
+def _settle_after_commit(session: Session) -> None:
+    pending = session.info.pop(PENDING_SETTLEMENTS, None)
+    if pending:
+        _settle_in_background(pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_uncommitted(session: Session, transaction: Any) -> None:
+    # Runs after after_commit, so anything left was rolled back or discarded
+    if transaction.parent is not None:
+        return
+    pending = session.info.pop(PENDING_SETTLEMENTS, None)
+    if pending:
+        _settle_in_background([(reservation, 0) for reservation, _ in pending])
@@ -8,13 +8,16 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.core.telemetry import traced
 from app.models.chunk import DocumentChunk
 from app.models.document import Document, DocumentStatus
 from app.schemas.document import DocumentUpdate
 from app.schemas.vector import ChunkCreate
 from app.services.document_processor import DocumentProcessor
+from app.services.document_summary import document_summary_worker
 from app.services.embedding import get_embedding_service
+from app.services.quota import invalidate_user_quota
 from app.services.storage import get_storage_service
 from app.services.vector_store import get_vector_store
 
@@ -60,6 +63,7 @@ async def create_document(
     )
     db.add(document)
     await db.flush()
+    await invalidate_user_quota(user_id, db)
 
     logger.info(f"Created document {document.id} for user {user_id}")
     return document
@@ -195,6 +199,7 @@ async def delete_document(
     # Delete document (chunks cascade)
     await db.delete(document)
     await db.flush()
+    await invalidate_user_quota(user_id, db)
 
     logger.info(f"Deleted document {document_id}")
     return True
@@ -268,8 +273,15 @@ async def process_document(db: AsyncSession, document_id: uuid.UUID) -> Document
         # Update document status
         document.status = DocumentStatus.ready
         document.chunk_count = len(chunks_to_store)
+        document.summary = None
+        document.section_summaries = None
         await db.flush()
 
+        # Optional stage: summaries are built by background workers, which
+        # save them once this transaction has committed
+        if settings.document_summaries_enabled:
+            document_summary_worker.submit(document_id, chunk_contents)
+
         logger.info(
             f"Processed document {document_id}: {len(chunks_to_store)} chunks created"
         )
@@ -0,0 +1,140 @@
+"""Background workers that precompute document summaries after ingestion.
+
+`process_document` submits a document's chunk texts once they are stored;
+`settings.document_summary_workers` workers take jobs off a bounded queue,
+build the hierarchical summary (per section and per document) and save it
+on the document with their own session. The summarize tool and the RAG
+prompt builder serve the saved summaries without an LLM call.
+
+Jobs still queued at shutdown are dropped; those documents simply have no
+summary and are summarized on demand.
+"""
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import update
+
+from app.config import settings
+from app.models.document import Document
+from app.services.summarizer import summarizer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SummaryJob:
+    """A document waiting to be summarized."""
+
+    document_id: uuid.UUID
+    chunks: tuple[str, ...]
+
+
+class DocumentSummaryWorker:
+    """Bounded pool of summary workers fed by a queue."""
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[SummaryJob] | None = None
+        self._workers: list[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        """Start the workers (no-op if disabled or already running)."""
+        if not settings.document_summaries_enabled or self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.document_summary_queue_size)
+        self._workers = [
+            asyncio.create_task(self._run(), name=f"document-summary-{i}")
+            for i in range(max(1, settings.document_summary_workers))
+        ]
+        logger.info(f"Started {len(self._workers)} document summary workers")
+
+    async def stop(self) -> None:
+        """Cancel the workers, dropping queued jobs."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._queue is not None and self._queue.qsize():
+            logger.info(f"Dropped {self._queue.qsize()} queued document summaries on shutdown")
+        self._workers = []
+        self._queue = None
+
+    def submit(self, document_id: uuid.UUID, chunks: list[str]) -> bool:
+        """Queue a document for summarization.
+
+        Args:
+            document_id: Document ID
+            chunks: Chunk texts in document order
+
+        Returns:
+            True if queued, False if workers are not running or the queue is full
+        """
+        if self._queue is None or not chunks:
+            return False
+        try:
+            self._queue.put_nowait(SummaryJob(document_id=document_id, chunks=tuple(chunks)))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Document summary queue full, skipping document {document_id}")
+            return False
+        return True
+
+    async def _run(self) -> None:
+        """Worker loop."""
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self.summarize(job)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to summarize document {job.document_id}: {e}")
+            finally:
+                queue.task_done()
+
+    async def summarize(self, job: SummaryJob) -> None:
+        """Build and save the summaries for one document."""
+        from app.core.database import SessionLocal
+
+        result = await summarizer.summarize_document(
+            list(job.chunks),
+            section_chunks=settings.document_summary_section_chunks,
+        )
+
+        async with SessionLocal() as db:
+            await db.execute(
+                update(Document)
+                .where(Document.id == job.document_id)
+                .values(summary=result.summary, section_summaries=result.sections)
+            )
+            await db.commit()
+
+        logger.info(
+            f"Summarized document {job.document_id}: {len(result.sections)} sections, "
+            f"{result.cached_chunks}/{result.chunks} chunks cached, "
+            f"{result.usage['total_tokens']} tokens"
+        )
+
+    def stats(self) -> dict[str, int]:
+        """Get worker metrics."""
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+# Singleton instance
+document_summary_worker = DocumentSummaryWorker()
@@ -13,6 +13,7 @@ from app.models.document import Document
 from app.models.project import Project
 from app.models.project_document import ProjectDocument
 from app.schemas.project import ProjectCreate, ProjectUpdate
+from app.services.quota import invalidate_user_quota
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,7 @@ async def create_project(
     )
     db.add(project)
     await db.flush()
+    await invalidate_user_quota(user_id, db)
 
     logger.info(f"Created project {project.id} for user {user_id}")
     return project
@@ -165,6 +167,7 @@ async def delete_project(
 
     await db.delete(project)
     await db.flush()
+    await invalidate_user_quota(user_id, db)
 
     logger.info(f"Deleted project {project_id}")
     return True
@@ -1,29 +1,45 @@
 """Quota enforcement service.
 
 Provides functions to check and enforce usage limits based on user's subscription plan.
+
+All checks read one `QuotaSnapshot` (plan limits, this period's usage and
+resource counts, fetched in a single query) through `quota_cache`. Call
+`invalidate_user_quota` after anything that changes those numbers; given
+the session that made the change, it drops the snapshot again once that
+session commits, so a request that re-read the old numbers before the
+commit cannot keep them cached.
 """
 
+import asyncio
+import json
 import logging
+import time
 import uuid
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import and_, func, select
+from redis.exceptions import RedisError
+from sqlalchemy import and_, event, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import Session, selectinload
 
+from app.config import settings
+from app.core.redis import get_redis
 from app.core.telemetry import traced
-from app.models.conversation import Conversation
 from app.models.document import Document
-from app.models.message import Message
 from app.models.plan import Plan, PlanType
 from app.models.project import Project
 from app.models.subscription import Subscription, SubscriptionStatus
+from app.models.usage import UsageSummary
 from app.models.user import User
+from app.services.credits import CreditReservation, credit_accounting
+from app.services.usage_rollups import get_usage_totals
 
 logger = logging.getLogger(__name__)
 
+# Session.info key of user IDs to invalidate again after commit
+PENDING_INVALIDATIONS = "quota_cache_invalidations"
 
 # Default limits for users without active subscription (free tier fallback)
 DEFAULT_LIMITS = {
@@ -198,27 +214,12 @@ async def get_user_with_subscription(
 async def get_tokens_used_this_month(
     db: AsyncSession, user_id: uuid.UUID
 ) -> int:
-    """Get total tokens used this month by user."""
+    """Get total tokens used this month by user (from the daily usage rollups)."""
     now = datetime.utcnow()
     month_start = datetime(now.year, now.month, 1)
 
-    # Get user's conversation IDs
-    conv_stmt = select(Conversation.id).where(Conversation.user_id == user_id)
-    conv_result = await db.execute(conv_stmt)
-    conv_ids = [row[0] for row in conv_result.all()]
-
-    if not conv_ids:
-        return 0
-
-    # Sum tokens from messages this month
-    token_stmt = select(func.coalesce(func.sum(Message.tokens_used), 0)).where(
-        and_(
-            Message.conversation_id.in_(conv_ids),
-            Message.created_at >= month_start,
-        )
-    )
-    result = await db.execute(token_stmt)
-    return int(result.scalar() or 0)
+    _, this_month = await get_usage_totals(db, user_id, since=month_start)
+    return this_month.tokens_total
 
 
 @traced()
@@ -237,68 +238,322 @@ async def get_project_count(db: AsyncSession, user_id: uuid.UUID) -> int:
     return int(result.scalar() or 0)
 
 
+@dataclass
+class QuotaSnapshot:
+    """Limits and usage for a user, as read in one query (cacheable)."""
+
+    user_id: uuid.UUID
+    plan_name: str
+    plan_type: str
+    has_active_subscription: bool
+    tokens_limit: int
+    requests_limit: int
+    credits_limit: int
+    documents_limit: int
+    projects_limit: int
+    requests_per_minute_limit: int
+    requests_per_day_limit: int
+    tokens_used: int
+    requests_used: int
+    credits_used: int
+    documents_used: int
+    projects_used: int
+    period: str
+
+    def to_quota(self) -> UserQuota:
+        """Build the quota status for each resource."""
+        return UserQuota(
+            user_id=self.user_id,
+            plan_name=self.plan_name,
+            plan_type=self.plan_type,
+            has_active_subscription=self.has_active_subscription,
+            tokens=_calculate_quota_status(self.tokens_limit, self.tokens_used),
+            requests=_calculate_quota_status(self.requests_limit, self.requests_used),
+            credits=_calculate_quota_status(self.credits_limit, self.credits_used),
+            documents=_calculate_quota_status(self.documents_limit, self.documents_used),
+            projects=_calculate_quota_status(self.projects_limit, self.projects_used),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({**asdict(self), "user_id": str(self.user_id)})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "QuotaSnapshot":
+        data = json.loads(raw)
+        return cls(**{**data, "user_id": uuid.UUID(data["user_id"])})
+
+
+class QuotaCache:
+    """Two-level cache of quota snapshots.
+
+    A per-worker dict with a very short TTL absorbs the repeated checks of
+    one request; Redis shares snapshots between workers for longer. Both
+    are dropped by `invalidate` when usage is recorded or a subscription,
+    document or project changes. Redis errors fall back to the database.
+    """
+
+    def __init__(self) -> None:
+        self._local: dict[uuid.UUID, tuple[float, QuotaSnapshot]] = {}
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(user_id: uuid.UUID) -> str:
+        return f"quota:{user_id}"
+
+    async def get(self, user_id: uuid.UUID, period: str) -> QuotaSnapshot | None:
+        entry = self._local.get(user_id)
+        if entry is not None:
+            expires_at, snapshot = entry
+            if expires_at > time.monotonic() and snapshot.period == period:
+                self.hits += 1
+                return snapshot
+            del self._local[user_id]
+
+        if settings.quota_cache_redis_enabled:
+            try:
+                raw = await get_redis().get(self._key(user_id))
+            except RedisError as e:
+                logger.warning(f"Quota cache read failed: {e}")
+                raw = None
+            try:
+                snapshot = QuotaSnapshot.from_json(raw) if raw else None
+            except (TypeError, ValueError):
+                snapshot = None  # Written by an older version
+            if snapshot is not None and snapshot.period == period:
+                self.redis_hits += 1
+                self._set_local(snapshot)
+                return snapshot
+
+        self.misses += 1
+        return None
+
+    async def set(self, snapshot: QuotaSnapshot) -> None:
+        self._set_local(snapshot)
+        if settings.quota_cache_redis_enabled:
+            try:
+                await get_redis().set(
+                    self._key(snapshot.user_id),
+                    snapshot.to_json(),
+                    ex=settings.quota_cache_ttl_seconds,
+                )
+            except RedisError as e:
+                logger.warning(f"Quota cache write failed: {e}")
+
+    def _set_local(self, snapshot: QuotaSnapshot) -> None:
+        expires_at = time.monotonic() + settings.quota_cache_local_ttl_seconds
+        self._local[snapshot.user_id] = (expires_at, snapshot)
+
+    async def invalidate(self, user_id: uuid.UUID, db: AsyncSession | None = None) -> None:
+        """Drop a user's snapshot now and, if `db` is given, again after it commits."""
+        self.invalidations += 1
+        self._local.pop(user_id, None)
+        if settings.quota_cache_redis_enabled:
+            try:
+                await get_redis().delete(self._key(user_id))
+            except RedisError as e:
+                logger.warning(f"Quota cache invalidation failed: {e}")
+        if db is not None:
+            db.sync_session.info.setdefault(PENDING_INVALIDATIONS, set()).add(user_id)
+
+    def clear(self) -> None:
+        """Drop this worker's entries (Redis entries expire by TTL)."""
+        self._local.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Get cache metrics."""
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "entries": len(self._local),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+quota_cache = QuotaCache()
+
+
+async def invalidate_user_quota(user_id: uuid.UUID, db: AsyncSession | None = None) -> None:
+    """Drop a user's cached quota (after usage or subscription changes).
+
+    Pass the session that made the change unless it has already committed.
+    """
+    await quota_cache.invalidate(user_id, db)
+
+
+# Invalidation tasks started after commit, referenced until done
+_background: set[asyncio.Task] = set()
+
+
+async def _invalidate_all(user_ids: set[uuid.UUID]) -> None:
+    for user_id in user_ids:
+        await quota_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids = session.info.pop(PENDING_INVALIDATIONS, None)
+    if not user_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # Sync session outside the app; the entries expire by TTL
+    task = loop.create_task(_invalidate_all(user_ids))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
 @traced()
-async def get_user_quota(db: AsyncSession, user_id: uuid.UUID) -> UserQuota:
+async def fetch_quota_snapshot(db: AsyncSession, user_id: uuid.UUID) -> QuotaSnapshot:
     """
-    Get complete quota information for a user.
+    Read a user's plan limits and current usage in a single query.
 
-    Returns quota status for tokens, requests, credits, documents, and projects.
+    Missing usage summaries count as zero usage; nothing is written.
+
+    Raises:
+        ValueError: If the user does not exist
     """
-    from app.services.usage import get_current_period, get_or_create_usage_summary
+    from app.services.usage import get_current_period
 
-    user, subscription, plan = await get_user_with_subscription(db, user_id)
+    period = get_current_period()
 
-    if not user:
+    active_plan_id = (
+        select(Subscription.plan_id)
+        .where(
+            and_(
+                Subscription.user_id == user_id,
+                Subscription.status == SubscriptionStatus.ACTIVE,
+            )
+        )
+        .order_by(Subscription.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    documents_used = (
+        select(func.count(Document.id)).where(Document.user_id == user_id).scalar_subquery()
+    )
+    projects_used = (
+        select(func.count(Project.id)).where(Project.user_id == user_id).scalar_subquery()
+    )
+
+    stmt = (
+        select(
+            User.id,
+            Plan.display_name,
+            Plan.plan_type,
+            Plan.tokens_per_month,
+            Plan.requests_per_month,
+            Plan.credits_per_month,
+            Plan.max_documents,
+            Plan.max_projects,
+            Plan.requests_per_minute,
+            Plan.requests_per_day,
+            UsageSummary.total_tokens,
+            UsageSummary.total_requests,
+            UsageSummary.total_credits,
+            documents_used.label("documents_used"),
+            projects_used.label("projects_used"),
+        )
+        .select_from(User)
+        .outerjoin(Plan, Plan.id == active_plan_id)
+        .outerjoin(
+            UsageSummary,
+            and_(UsageSummary.user_id == User.id, UsageSummary.period == period),
+        )
+        .where(User.id == user_id)
+    )
+    row = (await db.execute(stmt)).one_or_none()
+
+    if row is None:
         raise ValueError(f"User {user_id} not found")
 
     # Determine limits from plan or use defaults
-    if plan:
-        tokens_limit = plan.tokens_per_month
-        requests_limit = plan.requests_per_month
-        credits_limit = plan.credits_per_month
-        documents_limit = plan.max_documents
-        projects_limit = plan.max_projects
-        plan_name = plan.display_name
-        plan_type = plan.plan_type.value
+    if row.plan_type is not None:
+        plan_type = PlanType(row.plan_type)
+        tokens_limit = row.tokens_per_month
+        requests_limit = row.requests_per_month
+        credits_limit = row.credits_per_month
+        documents_limit = row.max_documents
+        projects_limit = row.max_projects
+        requests_per_minute_limit = row.requests_per_minute
+        requests_per_day_limit = row.requests_per_day
+        plan_name = row.display_name
 
         # Enterprise has unlimited (-1)
-        if plan.plan_type == PlanType.ENTERPRISE:
+        if plan_type == PlanType.ENTERPRISE:
             tokens_limit = -1
             requests_limit = -1
             credits_limit = -1
     else:
         # Fallback to default limits
+        plan_type = None
         tokens_limit = DEFAULT_LIMITS["tokens_per_month"]
         requests_limit = DEFAULT_LIMITS["requests_per_month"]
         credits_limit = DEFAULT_LIMITS["credits_per_month"]
         documents_limit = DEFAULT_LIMITS["max_documents"]
         projects_limit = DEFAULT_LIMITS["max_projects"]
+        requests_per_minute_limit = DEFAULT_LIMITS["requests_per_minute"]
+        requests_per_day_limit = DEFAULT_LIMITS["requests_per_day"]
         plan_name = "Free"
-        plan_type = "free"
-
-    # Get current usage from usage summary (fast query)
-    usage_summary = await get_or_create_usage_summary(db, user_id, get_current_period())
-    tokens_used = usage_summary.total_tokens
-    requests_used = usage_summary.total_requests
-    credits_used = usage_summary.total_credits
-
-    # Get resource counts
-    documents_used = await get_document_count(db, user_id)
-    projects_used = await get_project_count(db, user_id)
 
-    return UserQuota(
+    return QuotaSnapshot(
         user_id=user_id,
         plan_name=plan_name,
-        plan_type=plan_type,
-        has_active_subscription=subscription is not None,
-        tokens=_calculate_quota_status(tokens_limit, tokens_used),
-        requests=_calculate_quota_status(requests_limit, requests_used),
-        credits=_calculate_quota_status(credits_limit, credits_used),
-        documents=_calculate_quota_status(documents_limit, documents_used),
-        projects=_calculate_quota_status(projects_limit, projects_used),
+        plan_type=plan_type.value if plan_type else "free",
+        has_active_subscription=plan_type is not None,
+        tokens_limit=tokens_limit,
+        requests_limit=requests_limit,
+        credits_limit=credits_limit,
+        documents_limit=documents_limit,
+        projects_limit=projects_limit,
+        requests_per_minute_limit=requests_per_minute_limit,
+        requests_per_day_limit=requests_per_day_limit,
+        tokens_used=row.total_tokens or 0,
+        requests_used=row.total_requests or 0,
+        credits_used=row.total_credits or 0,
+        documents_used=row.documents_used,
+        projects_used=row.projects_used,
+        period=period,
     )
 
 
+async def get_quota_snapshot(db: AsyncSession, user_id: uuid.UUID) -> QuotaSnapshot:
+    """Get a user's quota snapshot, from the quota cache when possible."""
+    if not settings.quota_cache_enabled:
+        return await fetch_quota_snapshot(db, user_id)
+
+    from app.services.usage import get_current_period
+
+    snapshot = await quota_cache.get(user_id, get_current_period())
+    if snapshot is None:
+        snapshot = await fetch_quota_snapshot(db, user_id)
+        await quota_cache.set(snapshot)
+    return snapshot
+
+
+@traced()
+async def get_user_quota(db: AsyncSession, user_id: uuid.UUID) -> UserQuota:
+    """
+    Get complete quota information for a user.
+
+    Returns quota status for tokens, requests, credits, documents, and projects.
+    Served from the quota cache when possible (see QuotaCache).
+    """
+    return (await get_quota_snapshot(db, user_id)).to_quota()
+
+
 @traced()
 async def check_token_quota(
     db: AsyncSession, user_id: uuid.UUID
@@ -324,6 +579,28 @@ async def check_token_quota(
     return True, None
 
 
+def _request_quota_error(quota: UserQuota) -> str | None:
+    """Get the error message if the request quota is exceeded."""
+    if quota.requests.is_unlimited or not quota.requests.is_exceeded:
+        return None
+    return (
+        f"Request quota exceeded. Used {quota.requests.used:,} of "
+        f"{quota.requests.limit:,} requests this month. "
+        "Please upgrade your plan or wait until next month."
+    )
+
+
+def _credit_quota_error(quota: UserQuota, credits_needed: int) -> str | None:
+    """Get the error message if the remaining credits don't cover a request."""
+    if quota.credits.is_unlimited or quota.credits.remaining >= credits_needed:
+        return None
+    return (
+        f"Credit quota exceeded. You have {quota.credits.remaining:,} credits remaining, "
+        f"but this request requires {credits_needed} credits. "
+        "Please upgrade your plan or wait until next month."
+    )
+
+
 @traced()
 async def check_request_quota(
     db: AsyncSession, user_id: uuid.UUID
@@ -335,18 +612,8 @@ async def check_request_quota(
         Tuple of (is_allowed, error_message)
     """
     quota = await get_user_quota(db, user_id)
-
-    if quota.requests.is_unlimited:
-        return True, None
-
-    if quota.requests.is_exceeded:
-        return False, (
-            f"Request quota exceeded. Used {quota.requests.used:,} of "
-            f"{quota.requests.limit:,} requests this month. "
-            "Please upgrade your plan or wait until next month."
-        )
-
-    return True, None
+    error = _request_quota_error(quota)
+    return error is None, error
 
 
 @traced()
@@ -365,18 +632,8 @@ async def check_credit_quota(
         Tuple of (is_allowed, error_message)
     """
     quota = await get_user_quota(db, user_id)
-
-    if quota.credits.is_unlimited:
-        return True, None
-
-    if quota.credits.remaining < credits_needed:
-        return False, (
-            f"Credit quota exceeded. You have {quota.credits.remaining:,} credits remaining, "
-            f"but this request requires {credits_needed} credits. "
-            "Please upgrade your plan or wait until next month."
-        )
-
-    return True, None
+    error = _credit_quota_error(quota, credits_needed)
+    return error is None, error
 
 
 @traced()
@@ -394,17 +651,54 @@ async def check_all_quotas(
     Returns:
         Tuple of (is_allowed, error_message)
     """
-    # Check request quota
-    allowed, error = await check_request_quota(db, user_id)
-    if not allowed:
-        return False, error
+    quota = await get_user_quota(db, user_id)
 
-    # Check credit quota
-    allowed, error = await check_credit_quota(db, user_id, credits_needed)
-    if not allowed:
-        return False, error
+    error = _request_quota_error(quota) or _credit_quota_error(quota, credits_needed)
+    return error is None, error
 
-    return True, None
+
+@traced()
+async def reserve_quota(
+    db: AsyncSession, user_id: uuid.UUID, credits_needed: int = 1
+) -> tuple[CreditReservation | None, str | None]:
+    """
+    Check the request quota and reserve credits before making a request.
+
+    Unlike `check_all_quotas`, the credits are held atomically, so
+    concurrent requests cannot together spend more than the plan allows.
+    The caller must settle the reservation, by passing it to `record_usage`
+    or with `credit_accounting.commit`, or `credit_accounting.release` it on
+    failure.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        credits_needed: Estimated credits for this request
+
+    Returns:
+        Tuple of (reservation, error_message); reservation is None if refused
+    """
+    snapshot = await get_quota_snapshot(db, user_id)
+    error = _request_quota_error(snapshot.to_quota())
+    if error:
+        return None, error
+
+    result = await credit_accounting.reserve(
+        user_id,
+        snapshot.period,
+        credits_needed,
+        snapshot.credits_limit,
+        snapshot.credits_used,
+    )
+    if result.reservation is None:
+        in_flight = result.reserved
+        return None, (
+            f"Credit quota exceeded. You have {result.available(snapshot.credits_limit):,} "
+            f"credits remaining{f' ({in_flight:,} held by requests in progress)' if in_flight else ''}, "
+            f"but this request requires {credits_needed} credits. "
+            "Please upgrade your plan or wait until next month."
+        )
+    return result.reservation, None
 
 
 @traced()
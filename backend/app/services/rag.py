@@ -5,6 +5,7 @@ import uuid
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core.telemetry import traced
 from app.schemas.vector import ChunkResult
 from app.services.embedding import get_embedding_service
@@ -97,14 +98,23 @@ async def build_rag_prompt(
     from sqlalchemy import select
     from app.models.document import Document
 
-    # Fetch document names for sources
+    # Fetch document names (and precomputed summaries) for sources
     document_ids = list(set(chunk.document_id for chunk in chunks))
-    stmt = select(Document.id, Document.filename).where(Document.id.in_(document_ids))
+    columns = [Document.id, Document.filename]
+    if settings.rag_include_document_summaries:
+        columns.append(Document.summary)
+    stmt = select(*columns).where(Document.id.in_(document_ids))
     result = await db.execute(stmt)
-    doc_names = {row.id: row.filename for row in result.all()}
+    rows = result.all()
+    doc_names = {row.id: row.filename for row in rows}
 
     # Build context string with sources
     context_parts = []
+    if settings.rag_include_document_summaries:
+        for row in rows:
+            if row.summary:
+                context_parts.append(f"[Document summary: {row.filename}]\n{row.summary}")
+
     for i, chunk in enumerate(chunks, 1):
         doc_name = doc_names.get(chunk.document_id, "Unknown Document")
         context_parts.append(
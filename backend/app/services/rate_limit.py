@@ -0,0 +1,258 @@
+"""Per-user request rate limits (requests_per_minute / requests_per_day).
+
+Each limit is a sliding window counter: requests are counted in fixed
+buckets of one window length, and the count over the last window is
+estimated as the current bucket plus the previous bucket weighted by how
+much of it still overlaps the window. A request is admitted only if every
+limit has room; then all counters are incremented together.
+
+The Redis limiter runs the check and the increments in one Lua script
+using the Redis clock, so it is atomic and consistent across workers.
+If Redis is unavailable it falls back to the in-process limiter (limits
+are then enforced per worker). The in-process limiter implements the
+same algorithm and is used directly in tests or single-worker setups.
+"""
+
+import logging
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.core.redis import get_redis
+from app.services.quota import QuotaSnapshot
+
+logger = logging.getLogger(__name__)
+
+MINUTE_SECONDS = 60
+DAY_SECONDS = 24 * 60 * 60
+
+# In-process counters kept before expired ones are pruned
+MEMORY_MAX_ENTRIES = 10000
+
+# KEYS: one base key per limit
+# ARGV: cost, then window (ms) and limit for each key
+# Returns {allowed (0/1), retry after (ms), index of the exceeded limit (1-based, 0 if allowed)}
+SLIDING_WINDOW_SCRIPT = """
+-- Needed before Redis 5 to write after reading TIME (no-op since)
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local retry_after = 0
+local exceeded = 0
+local current_keys = {}
+
+for i, base in ipairs(KEYS) do
+    local window = tonumber(ARGV[2 * i])
+    local limit = tonumber(ARGV[2 * i + 1])
+    local bucket = math.floor(now / window)
+    local elapsed = now - bucket * window
+    local current_key = base .. ':' .. string.format('%d', bucket)
+    local current = tonumber(redis.call('GET', current_key) or '0')
+    local previous = tonumber(redis.call('GET', base .. ':' .. string.format('%d', bucket - 1)) or '0')
+    current_keys[i] = {current_key, window}
+
+    if previous * (window - elapsed) / window + current + cost > limit then
+        local wait
+        if limit < cost then
+            wait = window - elapsed
+        elseif current + cost <= limit then
+            -- Room once enough of the previous bucket slides out of the window
+            wait = (window - elapsed) - (limit - current - cost) * window / previous
+        else
+            -- Room in the next bucket, once enough of this one slides out
+            wait = (window - elapsed) + window * (1 - (limit - cost) / current)
+        end
+        wait = math.max(1, math.ceil(wait))
+        if wait > retry_after then
+            retry_after = wait
+            exceeded = i
+        end
+    end
+end
+
+if exceeded > 0 then
+    return {0, retry_after, exceeded}
+end
+
+for _, entry in ipairs(current_keys) do
+    redis.call('INCRBY', entry[1], cost)
+    redis.call('PEXPIRE', entry[1], entry[2] * 2)
+end
+return {1, 0, 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A maximum number of requests per sliding window."""
+
+    name: str  # Plan field, e.g. "requests_per_minute"
+    limit: int
+    window_seconds: int
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+
+    allowed: bool
+    retry_after: int = 0  # Seconds until the request would be admitted
+    exceeded: RateLimit | None = None
+
+
+class RateLimiter(Protocol):
+    """Storage backend for rate limit counters."""
+
+    async def hit(self, key: str, limits: list[RateLimit], cost: int = 1) -> RateLimitResult: ...
+
+
+def _window_wait_ms(
+    window: int, elapsed: int, current: int, previous: int, limit: int, cost: int
+) -> int:
+    """Milliseconds until a sliding window admits `cost` more (0 if it does now)."""
+    if previous * (window - elapsed) / window + current + cost <= limit:
+        return 0
+    if limit < cost:
+        wait = window - elapsed
+    elif current + cost <= limit:
+        wait = (window - elapsed) - (limit - current - cost) * window / previous
+    else:
+        wait = (window - elapsed) + window * (1 - (limit - cost) / current)
+    return max(1, math.ceil(wait))
+
+
+def _result(limits: list[RateLimit], retry_after_ms: int, exceeded_index: int) -> RateLimitResult:
+    return RateLimitResult(
+        allowed=False,
+        retry_after=max(1, math.ceil(retry_after_ms / 1000)),
+        exceeded=limits[exceeded_index],
+    )
+
+
+class MemoryRateLimiter:
+    """Per-process sliding window counters."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        # Counter key -> (bucket, count in bucket, count in previous bucket)
+        self._counters: dict[str, tuple[int, int, int]] = {}
+
+    def _counts(self, key: str, bucket: int) -> tuple[int, int]:
+        stored = self._counters.get(key)
+        if stored is None:
+            return 0, 0
+        stored_bucket, current, previous = stored
+        if stored_bucket == bucket:
+            return current, previous
+        if stored_bucket == bucket - 1:
+            return 0, current
+        return 0, 0
+
+    def _prune(self, now_ms: int) -> None:
+        """Drop counters whose buckets have left their window."""
+        for key in list(self._counters):
+            window = int(key.rsplit(":", 1)[1])
+            if self._counters[key][0] < now_ms // window - 1:
+                del self._counters[key]
+
+    async def hit(self, key: str, limits: list[RateLimit], cost: int = 1) -> RateLimitResult:
+        now_ms = int(self._clock() * 1000)
+        if len(self._counters) > MEMORY_MAX_ENTRIES:
+            self._prune(now_ms)
+
+        retry_after = 0
+        exceeded = -1
+        updates = []
+        for index, rate_limit in enumerate(limits):
+            window = rate_limit.window_seconds * 1000
+            bucket = now_ms // window
+            counter_key = f"{key}:{window}"
+            current, previous = self._counts(counter_key, bucket)
+            updates.append((counter_key, bucket, current, previous))
+
+            wait = _window_wait_ms(window, now_ms - bucket * window, current, previous, rate_limit.limit, cost)
+            if wait > retry_after:
+                retry_after = wait
+                exceeded = index
+
+        if exceeded >= 0:
+            return _result(limits, retry_after, exceeded)
+
+        for counter_key, bucket, current, previous in updates:
+            self._counters[counter_key] = (bucket, current + cost, previous)
+        return RateLimitResult(allowed=True)
+
+
+class RedisRateLimiter:
+    """Sliding window counters in Redis, checked and updated by a Lua script."""
+
+    def __init__(self) -> None:
+        self._script = None
+        self._fallback = MemoryRateLimiter()
+
+    async def hit(self, key: str, limits: list[RateLimit], cost: int = 1) -> RateLimitResult:
+        client = get_redis()
+        if self._script is None:
+            self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+        args: list[int] = [cost]
+        for rate_limit in limits:
+            args += [rate_limit.window_seconds * 1000, rate_limit.limit]
+        try:
+            allowed, retry_after_ms, exceeded = await self._script(
+                keys=[f"{key}:{rate_limit.window_seconds}" for rate_limit in limits],
+                args=args,
+                client=client,
+            )
+        except RedisError as e:
+            logger.warning(f"Rate limiter unavailable, using per-worker limits: {e}")
+            return await self._fallback.hit(key, limits, cost)
+
+        if allowed:
+            return RateLimitResult(allowed=True)
+        return _result(limits, int(retry_after_ms), int(exceeded) - 1)
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the configured rate limiter."""
+    global _limiter
+    if _limiter is None:
+        if settings.rate_limit_backend == "redis":
+            _limiter = RedisRateLimiter()
+        else:
+            _limiter = MemoryRateLimiter()
+    return _limiter
+
+
+def plan_rate_limits(snapshot: QuotaSnapshot) -> list[RateLimit]:
+    """Get the per-minute and per-day request limits of a user's plan (-1 = unlimited)."""
+    limits = [
+        RateLimit("requests_per_minute", snapshot.requests_per_minute_limit, MINUTE_SECONDS),
+        RateLimit("requests_per_day", snapshot.requests_per_day_limit, DAY_SECONDS),
+    ]
+    return [rate_limit for rate_limit in limits if rate_limit.limit >= 0]
+
+
+async def check_rate_limit(snapshot: QuotaSnapshot) -> RateLimitResult:
+    """
+    Count one request against the user's plan rate limits.
+
+    The request is counted only if it is allowed.
+
+    Returns:
+        RateLimitResult with `retry_after` seconds if the request is refused
+    """
+    limits = plan_rate_limits(snapshot)
+    if not settings.rate_limit_enabled or not limits:
+        return RateLimitResult(allowed=True)
+    # Braces keep one user's keys in the same Redis Cluster slot
+    return await get_rate_limiter().hit(f"ratelimit:{{{snapshot.user_id}}}", limits)
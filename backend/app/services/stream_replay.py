@@ -0,0 +1,332 @@
+"""Replay buffer for resumable chat streams.
+
+Each streamed answer gets a stream ID. The LLM output is produced by a
+background task that appends SSE frames to a short-lived, bounded buffer,
+and clients read from that buffer. A client that reconnects with
+`Last-Event-ID: <stream_id>:<seq>` resumes from the buffer instead of
+re-running retrieval and the LLM call.
+
+The in-memory store only works when a reconnect lands on the same worker;
+use the Redis store when running several workers.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Coroutine
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+import anyio
+
+from app.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# How long a tailing reader waits for new frames before re-checking
+WAIT_TIMEOUT_SECONDS = 0.5
+
+
+class ReplayStore(Protocol):
+    """Storage backend for stream frames."""
+
+    async def create(self, stream_id: str, user_id: str) -> None: ...
+
+    async def append(self, stream_id: str, frame: str) -> int: ...
+
+    async def finish(self, stream_id: str) -> None: ...
+
+    async def read(self, stream_id: str, after: int) -> tuple[list[tuple[int, str]], bool]: ...
+
+    async def wait(self, stream_id: str, after: int, timeout: float) -> None: ...
+
+    async def owner(self, stream_id: str) -> str | None: ...
+
+    async def first_seq(self, stream_id: str) -> int | None: ...
+
+    async def attach(self, stream_id: str) -> int: ...
+
+    async def detach(self, stream_id: str) -> int: ...
+
+    async def subscribers(self, stream_id: str) -> int: ...
+
+
+@dataclass
+class _MemoryStream:
+    """Buffered frames for one stream."""
+
+    user_id: str
+    frames: deque[tuple[int, str]]
+    expires_at: float
+    next_seq: int = 1
+    finished: bool = False
+    subscribers: int = 0
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class MemoryReplayStore:
+    """Per-process ring buffer of stream frames."""
+
+    def __init__(self, max_events: int, ttl_seconds: int) -> None:
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self._streams: dict[str, _MemoryStream] = {}
+
+    def _get(self, stream_id: str) -> _MemoryStream | None:
+        stream = self._streams.get(stream_id)
+        if stream and stream.expires_at < time.monotonic():
+            del self._streams[stream_id]
+            return None
+        return stream
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for stream_id in [k for k, v in self._streams.items() if v.expires_at < now]:
+            del self._streams[stream_id]
+
+    def _notify(self, stream: _MemoryStream) -> None:
+        stream.changed.set()
+        stream.changed = asyncio.Event()
+
+    async def create(self, stream_id: str, user_id: str) -> None:
+        self._evict_expired()
+        self._streams[stream_id] = _MemoryStream(
+            user_id=user_id,
+            frames=deque(maxlen=self.max_events),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+
+    async def append(self, stream_id: str, frame: str) -> int:
+        stream = self._get(stream_id)
+        if stream is None:
+            return 0
+        seq = stream.next_seq
+        stream.next_seq += 1
+        stream.frames.append((seq, frame))
+        stream.expires_at = time.monotonic() + self.ttl_seconds
+        self._notify(stream)
+        return seq
+
+    async def finish(self, stream_id: str) -> None:
+        stream = self._get(stream_id)
+        if stream is not None:
+            stream.finished = True
+            self._notify(stream)
+
+    async def read(self, stream_id: str, after: int) -> tuple[list[tuple[int, str]], bool]:
+        stream = self._get(stream_id)
+        if stream is None:
+            return [], True
+        return [(seq, frame) for seq, frame in stream.frames if seq > after], stream.finished
+
+    async def wait(self, stream_id: str, after: int, timeout: float) -> None:
+        stream = self._get(stream_id)
+        if stream is None or stream.finished or stream.next_seq - 1 > after:
+            return
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(stream.changed.wait(), timeout)
+
+    async def owner(self, stream_id: str) -> str | None:
+        stream = self._get(stream_id)
+        return stream.user_id if stream else None
+
+    async def first_seq(self, stream_id: str) -> int | None:
+        stream = self._get(stream_id)
+        if stream is None:
+            return None
+        return stream.frames[0][0] if stream.frames else stream.next_seq
+
+    async def attach(self, stream_id: str) -> int:
+        stream = self._get(stream_id)
+        if stream is None:
+            return 0
+        stream.subscribers += 1
+        return stream.subscribers
+
+    async def detach(self, stream_id: str) -> int:
+        stream = self._get(stream_id)
+        if stream is None:
+            return 0
+        stream.subscribers = max(0, stream.subscribers - 1)
+        return stream.subscribers
+
+    async def subscribers(self, stream_id: str) -> int:
+        stream = self._get(stream_id)
+        return stream.subscribers if stream else 0
+
+
+class RedisReplayStore:
+    """Redis Streams backed buffer shared by all workers.
+
+    Frames are stored with XADD using `<seq>-1` as entry ID and trimmed to
+    `max_events`; metadata (owner, sequence, finished, subscribers) lives in
+    a hash. Both keys expire `ttl_seconds` after the last write.
+    """
+
+    def __init__(self, max_events: int, ttl_seconds: int) -> None:
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _keys(stream_id: str) -> tuple[str, str]:
+        return f"chat:stream:{stream_id}:meta", f"chat:stream:{stream_id}:events"
+
+    async def create(self, stream_id: str, user_id: str) -> None:
+        meta, _ = self._keys(stream_id)
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.hset(meta, mapping={"user_id": user_id, "seq": 0, "finished": 0, "subscribers": 0})
+            pipe.expire(meta, self.ttl_seconds)
+            await pipe.execute()
+
+    async def append(self, stream_id: str, frame: str) -> int:
+        meta, events = self._keys(stream_id)
+        client = get_redis()
+        seq = await client.hincrby(meta, "seq", 1)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.xadd(events, {"f": frame}, id=f"{seq}-1", maxlen=self.max_events, approximate=False)
+            pipe.expire(events, self.ttl_seconds)
+            pipe.expire(meta, self.ttl_seconds)
+            await pipe.execute()
+        return seq
+
+    async def finish(self, stream_id: str) -> None:
+        meta, _ = self._keys(stream_id)
+        await get_redis().hset(meta, "finished", 1)
+
+    async def read(self, stream_id: str, after: int) -> tuple[list[tuple[int, str]], bool]:
+        meta, events = self._keys(stream_id)
+        client = get_redis()
+        # Read the flag first: if it was set, every frame is already stored
+        finished = await client.hget(meta, "finished")
+        if finished is None:
+            return [], True
+        entries = await client.xrange(events, min=f"({after}-1", max="+")
+        frames = [(int(entry_id.split("-")[0]), fields["f"]) for entry_id, fields in entries]
+        return frames, finished == "1"
+
+    async def wait(self, stream_id: str, after: int, timeout: float) -> None:
+        _, events = self._keys(stream_id)
+        await get_redis().xread({events: f"{after}-1"}, count=1, block=int(timeout * 1000))
+
+    async def owner(self, stream_id: str) -> str | None:
+        meta, _ = self._keys(stream_id)
+        return await get_redis().hget(meta, "user_id")
+
+    async def first_seq(self, stream_id: str) -> int | None:
+        meta, events = self._keys(stream_id)
+        client = get_redis()
+        entries = await client.xrange(events, count=1)
+        if entries:
+            return int(entries[0][0].split("-")[0])
+        seq = await client.hget(meta, "seq")
+        return int(seq) + 1 if seq is not None else None
+
+    async def attach(self, stream_id: str) -> int:
+        meta, _ = self._keys(stream_id)
+        return await get_redis().hincrby(meta, "subscribers", 1)
+
+    async def detach(self, stream_id: str) -> int:
+        meta, _ = self._keys(stream_id)
+        return await get_redis().hincrby(meta, "subscribers", -1)
+
+    async def subscribers(self, stream_id: str) -> int:
+        meta, _ = self._keys(stream_id)
+        count = await get_redis().hget(meta, "subscribers")
+        return int(count) if count is not None else 0
+
+
+_store: ReplayStore | None = None
+
+# Producer tasks running in this worker, by stream ID
+_producers: dict[str, asyncio.Task] = {}
+
+# Pending grace-period checks (strong refs so they are not garbage collected)
+_grace_tasks: set[asyncio.Task] = set()
+
+
+def get_replay_store() -> ReplayStore:
+    """Get the configured replay store."""
+    global _store
+    if _store is None:
+        if settings.stream_replay_backend == "redis":
+            _store = RedisReplayStore(
+                max_events=settings.stream_replay_max_events,
+                ttl_seconds=settings.stream_replay_ttl_seconds,
+            )
+        else:
+            _store = MemoryReplayStore(
+                max_events=settings.stream_replay_max_events,
+                ttl_seconds=settings.stream_replay_ttl_seconds,
+            )
+    return _store
+
+
+def parse_event_id(event_id: str) -> tuple[str, int] | None:
+    """Parse a `<stream_id>:<seq>` event ID."""
+    stream_id, sep, seq = event_id.strip().rpartition(":")
+    if not sep or not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+def start_producer(stream_id: str, coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+    """Run a stream producer in the background, detached from the request."""
+    task = asyncio.create_task(coro)
+    _producers[stream_id] = task
+    task.add_done_callback(lambda _: _producers.pop(stream_id, None))
+    return task
+
+
+async def can_resume(stream_id: str, after: int, user_id: str) -> bool:
+    """Check the stream belongs to the user and still buffers frame `after + 1`."""
+    store = get_replay_store()
+    if await store.owner(stream_id) != user_id:
+        return False
+    first = await store.first_seq(stream_id)
+    return first is not None and first <= after + 1
+
+
+async def tail(stream_id: str, after: int = 0) -> AsyncIterator[str]:
+    """Yield buffered and new frames after `after`, each tagged with its event ID.
+
+    Ends once the producer has finished and all frames were sent. When the
+    reader goes away and nobody reattaches within the resume grace period,
+    the producer is cancelled.
+    """
+    store = get_replay_store()
+    await store.attach(stream_id)
+    try:
+        while True:
+            frames, finished = await store.read(stream_id, after)
+            for seq, frame in frames:
+                yield f"id: {stream_id}:{seq}\n{frame}"
+                after = seq
+            if finished:
+                return
+            if not frames:
+                await store.wait(stream_id, after, WAIT_TIMEOUT_SECONDS)
+    finally:
+        # Shielded so bookkeeping survives the server cancelling the response
+        with anyio.CancelScope(shield=True):
+            await store.detach(stream_id)
+        if stream_id in _producers:
+            task = asyncio.create_task(_cancel_if_abandoned(stream_id))
+            _grace_tasks.add(task)
+            task.add_done_callback(_grace_tasks.discard)
+
+
+async def _cancel_if_abandoned(stream_id: str) -> None:
+    """Cancel the local producer if no reader reattaches within the grace period."""
+    await asyncio.sleep(settings.stream_resume_grace_seconds)
+
+    task = _producers.get(stream_id)
+    if task is None or task.done():
+        return
+    if await get_replay_store().subscribers(stream_id) > 0:
+        return
+
+    logger.info(f"No reader for stream {stream_id}, cancelling upstream")
+    task.cancel()
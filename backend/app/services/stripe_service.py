@@ -20,6 +20,7 @@ from app.models.plan import Plan
 from app.models.subscription import BillingInterval, Subscription, SubscriptionStatus
 from app.models.user import User
 from app.services import litellm_keys
+from app.services.quota import invalidate_user_quota
 
 logger = logging.getLogger(__name__)
 
@@ -342,6 +343,7 @@ async def handle_subscription_created(
     db.add(user)
 
     await db.commit()
+    await invalidate_user_quota(subscription.user_id, db)
     await db.refresh(subscription)
 
     logger.info(f"Created subscription {subscription.id} for user {user.id}")
@@ -443,6 +445,7 @@ async def handle_subscription_updated(
 
     db.add(subscription)
     await db.commit()
+    await invalidate_user_quota(subscription.user_id, db)
     await db.refresh(subscription)
 
     logger.info(f"Updated subscription {subscription.id}")
@@ -502,6 +505,7 @@ async def handle_subscription_deleted(
 
     db.add(subscription)
     await db.commit()
+    await invalidate_user_quota(subscription.user_id, db)
     await db.refresh(subscription)
 
     logger.info(f"Canceled subscription {subscription.id}")
@@ -700,6 +704,7 @@ async def handle_invoice_payment_failed(
         subscription.status = SubscriptionStatus.PAST_DUE
         db.add(subscription)
         await db.commit()
+        await invalidate_user_quota(subscription.user_id, db)
         logger.info(f"Marked subscription {subscription.id} as past_due")
 
         # Send payment failed notification
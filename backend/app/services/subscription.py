@@ -21,6 +21,7 @@ from app.schemas.subscription import (
 )
 from app.services import litellm_keys
 from app.services.plan import get_plan
+from app.services.quota import invalidate_user_quota
 
 logger = logging.getLogger(__name__)
 
@@ -99,6 +100,7 @@ async def create_subscription(
     # Update user tier
     user.tier = plan.plan_type.value
     await db.flush()
+    await invalidate_user_quota(data.user_id, db)
 
     logger.info(f"Created subscription {subscription.id} for user {data.user_id}")
     return subscription
@@ -260,6 +262,7 @@ async def upgrade_subscription(
         user.tier = new_plan.plan_type.value
 
     await db.flush()
+    await invalidate_user_quota(subscription.user_id, db)
     logger.info(f"Upgraded subscription {subscription_id} to plan {new_plan.name}")
 
     return subscription
@@ -327,6 +330,7 @@ async def downgrade_subscription(
         user.tier = new_plan.plan_type.value
 
     await db.flush()
+    await invalidate_user_quota(subscription.user_id, db)
     logger.info(f"Downgraded subscription {subscription_id} to plan {new_plan.name}")
 
     return subscription
@@ -385,6 +389,7 @@ async def cancel_subscription(
             user.tier = "free"
 
     await db.flush()
+    await invalidate_user_quota(subscription.user_id, db)
     logger.info(f"Canceled subscription {subscription_id}")
 
     return subscription
@@ -438,6 +443,7 @@ async def reactivate_subscription(
         user.tier = subscription.plan.plan_type.value
 
     await db.flush()
+    await invalidate_user_quota(subscription.user_id, db)
     logger.info(f"Reactivated subscription {subscription_id}")
 
     return subscription
@@ -491,6 +497,7 @@ async def update_subscription_from_stripe(
                 pass
 
     await db.flush()
+    await invalidate_user_quota(subscription.user_id, db)
     logger.info(f"Updated subscription {subscription.id} from Stripe webhook")
 
     return subscription
@@ -0,0 +1,311 @@
+"""Text summarization with a map-reduce mode for long inputs.
+
+Short texts are summarized in one completion. Longer texts are split with
+the same `TextChunker` settings used at ingestion, each chunk is summarized
+concurrently (bounded by `settings.summarize_concurrency`), and the chunk
+summaries are reduced; if they are still too long they are chunked and
+summarized again. Chunk summaries are cached by content hash, so chunks
+already summarized, e.g. of an indexed document, are not sent again.
+
+`summarize_document` builds the hierarchical summary stored at ingestion:
+chunk summaries are grouped into sections of consecutive chunks, each
+section is summarized, and the section summaries are reduced into one
+document summary.
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.config import settings
+from app.providers.llm import ChatCompletionResponse, ChatMessage, llm_client
+from app.services.document_processor import TextChunker
+
+logger = logging.getLogger(__name__)
+
+STYLE_INSTRUCTIONS = {
+    "concise": "Provide a brief, concise summary.",
+    "detailed": "Provide a comprehensive summary covering all key points.",
+    "bullet_points": "Provide a summary as bullet points.",
+}
+
+# Map step: style-independent, so cached chunk summaries serve any request
+CHUNK_SUMMARY_PROMPT = """You are a summarization assistant. Summarize this section of a longer document in a few sentences.
+Keep names, numbers, dates, definitions and conclusions. Do not add information."""
+
+CHUNK_SUMMARY_MAX_TOKENS = 300
+
+SECTION_SUMMARY_PROMPT = """You are a summarization assistant. The following are summaries of consecutive parts of one section of a document.
+Combine them into one paragraph. Keep names, numbers, dates and conclusions. Do not add information."""
+
+SECTION_SUMMARY_MAX_TOKENS = 400
+
+# Approximate length of stored document summaries, in words
+DOCUMENT_SUMMARY_MAX_LENGTH = 300
+
+
+def content_hash(text: str) -> str:
+    """Hash text content for cache keys."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SummaryResult:
+    """Summary with the cost of producing it."""
+
+    summary: str
+    model: str | None = None
+    usage: dict[str, int] = field(
+        default_factory=lambda: {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    )
+    chunks: int = 1
+    cached_chunks: int = 0
+    levels: int = 0  # Map-reduce levels (0 = single call)
+    sections: list[dict[str, Any]] = field(default_factory=list)
+
+    def add_usage(self, model: str | None, usage: dict[str, int] | None) -> None:
+        """Add one LLM call's usage."""
+        self.model = model or self.model
+        for key in self.usage:
+            self.usage[key] += (usage or {}).get(key, 0)
+
+
+class ChunkSummaryCache:
+    """LRU cache of chunk summaries keyed by content hash."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str | None:
+        summary = self._entries.get(key)
+        if summary is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return summary
+
+    def set(self, key: str, summary: str) -> None:
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Get cache metrics."""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class Summarizer:
+    """Summarize text of any length."""
+
+    def __init__(
+        self,
+        chunker: TextChunker | None = None,
+        cache: ChunkSummaryCache | None = None,
+    ) -> None:
+        # Same defaults as DocumentProcessor so chunks match indexed ones
+        self.chunker = chunker or TextChunker()
+        self.cache = cache or ChunkSummaryCache(settings.summary_cache_max_entries)
+
+    async def summarize(
+        self,
+        text: str,
+        max_length: int = 500,
+        style: str = "concise",
+    ) -> SummaryResult:
+        """Summarize text, using map-reduce above the single-call threshold.
+
+        Args:
+            text: Text content to summarize
+            max_length: Approximate max length of summary in words
+            style: Summary style - 'concise', 'detailed', or 'bullet_points'
+
+        Returns:
+            SummaryResult with summary and usage
+        """
+        result = SummaryResult(summary="")
+        threshold = settings.summarize_map_reduce_threshold_chars
+
+        if len(text) > threshold:
+            chunks = [chunk.content for chunk in await self.chunker.chunk(text)]
+            result.chunks = len(chunks)
+            while True:
+                result.levels += 1
+                summaries = await self.summarize_chunks(chunks, result)
+                reduced = "\n\n".join(summaries)
+                shrank = len(reduced) < len(text)
+                text = reduced
+                if len(text) <= threshold or len(summaries) <= 1:
+                    break
+                if not shrank or result.levels >= settings.summarize_max_levels:
+                    # Not converging (verbose model, chunks smaller than a
+                    # summary): reduce what fits in one call
+                    logger.warning(
+                        f"Map-reduce stopped after {result.levels} levels at {len(text)} chars"
+                    )
+                    text = text[:threshold]
+                    break
+                # Still too long to reduce in one call: summarize the summaries
+                chunks = [chunk.content for chunk in await self.chunker.chunk(text)]
+
+        intro = (
+            "Please summarize the following text:"
+            if result.levels == 0
+            else "The following are summaries of consecutive sections of one document. "
+            "Combine them into a single summary:"
+        )
+        response = await self._reduce(f"{intro}\n\n{text}", max_length, style)
+        result.add_usage(response.model, response.usage)
+        result.summary = response.content
+        if result.levels:
+            logger.info(
+                f"Map-reduce summary: {result.chunks} chunks ({result.cached_chunks} cached), "
+                f"{result.levels} levels, {result.usage['total_tokens']} tokens"
+            )
+        return result
+
+    async def summarize_document(
+        self,
+        chunks: list[str],
+        section_chunks: int,
+    ) -> SummaryResult:
+        """Build a per-section and per-document summary from indexed chunks.
+
+        Args:
+            chunks: Chunk texts in document order
+            section_chunks: Number of consecutive chunks per section
+
+        Returns:
+            SummaryResult with the document summary and `sections`, one
+            {"section", "chunk_start", "chunk_end", "summary"} dict each
+        """
+        result = SummaryResult(summary="", chunks=len(chunks), levels=2)
+        chunk_summaries = await self.summarize_chunks(chunks, result)
+
+        bounds = [
+            (start, min(start + section_chunks, len(chunks)))
+            for start in range(0, len(chunks), section_chunks)
+        ]
+        section_summaries: list[str] = [""] * len(bounds)
+        semaphore = asyncio.Semaphore(settings.summarize_concurrency)
+
+        async def run(index: int, start: int, end: int) -> None:
+            if end - start == 1:
+                section_summaries[index] = chunk_summaries[start]
+                return
+            async with semaphore:
+                response = await llm_client.chat_completion(
+                    messages=[
+                        ChatMessage(role="system", content=SECTION_SUMMARY_PROMPT),
+                        ChatMessage(role="user", content="\n\n".join(chunk_summaries[start:end])),
+                    ],
+                    temperature=0.3,
+                    max_tokens=SECTION_SUMMARY_MAX_TOKENS,
+                )
+            result.add_usage(response.model, response.usage)
+            section_summaries[index] = response.content
+
+        async with asyncio.TaskGroup() as group:
+            for index, (start, end) in enumerate(bounds):
+                group.create_task(run(index, start, end))
+
+        result.sections = [
+            {"section": index, "chunk_start": start, "chunk_end": end - 1, "summary": summary}
+            for index, ((start, end), summary) in enumerate(zip(bounds, section_summaries, strict=True))
+        ]
+
+        if len(section_summaries) == 1:
+            result.summary = section_summaries[0]
+            return result
+
+        combined = "\n\n".join(section_summaries)
+        if len(combined) > settings.summarize_map_reduce_threshold_chars:
+            # Very long documents: fold the section summaries further
+            folded = await self.summarize(combined, max_length=DOCUMENT_SUMMARY_MAX_LENGTH)
+            result.add_usage(folded.model, folded.usage)
+            result.levels += folded.levels
+            result.summary = folded.summary
+            return result
+
+        response = await self._reduce(
+            "The following are summaries of consecutive sections of one document. "
+            f"Combine them into a single summary:\n\n{combined}",
+            DOCUMENT_SUMMARY_MAX_LENGTH,
+        )
+        result.add_usage(response.model, response.usage)
+        result.summary = response.content
+        return result
+
+    async def _reduce(self, prompt: str, max_length: int, style: str = "concise") -> ChatCompletionResponse:
+        """Run the final, style-specific summarization call."""
+        instruction = STYLE_INSTRUCTIONS.get(style, STYLE_INSTRUCTIONS["concise"])
+        return await llm_client.chat_completion(
+            messages=[
+                ChatMessage(
+                    role="system",
+                    content=f"""You are a summarization assistant. {instruction}
+Keep the summary under approximately {max_length} words.
+Focus on the most important information and key takeaways.""",
+                ),
+                ChatMessage(role="user", content=prompt),
+            ],
+            temperature=0.3,  # Lower temperature for consistent summaries
+            max_tokens=max_length * 2,  # Rough estimate for tokens
+        )
+
+    async def summarize_chunks(
+        self,
+        chunks: list[str],
+        result: SummaryResult | None = None,
+    ) -> list[str]:
+        """Summarize chunks concurrently, reusing cached summaries.
+
+        Args:
+            chunks: Chunk texts
+            result: Optional SummaryResult to add usage and cache hits to
+
+        Returns:
+            One summary per chunk, in order
+        """
+        summaries: list[str] = [""] * len(chunks)
+        semaphore = asyncio.Semaphore(settings.summarize_concurrency)
+
+        async def run(index: int, chunk: str) -> None:
+            key = content_hash(chunk)
+            cached = self.cache.get(key)
+            if cached is not None:
+                summaries[index] = cached
+                if result is not None:
+                    result.cached_chunks += 1
+                return
+
+            async with semaphore:
+                response = await llm_client.chat_completion(
+                    messages=[
+                        ChatMessage(role="system", content=CHUNK_SUMMARY_PROMPT),
+                        ChatMessage(role="user", content=chunk),
+                    ],
+                    temperature=0.3,
+                    max_tokens=CHUNK_SUMMARY_MAX_TOKENS,
+                )
+            if result is not None:
+                result.add_usage(response.model, response.usage)
+            summaries[index] = response.content
+            self.cache.set(key, response.content)
+
+        async with asyncio.TaskGroup() as group:
+            for index, chunk in enumerate(chunks):
+                group.create_task(run(index, chunk))
+
+        return summaries
+
+
+# Singleton instance
+summarizer = Summarizer()
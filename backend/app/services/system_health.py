@@ -8,8 +8,11 @@ import redis.asyncio as redis
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.definitions import agent_definitions
 from app.config import settings
+from app.core.read_replica import replica_router
 from app.core.telemetry import traced
+from app.core.unit_of_work import db_request_metrics
 from app.schemas.admin import (
     LiteLLMHealth,
     PostgreSQLHealth,
@@ -18,6 +21,13 @@ from app.schemas.admin import (
     SystemHealthResponse,
     SystemMetrics,
 )
+from app.services.auth_cache import auth_user_cache
+from app.services.credits import credit_accounting
+from app.services.document_summary import document_summary_worker
+from app.services.quota import quota_cache
+from app.services.summarizer import summarizer
+from app.services.usage_buffer import usage_buffer
+from app.services.user_counters import user_counters_reconciler
 
 
 @traced()
@@ -244,4 +254,16 @@ async def get_system_metrics(db: AsyncSession) -> SystemMetrics:
         error_rate_percent=0,
         active_users=0,
         uptime_seconds=0,
+        caches={
+            "agent_definitions": agent_definitions.stats(),
+            "chunk_summaries": summarizer.cache.stats(),
+            "document_summary_worker": document_summary_worker.stats(),
+            "quota": quota_cache.stats(),
+            "auth_users": auth_user_cache.stats(),
+            "credit_reservations": credit_accounting.stats(),
+            "usage_buffer": usage_buffer.stats(),
+            "user_counters_reconciler": user_counters_reconciler.stats(),
+            "db_requests": db_request_metrics.stats(),
+            "read_replica": replica_router.stats(),
+        },
     )
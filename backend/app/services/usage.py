@@ -3,9 +3,12 @@
 Provides functions to record and query usage for request-based billing.
 """
 
+import json
 import logging
 import uuid
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
 
 from sqlalchemy import and_, func, select
 from sqlalchemy.dialects.postgresql import insert
@@ -18,6 +21,9 @@ from app.schemas.usage import (
     UsageStatsResponse,
     get_credits_for_model,
 )
+from app.services.credits import CreditReservation, credit_accounting
+from app.services.quota import invalidate_user_quota
+from app.services.usage_rollups import get_requests_by_model, upsert_rollups
 
 logger = logging.getLogger(__name__)
 
@@ -27,128 +33,192 @@ def get_current_period() -> str:
     return datetime.utcnow().strftime("%Y-%m")
 
 
+@dataclass
+class UsageEvent:
+    """One usage event, recorded directly or through the usage buffer."""
+
+    user_id: uuid.UUID
+    data: UsageRecordCreate
+    credits: int
+    period: str
+    created_at: datetime
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "user_id": str(self.user_id),
+            "data": self.data.model_dump(mode="json"),
+            "credits": self.credits,
+            "period": self.period,
+            "created_at": self.created_at.isoformat(),
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "UsageEvent":
+        data = json.loads(raw)
+        return cls(
+            user_id=uuid.UUID(data["user_id"]),
+            data=UsageRecordCreate.model_validate(data["data"]),
+            credits=data["credits"],
+            period=data["period"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+        )
+
+
+def build_usage_event(user_id: uuid.UUID, data: UsageRecordCreate) -> UsageEvent:
+    """Create a usage event stamped with the current time and period."""
+    # Calculate credits if not provided
+    credits = data.credits_used
+    if credits == 1:  # Default value, calculate based on model
+        credits = get_credits_for_model(data.model)
+
+    now = datetime.now(UTC)
+    return UsageEvent(
+        user_id=user_id,
+        data=data,
+        credits=credits,
+        period=now.strftime("%Y-%m"),
+        created_at=now,
+    )
+
+
 @traced()
 async def record_usage(
     db: AsyncSession,
     user_id: uuid.UUID,
     data: UsageRecordCreate,
-) -> UsageRecord:
+    reservation: CreditReservation | None = None,
+) -> None:
     """
     Record a single usage event.
 
-    This function:
-    1. Creates a UsageRecord entry
-    2. Updates the UsageSummary for the current period
+    When the usage buffer is running the event is queued and written in a
+    batch (UsageRecord rows plus the summary and rollup upserts) by the buffer,
+    outside the caller's session. Otherwise it is written with the caller's
+    session, which the caller commits.
 
     Args:
         db: Database session
         user_id: User ID
         data: Usage record data
-
-    Returns:
-        Created UsageRecord
+        reservation: Credits reserved for the request; settled with the
+            event's credits once the event is queued, or once the caller's
+            session commits when written directly
     """
-    # Calculate credits if not provided
-    credits = data.credits_used
-    if credits == 1:  # Default value, calculate based on model
-        credits = get_credits_for_model(data.model)
+    from app.services.usage_buffer import usage_buffer
 
-    # Create usage record
-    record = UsageRecord(
-        user_id=user_id,
-        request_type=data.request_type,
-        model=data.model,
-        tokens_input=data.tokens_input,
-        tokens_output=data.tokens_output,
-        tokens_total=data.tokens_total,
-        cost=data.cost,
-        credits_used=credits,
-        latency_ms=data.latency_ms,
-        conversation_id=data.conversation_id,
-        message_id=data.message_id,
-        agent_id=data.agent_id,
-        litellm_call_id=data.litellm_call_id,
-        extra_data=data.extra_data,
-    )
-    db.add(record)
+    event = build_usage_event(user_id, data)
 
-    # Update usage summary (upsert)
-    period = get_current_period()
-    await update_usage_summary(
-        db=db,
-        user_id=user_id,
-        period=period,
-        request_type=data.request_type,
-        tokens=data.tokens_total,
-        credits=credits,
-        cost=data.cost,
-    )
-
-    await db.commit()
-    await db.refresh(record)
+    if usage_buffer.running:
+        usage_buffer.add(event)
+        if reservation is not None:
+            await credit_accounting.commit(reservation, event.credits)
+    else:
+        await write_usage_events(db, [event])
+        await db.flush()
+        await invalidate_user_quota(user_id, db)
+        if reservation is not None:
+            credit_accounting.commit_after(db, reservation, event.credits)
 
     logger.info(
         f"Recorded usage for user {user_id}: "
-        f"model={data.model}, tokens={data.tokens_total}, credits={credits}"
+        f"model={data.model}, tokens={data.tokens_total}, credits={event.credits}"
     )
 
-    return record
+
+# UsageSummary column counting each request type
+REQUEST_TYPE_COLUMNS = {
+    RequestType.CHAT: "chat_requests",
+    RequestType.RAG: "rag_requests",
+    RequestType.AGENT: "agent_requests",
+    RequestType.EMBEDDING: "embedding_requests",
+}
+
+SUMMARY_COUNTERS = (
+    "total_requests",
+    "total_tokens",
+    "total_credits",
+    "total_cost",
+    *REQUEST_TYPE_COLUMNS.values(),
+)
+
+# Rows per INSERT statement (asyncpg allows 32767 bind parameters)
+INSERT_CHUNK_SIZE = 1000
+
+
+def aggregate_usage_summaries(events: list[UsageEvent]) -> list[dict[str, Any]]:
+    """Sum events into one UsageSummary increment per (user, period)."""
+    totals: dict[tuple[uuid.UUID, str], dict[str, Any]] = {}
+    for event in events:
+        row = totals.get((event.user_id, event.period))
+        if row is None:
+            row = {"user_id": event.user_id, "period": event.period}
+            row.update(dict.fromkeys(SUMMARY_COUNTERS, 0))
+            totals[(event.user_id, event.period)] = row
+        row["total_requests"] += 1
+        row["total_tokens"] += event.data.tokens_total
+        row["total_credits"] += event.credits
+        row["total_cost"] += event.data.cost
+        type_column = REQUEST_TYPE_COLUMNS.get(event.data.request_type, "chat_requests")
+        row[type_column] += 1
+    return list(totals.values())
 
 
 @traced()
-async def update_usage_summary(
-    db: AsyncSession,
-    user_id: uuid.UUID,
-    period: str,
-    request_type: RequestType,
-    tokens: int,
-    credits: int,
-    cost: float,
-) -> None:
+async def write_usage_events(db: AsyncSession, events: list[UsageEvent]) -> None:
     """
-    Update usage summary with incremental values.
+    Insert usage records and update summaries and rollups for a batch of events.
 
-    Uses PostgreSQL UPSERT for atomic operation.
+    Records are inserted with multi-row INSERTs, summaries with a single
+    upsert that adds each (user, period) total, and the hourly and daily
+    rollups likewise. Does not commit.
     """
-    # Map request type to column
-    type_column_map = {
-        RequestType.CHAT: "chat_requests",
-        RequestType.RAG: "rag_requests",
-        RequestType.AGENT: "agent_requests",
-        RequestType.EMBEDDING: "embedding_requests",
-    }
-    type_column = type_column_map.get(request_type, "chat_requests")
-
-    # Build upsert statement
-    stmt = insert(UsageSummary).values(
-        user_id=user_id,
-        period=period,
-        total_requests=1,
-        total_tokens=tokens,
-        total_credits=credits,
-        total_cost=cost,
-        chat_requests=1 if request_type == RequestType.CHAT else 0,
-        rag_requests=1 if request_type == RequestType.RAG else 0,
-        agent_requests=1 if request_type == RequestType.AGENT else 0,
-        embedding_requests=1 if request_type == RequestType.EMBEDDING else 0,
-        is_synced=False,
-    )
-
-    # On conflict, increment values
-    stmt = stmt.on_conflict_do_update(
-        constraint="uq_usage_summary_user_period",
-        set_={
-            "total_requests": UsageSummary.total_requests + 1,
-            "total_tokens": UsageSummary.total_tokens + tokens,
-            "total_credits": UsageSummary.total_credits + credits,
-            "total_cost": UsageSummary.total_cost + cost,
-            type_column: getattr(UsageSummary, type_column) + 1,
-            "is_synced": False,
-            "updated_at": func.now(),
-        },
-    )
+    if not events:
+        return
+
+    records = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": event.user_id,
+            "request_type": event.data.request_type,
+            "model": event.data.model,
+            "tokens_input": event.data.tokens_input,
+            "tokens_output": event.data.tokens_output,
+            "tokens_total": event.data.tokens_total,
+            "cost": event.data.cost,
+            "credits_used": event.credits,
+            "latency_ms": event.data.latency_ms,
+            "conversation_id": event.data.conversation_id,
+            "message_id": event.data.message_id,
+            "agent_id": event.data.agent_id,
+            "litellm_call_id": event.data.litellm_call_id,
+            "extra_data": event.data.extra_data,
+            "created_at": event.created_at,
+        }
+        for event in events
+    ]
+    for start in range(0, len(records), INSERT_CHUNK_SIZE):
+        await db.execute(insert(UsageRecord).values(records[start:start + INSERT_CHUNK_SIZE]))
+
+    summaries = [
+        {"id": uuid.uuid4(), **row, "is_synced": False}
+        for row in aggregate_usage_summaries(events)
+    ]
+    for start in range(0, len(summaries), INSERT_CHUNK_SIZE):
+        stmt = insert(UsageSummary).values(summaries[start:start + INSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_usage_summary_user_period",
+            set_={
+                **{
+                    column: getattr(UsageSummary, column) + getattr(stmt.excluded, column)
+                    for column in SUMMARY_COUNTERS
+                },
+                "is_synced": False,
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
 
-    await db.execute(stmt)
+    await upsert_rollups(db, events)
 
 
 @traced()
@@ -204,22 +274,20 @@ async def get_or_create_usage_summary(
     summary = await get_usage_summary(db, user_id, period)
 
     if summary is None:
-        summary = UsageSummary(
-            user_id=user_id,
-            period=period,
-            total_requests=0,
-            total_tokens=0,
-            total_credits=0,
-            total_cost=0.0,
-            chat_requests=0,
-            rag_requests=0,
-            agent_requests=0,
-            embedding_requests=0,
-            is_synced=True,
+        # Upsert: a concurrent usage flush may create the row first.
+        # Not committed here; the caller's unit of work commits.
+        await db.execute(
+            insert(UsageSummary)
+            .values(
+                id=uuid.uuid4(),
+                user_id=user_id,
+                period=period,
+                **dict.fromkeys(SUMMARY_COUNTERS, 0),
+                is_synced=True,
+            )
+            .on_conflict_do_nothing(constraint="uq_usage_summary_user_period")
         )
-        db.add(summary)
-        await db.commit()
-        await db.refresh(summary)
+        summary = await get_usage_summary(db, user_id, period)
 
     return summary
 
@@ -300,7 +368,7 @@ async def get_usage_by_model(
     if period is None:
         period = get_current_period()
 
-    # Filter by month
+    # Read the daily rollups of the month
     year, month = period.split("-")
     start_date = datetime(int(year), int(month), 1)
     if int(month) == 12:
@@ -308,20 +376,7 @@ async def get_usage_by_model(
     else:
         end_date = datetime(int(year), int(month) + 1, 1)
 
-    stmt = (
-        select(UsageRecord.model, func.count(UsageRecord.id))
-        .where(
-            and_(
-                UsageRecord.user_id == user_id,
-                UsageRecord.created_at >= start_date,
-                UsageRecord.created_at < end_date,
-            )
-        )
-        .group_by(UsageRecord.model)
-    )
-
-    result = await db.execute(stmt)
-    return {row[0]: row[1] for row in result.all()}
+    return await get_requests_by_model(db, user_id, start_date, end_date)
 
 
 @traced()
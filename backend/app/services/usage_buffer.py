@@ -0,0 +1,280 @@
+"""In-process buffer that writes usage events in batches.
+
+`record_usage` queues events here instead of writing them in the request's
+session. A background task flushes the buffer every
+`settings.usage_flush_interval_seconds`, or as soon as
+`settings.usage_flush_batch_size` events are pending, with its own session:
+one multi-row INSERT of usage records and one upsert each for the
+(user, period) summaries and the hourly and daily rollups per batch, then
+invalidates the affected users' quota snapshots.
+
+A flush that fails on a transient error (connection lost, timeout) keeps
+the events for the next attempt. A batch the database rejects (integrity or
+data errors, e.g. a usage event for a user deleted meanwhile) is written
+again row by row, and the rows that still fail are moved to a dead letter
+list so they cannot block the events queued behind them.
+
+At most `settings.usage_buffer_max_pending` events are held in memory; new
+events beyond that are spilled while the database is unavailable. On
+shutdown the buffer is flushed and whatever cannot be written is spilled
+too. Spilled events go to a Redis list (or, if Redis is down too, a JSON
+lines file) and are loaded again once this buffer has drained, or by the
+next worker that starts.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import uuid
+from datetime import UTC, datetime
+
+from redis.exceptions import RedisError
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.config import settings
+from app.core.redis import get_redis
+from app.services.quota import invalidate_user_quota
+from app.services.usage import UsageEvent, write_usage_events
+
+logger = logging.getLogger(__name__)
+
+SPILL_KEY = "usage:spill"
+DEAD_LETTER_KEY = "usage:dead"
+
+# Events popped from the Redis spill list per round trip
+RECOVER_CHUNK_SIZE = 500
+
+
+class UsageBuffer:
+    """Batches usage events and writes them in the background."""
+
+    def __init__(self) -> None:
+        self._events: list[UsageEvent] = []
+        self._overflow: list[UsageEvent] = []
+        self._overflow_task: asyncio.Task | None = None
+        self._reload_spilled = False
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.spilled = 0
+        self.recovered = 0
+        self.overflowed = 0
+        self.dead_lettered = 0
+        self.last_flush_lag_ms = 0
+        self.max_flush_lag_ms = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._events)
+
+    async def start(self) -> None:
+        """Load spilled events and start flushing (no-op if disabled or running)."""
+        if not settings.usage_buffer_enabled or self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        await self._recover()
+        self._task = asyncio.create_task(self._run(), name="usage-buffer")
+        logger.info("Started usage buffer")
+
+    async def stop(self) -> None:
+        """Flush pending events, spilling any that cannot be written."""
+        if self._task is None:
+            return
+        # Let an in-flight flush finish rather than cancelling it mid-commit
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        if self._overflow_task is not None:
+            await self._overflow_task
+
+        while self._events and await self.flush():
+            pass
+        if self._events:
+            await self._spill(self._events)
+            self._events = []
+
+    def add(self, event: UsageEvent) -> None:
+        """Queue a usage event, spilling it if the buffer is full."""
+        if len(self._events) >= settings.usage_buffer_max_pending:
+            self._overflow.append(event)
+            if self._overflow_task is None:
+                self._overflow_task = asyncio.create_task(self._spill_overflow())
+            return
+        self._events.append(event)
+        if len(self._events) >= settings.usage_flush_batch_size:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        """Flush loop."""
+        while not self._stopping:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), settings.usage_flush_interval_seconds)
+            self._wakeup.clear()
+            # Drain full batches, stop retrying until the next tick on failure
+            while self._events and await self.flush():
+                if len(self._events) < settings.usage_flush_batch_size:
+                    break
+            # Pick up events spilled on overflow once the backlog is written
+            if self._reload_spilled and not self._events:
+                self._reload_spilled = False
+                await self._recover()
+
+    async def flush(self) -> bool:
+        """
+        Write up to one batch of pending events.
+
+        Returns:
+            True if the batch was written (or nothing was pending)
+        """
+        if not self._events:
+            return True
+        batch = self._events[: settings.usage_flush_batch_size]
+        del self._events[: len(batch)]
+
+        try:
+            await self._write(batch)
+        except (IntegrityError, DataError) as e:
+            logger.warning(f"Usage batch of {len(batch)} events rejected, writing rows one by one: {e}")
+            return await self._write_rows(batch)
+        except Exception as e:
+            # Keep order: the failed batch goes back in front of newer events
+            self._events[:0] = batch
+            self.failures += 1
+            logger.error(f"Failed to flush {len(batch)} usage events: {e}")
+            return False
+
+        await self._written(batch)
+        return True
+
+    async def _write(self, events: list[UsageEvent]) -> None:
+        """Write events in one transaction."""
+        from app.core.database import SessionLocal
+
+        async with SessionLocal() as db:
+            await write_usage_events(db, events)
+            await db.commit()
+
+    async def _write_rows(self, batch: list[UsageEvent]) -> bool:
+        """Write a rejected batch one event at a time, dead-lettering bad rows."""
+        written: list[UsageEvent] = []
+        rejected: list[UsageEvent] = []
+        ok = True
+        for i, event in enumerate(batch):
+            try:
+                await self._write([event])
+            except (IntegrityError, DataError) as e:
+                logger.error(f"Dead-lettering usage event for user {event.user_id}: {e}")
+                rejected.append(event)
+                continue
+            except Exception as e:
+                self._events[:0] = batch[i:]
+                self.failures += 1
+                logger.error(f"Failed to flush {len(batch) - i} usage events: {e}")
+                ok = False
+                break
+            written.append(event)
+
+        if rejected:
+            await self._save(DEAD_LETTER_KEY, settings.usage_dead_letter_path, rejected)
+            self.dead_lettered += len(rejected)
+        if written:
+            await self._written(written)
+        return ok
+
+    async def _written(self, events: list[UsageEvent]) -> None:
+        """Record flush metrics and drop the affected quota snapshots."""
+        oldest = min(event.created_at for event in events)
+        lag_ms = int((datetime.now(UTC) - oldest).total_seconds() * 1000)
+        self.last_flush_lag_ms = lag_ms
+        self.max_flush_lag_ms = max(self.max_flush_lag_ms, lag_ms)
+        self.flushed += len(events)
+        self.batches += 1
+
+        user_ids: set[uuid.UUID] = {event.user_id for event in events}
+        for user_id in user_ids:
+            await invalidate_user_quota(user_id)
+
+    async def _spill(self, events: list[UsageEvent]) -> None:
+        """Save unwritten events to Redis, or to the spill file."""
+        await self._save(SPILL_KEY, settings.usage_spill_path, events)
+        self.spilled += len(events)
+
+    async def _spill_overflow(self) -> None:
+        """Spill events added while the buffer was full."""
+        try:
+            while self._overflow:
+                events, self._overflow = self._overflow, []
+                self.overflowed += len(events)
+                await self._spill(events)
+                self._reload_spilled = True
+        finally:
+            self._overflow_task = None
+
+    async def _save(self, key: str, path: str, events: list[UsageEvent]) -> None:
+        """Append events to a Redis list, or to a JSON lines file."""
+        lines = [event.to_json() for event in events]
+        try:
+            await get_redis().rpush(key, *lines)
+            logger.warning(f"Saved {len(lines)} usage events to Redis list {key}")
+        except RedisError as e:
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(f"{line}\n" for line in lines)
+            logger.warning(f"Saved {len(lines)} usage events to {path} ({e})")
+
+    async def _recover(self) -> None:
+        """Queue events spilled by a previous shutdown."""
+        lines: list[str] = []
+        try:
+            client = get_redis()
+            while chunk := await client.lpop(SPILL_KEY, RECOVER_CHUNK_SIZE):
+                lines.extend(chunk)
+        except RedisError as e:
+            logger.warning(f"Could not read spilled usage events from Redis: {e}")
+
+        path = settings.usage_spill_path
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                lines.extend(line for line in f.read().splitlines() if line)
+            os.remove(path)
+
+        recovered = 0
+        for line in lines:
+            try:
+                self._events.append(UsageEvent.from_json(line))
+                recovered += 1
+            except (ValueError, KeyError) as e:
+                logger.error(f"Dropping unreadable spilled usage event: {e}")
+        if recovered:
+            self.recovered += recovered
+            logger.info(f"Recovered {recovered} spilled usage events")
+
+    def stats(self) -> dict[str, int]:
+        """Get buffer and flush lag metrics."""
+        oldest = min((event.created_at for event in self._events), default=None)
+        return {
+            "pending": len(self._events),
+            "oldest_pending_ms": int((datetime.now(UTC) - oldest).total_seconds() * 1000) if oldest else 0,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "spilled": self.spilled,
+            "recovered": self.recovered,
+            "overflowed": self.overflowed,
+            "dead_lettered": self.dead_lettered,
+            "last_flush_lag_ms": self.last_flush_lag_ms,
+            "max_flush_lag_ms": self.max_flush_lag_ms,
+        }
+
+
+# Singleton instance
+usage_buffer = UsageBuffer()
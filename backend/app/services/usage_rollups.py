@@ -0,0 +1,318 @@
+"""Hourly and daily usage rollups per (user, model, request type).
+
+The usage pipeline (`write_usage_events`) adds every batch of events to
+`usage_hourly` and `usage_daily` in the same transaction as the raw usage
+records, so analytics can sum a few rollup rows instead of scanning
+`usage_records`. Buckets are naive UTC timestamps.
+
+`backfill_rollups` rebuilds the rollups of a date range from the raw
+records (for data recorded before the rollups existed, or to repair
+drift) and `check_rollups` compares the two; both are exposed by
+`python -m app.scripts.usage_rollups`. Flushes hold a shared advisory
+lock on each day they add to, and a rebuild holds the day's lock
+exclusively, so the two never interleave.
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import and_, delete, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.telemetry import traced
+from app.models.usage import UsageDaily, UsageHourly, UsageRecord
+
+if TYPE_CHECKING:
+    from app.services.usage import UsageEvent
+
+logger = logging.getLogger(__name__)
+
+# Rollup model and date_trunc unit per granularity
+ROLLUPS: dict[str, tuple[type[UsageHourly] | type[UsageDaily], str]] = {
+    "hourly": (UsageHourly, "hour"),
+    "daily": (UsageDaily, "day"),
+}
+
+ROLLUP_COUNTERS = ("requests", "tokens_input", "tokens_output", "tokens_total", "credits", "cost")
+
+# Rows per multi-row upsert
+UPSERT_CHUNK_SIZE = 1000
+
+# First key of the per-day advisory locks (second key: the day's ordinal)
+ROLLUP_LOCK_NAMESPACE = 7301
+
+
+def bucket_start(moment: datetime, unit: str) -> datetime:
+    """Truncate a timestamp to its naive UTC hour or day bucket."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC).replace(tzinfo=None)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if unit == "day" else moment
+
+
+def aggregate_rollups(events: list["UsageEvent"], unit: str) -> list[dict[str, Any]]:
+    """Sum events into one increment per (user, bucket, model, request type)."""
+    totals: dict[tuple, dict[str, Any]] = {}
+    for event in events:
+        key = (event.user_id, bucket_start(event.created_at, unit), event.data.model, event.data.request_type)
+        row = totals.get(key)
+        if row is None:
+            row = dict(zip(("user_id", "bucket_start", "model", "request_type"), key, strict=True))
+            row.update(dict.fromkeys(ROLLUP_COUNTERS, 0))
+            totals[key] = row
+        row["requests"] += 1
+        row["tokens_input"] += event.data.tokens_input
+        row["tokens_output"] += event.data.tokens_output
+        row["tokens_total"] += event.data.tokens_total
+        row["credits"] += event.credits
+        row["cost"] += event.data.cost
+    return list(totals.values())
+
+
+@traced()
+async def upsert_rollups(db: AsyncSession, events: list["UsageEvent"]) -> None:
+    """
+    Add a batch of usage events to the hourly and daily rollups.
+
+    Rows are upserted in key order so concurrent flushes from several
+    workers lock them in the same order. Does not commit; the days' shared
+    locks are held until the transaction ends.
+    """
+    days = sorted({bucket_start(event.created_at, "day") for event in events})
+    for day in days:
+        await _lock_day(db, day, shared=True)
+    for model, unit in ROLLUPS.values():
+        rows = sorted(
+            ({"id": uuid.uuid4(), **row} for row in aggregate_rollups(events, unit)),
+            key=lambda row: (str(row["user_id"]), row["bucket_start"], row["model"], row["request_type"].value),
+        )
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            await _upsert_rollup_rows(db, model, rows[start:start + UPSERT_CHUNK_SIZE])
+
+
+async def _lock_day(db: AsyncSession, day: datetime, shared: bool) -> None:
+    """Take a day's rollup advisory lock until the transaction ends."""
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    await db.execute(select(lock(ROLLUP_LOCK_NAMESPACE, day.toordinal())))
+
+
+async def _upsert_rollup_rows(
+    db: AsyncSession,
+    model: type[UsageHourly] | type[UsageDaily],
+    rows: list[dict[str, Any]],
+) -> None:
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint=f"uq_{model.__tablename__}_bucket",
+        set_={
+            **{
+                column: getattr(model, column) + getattr(stmt.excluded, column)
+                for column in ROLLUP_COUNTERS
+            },
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+@dataclass
+class UsageTotals:
+    """Summed usage over a time range."""
+
+    requests: int = 0
+    tokens_total: int = 0
+    credits: int = 0
+    cost: float = 0.0
+
+
+@traced()
+async def get_usage_totals(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    since: datetime | None = None,
+) -> tuple[UsageTotals, UsageTotals]:
+    """
+    Get a user's all-time usage and usage since a point in time.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        since: Start of the second range (naive UTC, day-aligned for exact results)
+
+    Returns:
+        Tuple of (all-time totals, totals since `since`)
+    """
+    recent = UsageDaily.bucket_start >= since if since is not None else literal_column("false")
+    columns = []
+    for column in ("requests", "tokens_total", "credits", "cost"):
+        field = getattr(UsageDaily, column)
+        columns.append(func.coalesce(func.sum(field), 0))
+        columns.append(func.coalesce(func.sum(field).filter(recent), 0))
+
+    row = (await db.execute(select(*columns).where(UsageDaily.user_id == user_id))).one()
+    total = UsageTotals(int(row[0]), int(row[2]), int(row[4]), float(row[6]))
+    recent_totals = UsageTotals(int(row[1]), int(row[3]), int(row[5]), float(row[7]))
+    return total, recent_totals
+
+
+@traced()
+async def get_requests_by_model(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    start: datetime,
+    end: datetime,
+) -> dict[str, int]:
+    """Get request counts per model in [start, end) (naive UTC, day-aligned)."""
+    stmt = (
+        select(UsageDaily.model, func.sum(UsageDaily.requests))
+        .where(
+            and_(
+                UsageDaily.user_id == user_id,
+                UsageDaily.bucket_start >= start,
+                UsageDaily.bucket_start < end,
+            )
+        )
+        .group_by(UsageDaily.model)
+    )
+    result = await db.execute(stmt)
+    return {model: int(requests) for model, requests in result.all()}
+
+
+def _raw_rollup_select(unit: str, start: datetime, end: datetime):
+    """Aggregate raw usage records of [start, end) into rollup rows."""
+    bucket = func.date_trunc(unit, func.timezone("UTC", UsageRecord.created_at)).label("bucket_start")
+    return (
+        select(
+            UsageRecord.user_id,
+            bucket,
+            UsageRecord.model,
+            UsageRecord.request_type,
+            func.count().label("requests"),
+            func.sum(UsageRecord.tokens_input).label("tokens_input"),
+            func.sum(UsageRecord.tokens_output).label("tokens_output"),
+            func.sum(UsageRecord.tokens_total).label("tokens_total"),
+            func.sum(UsageRecord.credits_used).label("credits"),
+            func.sum(UsageRecord.cost).label("cost"),
+        )
+        .where(
+            and_(
+                UsageRecord.created_at >= start.replace(tzinfo=UTC),
+                UsageRecord.created_at < end.replace(tzinfo=UTC),
+            )
+        )
+        .group_by(UsageRecord.user_id, bucket, UsageRecord.model, UsageRecord.request_type)
+    )
+
+
+def _days(start: date, end: date) -> list[datetime]:
+    return [datetime.combine(start + timedelta(days=i), datetime.min.time()) for i in range((end - start).days)]
+
+
+@traced()
+async def backfill_rollups(db: AsyncSession, start: date, end: date) -> int:
+    """
+    Rebuild the rollups of the days in [start, end) from raw usage records.
+
+    Each day is replaced in its own transaction, holding the day's
+    advisory lock. Safe to run while usage is being recorded: the rebuild
+    waits for flushes already adding to that day to commit, and flushes
+    that start meanwhile wait and add their increments after it commits.
+
+    Returns:
+        Number of days rebuilt
+    """
+    days = _days(start, end)
+    for day_start in days:
+        day_end = day_start + timedelta(days=1)
+        await _lock_day(db, day_start, shared=False)
+        for model, unit in ROLLUPS.values():
+            await db.execute(
+                delete(model).where(and_(model.bucket_start >= day_start, model.bucket_start < day_end))
+            )
+            raw = _raw_rollup_select(unit, day_start, day_end).subquery()
+            await db.execute(
+                insert(model).from_select(
+                    ["id", "user_id", "bucket_start", "model", "request_type", *ROLLUP_COUNTERS],
+                    select(
+                        func.gen_random_uuid(),
+                        raw.c.user_id,
+                        raw.c.bucket_start,
+                        raw.c.model,
+                        raw.c.request_type,
+                        *(raw.c[column] for column in ROLLUP_COUNTERS),
+                    ),
+                )
+            )
+        await db.commit()
+        logger.info(f"Rebuilt usage rollups for {day_start.date()}")
+    return len(days)
+
+
+@dataclass
+class RollupMismatch:
+    """A rollup row that does not match the raw usage records."""
+
+    granularity: str
+    user_id: uuid.UUID
+    bucket_start: datetime
+    model: str
+    request_type: str
+    raw: dict[str, float]
+    rollup: dict[str, float]
+
+
+@traced()
+async def check_rollups(db: AsyncSession, start: date, end: date) -> list[RollupMismatch]:
+    """
+    Compare the rollups of the days in [start, end) with the raw usage records.
+
+    Returns:
+        One RollupMismatch per bucket whose totals differ or exist on one side only
+    """
+    start_at = datetime.combine(start, datetime.min.time())
+    end_at = datetime.combine(end, datetime.min.time())
+    mismatches = []
+
+    for granularity, (model, unit) in ROLLUPS.items():
+        raw_rows = (await db.execute(_raw_rollup_select(unit, start_at, end_at))).all()
+        rollup_rows = (
+            await db.execute(
+                select(
+                    model.user_id,
+                    model.bucket_start,
+                    model.model,
+                    model.request_type,
+                    *(getattr(model, column) for column in ROLLUP_COUNTERS),
+                ).where(and_(model.bucket_start >= start_at, model.bucket_start < end_at))
+            )
+        ).all()
+
+        def by_key(rows) -> dict[tuple, dict[str, float]]:
+            return {
+                tuple(row[:4]): {column: float(row[4 + i] or 0) for i, column in enumerate(ROLLUP_COUNTERS)}
+                for row in rows
+            }
+
+        raw, rollup = by_key(raw_rows), by_key(rollup_rows)
+        empty = dict.fromkeys(ROLLUP_COUNTERS, 0.0)
+        for key in raw.keys() | rollup.keys():
+            raw_totals, rollup_totals = raw.get(key, empty), rollup.get(key, empty)
+            if any(abs(raw_totals[c] - rollup_totals[c]) > 1e-6 for c in ROLLUP_COUNTERS):
+                user_id, bucket, model_name, request_type = key
+                mismatches.append(
+                    RollupMismatch(
+                        granularity=granularity,
+                        user_id=user_id,
+                        bucket_start=bucket,
+                        model=model_name,
+                        request_type=getattr(request_type, "value", str(request_type)),
+                        raw=raw_totals,
+                        rollup=rollup_totals,
+                    )
+                )
+
+    return sorted(mismatches, key=lambda m: (m.bucket_start, m.granularity, str(m.user_id)))
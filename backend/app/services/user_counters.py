@@ -0,0 +1,222 @@
+"""Per-user counters behind /profile/stats.
+
+Database triggers keep `user_counters` current as conversations,
+documents, agents and messages are inserted or deleted (including
+cascaded deletes), so the stats endpoint reads one row instead of running
+four COUNT queries.
+
+Triggers cannot drift on their own, but a missed migration, a manual
+fix-up or a trigger disabled for a bulk load can leave counters off. The
+reconciler recounts every user in batches once per
+`settings.user_counters_reconcile_interval_seconds`; a Redis lock makes
+one worker do the pass.
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.redis import get_redis
+from app.core.telemetry import traced
+from app.models.agent import Agent
+from app.models.conversation import Conversation
+from app.models.document import Document
+from app.models.message import Message
+from app.models.user import User
+from app.models.user_counters import UserCounters
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_LOCK_KEY = "user_counters:reconcile"
+
+
+def _live_counts() -> dict:
+    """Correlated COUNT subqueries for each counter of the UserCounters row."""
+    return {
+        "conversations_count": select(func.count(Conversation.id))
+        .where(Conversation.user_id == UserCounters.user_id)
+        .scalar_subquery(),
+        "documents_count": select(func.count(Document.id))
+        .where(Document.user_id == UserCounters.user_id)
+        .scalar_subquery(),
+        "agents_count": select(func.count(Agent.id))
+        .where(Agent.user_id == UserCounters.user_id)
+        .scalar_subquery(),
+        "messages_count": select(func.count(Message.id))
+        .join(Conversation, Message.conversation_id == Conversation.id)
+        .where(Conversation.user_id == UserCounters.user_id)
+        .scalar_subquery(),
+    }
+
+
+@traced()
+async def reconcile_user_counters(db: AsyncSession, user_ids: list[uuid.UUID]) -> int:
+    """
+    Recount the counters of the given users, creating missing rows.
+
+    The rows are locked before counting, so a concurrent insert either
+    commits before the recount (and is counted) or bumps the counter after
+    it. Does not commit.
+
+    Returns:
+        Number of users whose counters were wrong
+    """
+    if not user_ids:
+        return 0
+
+    await db.execute(
+        insert(UserCounters)
+        .from_select(
+            ["user_id", "conversations_count", "documents_count", "agents_count", "messages_count"],
+            select(User.id, literal(0), literal(0), literal(0), literal(0)).where(User.id.in_(user_ids)),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    await db.execute(
+        select(UserCounters.user_id)
+        .where(UserCounters.user_id.in_(user_ids))
+        .order_by(UserCounters.user_id)
+        .with_for_update()
+    )
+
+    counts = _live_counts()
+    drifted = await db.execute(
+        update(UserCounters)
+        .where(
+            UserCounters.user_id.in_(user_ids),
+            or_(*(getattr(UserCounters, column) != count for column, count in counts.items())),
+        )
+        .values(**counts, updated_at=func.now())
+        .returning(UserCounters.user_id)
+    )
+    drifted_ids = list(drifted.scalars().all())
+    await db.execute(
+        update(UserCounters).where(UserCounters.user_id.in_(user_ids)).values(reconciled_at=func.now())
+    )
+    if drifted_ids:
+        logger.warning(f"Corrected profile counters of {len(drifted_ids)} users: {drifted_ids[:10]}")
+    return len(drifted_ids)
+
+
+@traced()
+async def get_user_counters(db: AsyncSession, user_id: uuid.UUID) -> UserCounters:
+    """
+    Get a user's profile counters (one primary key lookup).
+
+    Users without a counters row get one, counted from scratch.
+    """
+    counters = await db.get(UserCounters, user_id)
+    if counters is None:
+        await reconcile_user_counters(db, [user_id])
+        counters = await db.get(UserCounters, user_id, populate_existing=True)
+    return counters
+
+
+class UserCountersReconciler:
+    """Background task that periodically recounts all users' counters."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self.passes = 0
+        self.skipped = 0
+        self.checked = 0
+        self.corrected = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start the reconcile loop (no-op if disabled or running)."""
+        if not settings.user_counters_reconcile_enabled or self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="user-counters-reconciler")
+        logger.info("Started user counters reconciler")
+
+    async def stop(self) -> None:
+        """Cancel the reconcile loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        """Reconcile loop."""
+        while True:
+            await asyncio.sleep(settings.user_counters_reconcile_interval_seconds)
+            try:
+                if await self._acquire_pass():
+                    await self.run_once()
+                else:
+                    self.skipped += 1
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"User counters reconcile failed: {e}")
+
+    async def _acquire_pass(self) -> bool:
+        """Claim this interval's pass, so one worker reconciles at a time."""
+        try:
+            return bool(
+                await get_redis().set(
+                    RECONCILE_LOCK_KEY,
+                    1,
+                    nx=True,
+                    ex=max(1, settings.user_counters_reconcile_interval_seconds - 1),
+                )
+            )
+        except RedisError as e:
+            # Reconciling is idempotent; doing it on every worker is only wasteful
+            logger.warning(f"Could not take user counters reconcile lock: {e}")
+            return True
+
+    async def run_once(self) -> int:
+        """
+        Reconcile every user, one batch per transaction.
+
+        Returns:
+            Number of users whose counters were corrected
+        """
+        from app.core.database import SessionLocal
+
+        corrected = 0
+        last_id: uuid.UUID | None = None
+        while True:
+            async with SessionLocal() as db:
+                stmt = select(User.id).order_by(User.id).limit(settings.user_counters_reconcile_batch_size)
+                if last_id is not None:
+                    stmt = stmt.where(User.id > last_id)
+                user_ids = list((await db.execute(stmt)).scalars().all())
+                if not user_ids:
+                    break
+                corrected += await reconcile_user_counters(db, user_ids)
+                await db.commit()
+            self.checked += len(user_ids)
+            last_id = user_ids[-1]
+
+        self.passes += 1
+        self.corrected += corrected
+        return corrected
+
+    def stats(self) -> dict[str, int]:
+        """Get reconcile metrics."""
+        return {
+            "passes": self.passes,
+            "skipped": self.skipped,
+            "checked": self.checked,
+            "corrected": self.corrected,
+            "failures": self.failures,
+        }
+
+
+# Singleton instance
+user_counters_reconciler = UserCountersReconciler()
@@ -0,0 +1,142 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.agents import definitions as definitions_module
+from app.agents.definitions import TOOL_MODE_PROMPT, AgentDefinitionCache
+from app.agents.engine import AgentEngine
+from app.config import settings
+from app.services import agent as agent_service
+from app.services.agent_loader import agent_loader
+
+AGENT_YAML = """
+agent:
+  name: "Cache Test"
+  slug: "cache-test"
+persona:
+  system_prompt: "{prompt}"
+tools:
+  - calculator
+settings:
+  temperature: 0.2
+"""
+
+
+@pytest.fixture
+def agent_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_loader, "_config_dir", tmp_path)
+    monkeypatch.setattr(settings, "agent_config_check_interval_seconds", 0)
+    agent_loader.clear_cache()
+    yield tmp_path
+    agent_loader.clear_cache()
+
+
+def write_agent(directory, prompt: str, mtime_ns: int) -> None:
+    path = directory / "cache-test.yaml"
+    path.write_text(AGENT_YAML.format(prompt=prompt))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_definition_is_cached_until_yaml_changes(agent_dir):
+    """Test repeated lookups reuse one compiled definition and a file edit recompiles it."""
+    cache = AgentDefinitionCache()
+    write_agent(agent_dir, "Version one.", mtime_ns=1_000_000_000)
+
+    first = cache.get_system("cache-test")
+    assert cache.get_system("cache-test") is first
+    assert first.system_prompts[TOOL_MODE_PROMPT].startswith("Version one.")
+    assert "<tool>" in first.system_prompts[TOOL_MODE_PROMPT]
+
+    write_agent(agent_dir, "Version two.", mtime_ns=2_000_000_000)
+    second = cache.get_system("cache-test")
+
+    assert second.persona_prompt == "Version two."
+    assert cache.stats()["compiles"] == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_engine_does_not_mutate_shared_definition(agent_dir):
+    """Test per-request engine changes never reach the cached definition."""
+    cache = AgentDefinitionCache()
+    write_agent(agent_dir, "Prompt.", mtime_ns=1_000_000_000)
+    definition = cache.get_system("cache-test")
+
+    engine = AgentEngine("cache-test", definition=definition)
+    engine.settings["temperature"] = 1.5
+    engine.tools.clear()
+
+    assert definition.settings["temperature"] == 0.2
+    assert definition.tool_names == ("calculator",)
+    with pytest.raises(TypeError):
+        definition.settings["temperature"] = 1.0
+
+
+def test_loader_hot_reloads_changed_and_new_files(agent_dir):
+    """Test edits and new files are picked up without a restart, and bad YAML keeps the last version."""
+    write_agent(agent_dir, "Before.", mtime_ns=1_000_000_000)
+    assert agent_loader.load_agent("cache-test")["persona"]["system_prompt"] == "Before."
+
+    write_agent(agent_dir, "After.", mtime_ns=2_000_000_000)
+    (agent_dir / "other.yaml").write_text('agent:\n  name: "Other"\n  slug: "other"\n')
+
+    assert agent_loader.load_agent("cache-test")["persona"]["system_prompt"] == "After."
+    assert [a["slug"] for a in agent_loader.list_agents()] == ["cache-test", "other"]
+
+    path = agent_dir / "cache-test.yaml"
+    path.write_text("persona: [unclosed")
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+
+    assert agent_loader.load_agent("cache-test")["persona"]["system_prompt"] == "After."
+
+
+def test_loader_returns_copies(agent_dir):
+    """Test callers cannot modify the loader's parsed configs."""
+    write_agent(agent_dir, "Prompt.", mtime_ns=1_000_000_000)
+
+    agent_loader.load_agent("cache-test")["settings"]["temperature"] = 9
+
+    assert agent_loader.load_agent("cache-test")["settings"]["temperature"] == 0.2
+
+
+async def test_user_lookups_are_bounded(agent_dir, monkeypatch):
+    """Test (slug, user) lookups, including misses, are evicted least recently used first."""
+    async def get_agent_by_slug(db, slug, user_id):
+        return None
+
+    monkeypatch.setattr(agent_service, "get_agent_by_slug", get_agent_by_slug)
+    monkeypatch.setattr(settings, "agent_cache_max_user_entries", 2)
+    cache = AgentDefinitionCache()
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    await cache.get(None, "cache-test", first)
+    await cache.get(None, "cache-test", second)
+    await cache.get(None, "cache-test", first)
+    await cache.get(None, "cache-test", third)
+
+    assert cache.stats()["user_entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    await cache.get(None, "cache-test", first)
+    assert cache.stats()["hits"] == 2
+
+
+async def test_user_lookup_invalidated_again_after_commit(agent_dir, monkeypatch):
+    """Test a lookup re-cached before the change commits is dropped on commit."""
+    async def get_agent_by_slug(db, slug, user_id):
+        return None
+
+    monkeypatch.setattr(agent_service, "get_agent_by_slug", get_agent_by_slug)
+    cache = AgentDefinitionCache()
+    monkeypatch.setattr(definitions_module, "agent_definitions", cache)
+    user_id = uuid.uuid4()
+    db = AsyncSession()
+
+    cache.invalidate_slug("cache-test", db)
+    # A concurrent request reads the old committed row
+    await cache.get(None, "cache-test", user_id)
+
+    definitions_module._invalidate_after_commit(db.sync_session)
+
+    assert cache.stats()["user_entries"] == 0
+    assert definitions_module.PENDING_INVALIDATIONS not in db.sync_session.info
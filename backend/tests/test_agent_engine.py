@@ -0,0 +1,320 @@
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+import httpx
+import pytest
+
+from app.agents import engine as engine_module
+from app.agents.engine import (
+    TOOL_MODE_NATIVE,
+    TOOL_MODE_PROMPT,
+    AgentEngine,
+    ToolCall,
+    ToolTagStreamParser,
+)
+from app.agents.tools.base import BaseTool, ToolResult
+from app.providers.llm import (
+    ChatCompletionResponse,
+    ChatMessage,
+    StreamStats,
+    ToolCallRequest,
+)
+
+
+class ScriptedLLM:
+    """Returns canned responses and records every request."""
+
+    def __init__(
+        self,
+        responses: list[ChatCompletionResponse | Exception] | None = None,
+        streams: list[list[str | dict]] | None = None,
+    ) -> None:
+        self.responses = responses or []
+        self.streams = streams or []
+        self.calls: list[dict] = []
+        self.stream_calls: list[dict] = []
+
+    async def chat_completion(self, messages: list[ChatMessage], **kwargs) -> ChatCompletionResponse:
+        self.calls.append({"messages": list(messages), **kwargs})
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def chat_completion_stream(
+        self,
+        messages: list[ChatMessage],
+        stats: StreamStats | None = None,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """Yield a scripted turn: strings are content, dicts are tool-call deltas or usage."""
+        self.stream_calls.append({"messages": list(messages), **kwargs})
+        for item in self.streams.pop(0):
+            if isinstance(item, dict) and "usage" in item:
+                stats.usage = item["usage"]
+            elif isinstance(item, dict):
+                stats.add_tool_call_deltas([item])
+            else:
+                yield item
+
+
+class SleepTool(BaseTool):
+    """Sleeps for the requested time, then echoes it."""
+
+    name = "sleep"
+    description = "Sleep"
+    timeout_seconds = 0.5
+
+    async def execute(self, seconds: float, **kwargs) -> ToolResult:
+        await asyncio.sleep(seconds)
+        return ToolResult(success=True, data=seconds)
+
+
+def make_engine(tool_mode: str = TOOL_MODE_NATIVE) -> AgentEngine:
+    return AgentEngine(
+        agent_slug="test-agent",
+        system_prompt="You are a test agent.",
+        tools_list=["calculator"],
+        config={"tool_mode": tool_mode},
+    )
+
+
+@pytest.mark.asyncio
+async def test_native_mode_sends_tool_results_as_tool_messages(monkeypatch):
+    """Test native tool calls are executed and answered with role=tool messages."""
+    llm = ScriptedLLM([
+        ChatCompletionResponse(
+            content="",
+            role="assistant",
+            model="test",
+            tool_calls=[ToolCallRequest(id="call_1", name="calculator", arguments='{"expression": "2 + 3"}')],
+        ),
+        ChatCompletionResponse(content="The answer is 5.", role="assistant", model="test"),
+    ])
+    monkeypatch.setattr(engine_module, "llm_client", llm)
+
+    response = await make_engine().process([ChatMessage(role="user", content="2 + 3?")])
+
+    assert response.content == "The answer is 5."
+    assert response.tools_used == ["calculator"]
+    assert llm.calls[0]["tools"][0]["function"]["name"] == "calculator"
+    assert "<tool>" not in llm.calls[0]["messages"][0].content
+
+    assistant, tool_message = llm.calls[1]["messages"][-2:]
+    assert assistant.tool_calls[0].id == "call_1"
+    assert tool_message.role == "tool"
+    assert tool_message.tool_call_id == "call_1"
+    assert "data" in json.loads(tool_message.content)
+
+
+@pytest.mark.asyncio
+async def test_native_mode_falls_back_to_prompt_mode(monkeypatch):
+    """Test a model rejecting `tools` is retried with <tool> tag instructions."""
+    request = httpx.Request("POST", "http://llm/chat/completions")
+    rejected = httpx.HTTPStatusError(
+        "tools not supported", request=request, response=httpx.Response(400, request=request)
+    )
+    llm = ScriptedLLM([
+        rejected,
+        ChatCompletionResponse(content="Hello!", role="assistant", model="test"),
+    ])
+    monkeypatch.setattr(engine_module, "llm_client", llm)
+    agent = make_engine()
+
+    response = await agent.process([ChatMessage(role="user", content="Hi")])
+
+    assert response.content == "Hello!"
+    assert agent.tool_mode == TOOL_MODE_PROMPT
+    assert "tools" not in llm.calls[1]
+    assert "<tool>" in llm.calls[1]["messages"][0].content
+
+
+def test_stream_stats_assembles_tool_call_deltas():
+    """Test streamed tool-call fragments are merged by index."""
+    stats = StreamStats()
+    stats.add_tool_call_deltas([
+        {"index": 0, "id": "call_1", "function": {"name": "calculator", "arguments": '{"expr'}},
+    ])
+    stats.add_tool_call_deltas([{"index": 0, "function": {"arguments": 'ession": "1+1"}'}}])
+
+    assert stats.tool_calls == [
+        ToolCallRequest(id="call_1", name="calculator", arguments='{"expression": "1+1"}'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_runs_tools_concurrently_in_completion_order():
+    """Test independent tool calls overlap and results stream as they finish."""
+    agent = make_engine()
+    agent.tools["sleep"] = SleepTool()
+    calls = [ToolCall(name="sleep", params={"seconds": s}, id=str(s)) for s in (0.3, 0.1, 0.2)]
+
+    started = time.perf_counter()
+    order = [index async for index, _ in agent._execute_tools(calls)]
+    elapsed = time.perf_counter() - started
+
+    assert order == [1, 2, 0]
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_mid_turn_cancels_running_tools(monkeypatch):
+    """Test tool tasks still running when the consumer stops are cancelled."""
+    agent = make_engine()
+    agent.tools["sleep"] = SleepTool()
+    cancelled: list[float] = []
+
+    async def execute_tool(tool_call, **kwargs):
+        seconds = tool_call.params["seconds"]
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            cancelled.append(seconds)
+            raise
+        return {"success": True, "data": seconds}
+
+    monkeypatch.setattr(agent, "_execute_tool", execute_tool)
+    llm = ScriptedLLM(streams=[[
+        {"index": 0, "id": "a", "function": {"name": "sleep", "arguments": '{"seconds": 0.01}'}},
+        {"index": 1, "id": "b", "function": {"name": "sleep", "arguments": '{"seconds": 30}'}},
+    ]])
+    monkeypatch.setattr(engine_module, "llm_client", llm)
+
+    async with aclosing(agent.process_stream([ChatMessage(role="user", content="hi")])) as events:
+        async for event in events:
+            if event["type"] == "tool_result":
+                break  # e.g. the client disconnected
+
+    assert cancelled == [30]
+
+
+@pytest.mark.asyncio
+async def test_tool_timeout_returns_error_result():
+    """Test a tool exceeding its timeout yields an error instead of hanging."""
+    agent = make_engine()
+    agent.tools["sleep"] = SleepTool()
+
+    result = await agent._execute_tool(ToolCall(name="sleep", params={"seconds": 5}))
+
+    assert result["success"] is False
+    assert "timed out" in result["error"]
+
+
+async def collect_events(agent: AgentEngine) -> list[dict]:
+    return [event async for event in agent.process_stream([ChatMessage(role="user", content="2 + 3?")])]
+
+
+@pytest.mark.asyncio
+async def test_stream_prompt_mode_makes_one_call_per_turn(monkeypatch):
+    """Test <tool> tags split across chunks are parsed from the single streamed turn."""
+    llm = ScriptedLLM(streams=[
+        ["Let me check. <to", 'ol>{"name": "calculator", ', '"params": {"expression": "2 + 3"}}</tool>'],
+        ["The answer", " is 5."],
+    ])
+    monkeypatch.setattr(engine_module, "llm_client", llm)
+
+    events = await collect_events(make_engine(TOOL_MODE_PROMPT))
+
+    assert llm.calls == []
+    assert len(llm.stream_calls) == 2
+    content = "".join(e["content"] for e in events if e["type"] == "content")
+    assert content == "Let me check. The answer is 5."
+    results = [e for e in events if e["type"] == "tool_result"]
+    assert results[0]["result"]["success"] is True
+    assert events[-1]["type"] == "done"
+    assert events[-1]["tools_used"] == ["calculator"]
+
+
+@pytest.mark.asyncio
+async def test_stream_native_mode_makes_one_call_per_turn(monkeypatch):
+    """Test streamed tool-call deltas trigger tools without a second request."""
+    llm = ScriptedLLM(streams=[
+        [
+            {"index": 0, "id": "call_1", "function": {"name": "calculator", "arguments": '{"expression": '}},
+            {"index": 0, "function": {"arguments": '"2 + 3"}'}},
+            {"usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}},
+        ],
+        ["5", {"usage": {"prompt_tokens": 20, "completion_tokens": 1, "total_tokens": 21}}],
+    ])
+    monkeypatch.setattr(engine_module, "llm_client", llm)
+
+    events = await collect_events(make_engine(TOOL_MODE_NATIVE))
+
+    assert llm.calls == []
+    assert len(llm.stream_calls) == 2
+    assert llm.stream_calls[1]["messages"][-1].tool_call_id == "call_1"
+    assert [e["type"] for e in events] == ["thinking", "tool_call", "tool_result", "content", "done"]
+    assert events[-1]["usage"] == {"prompt_tokens": 30, "completion_tokens": 6, "total_tokens": 36}
+
+
+def test_tool_tag_parser_only_holds_back_possible_tags():
+    """Test plain text is forwarded immediately and a stray '<' is released."""
+    parser = ToolTagStreamParser()
+
+    assert parser.feed("a < b and <t") == "a < b and "
+    assert parser.feed("able>") == "<table>"
+    assert parser.feed("x <tool>{}") == "x "
+    assert parser.flush() == "<tool>{}"
+
+
+def calculator_call(call_id: str, expression: str) -> ToolCallRequest:
+    return ToolCallRequest(id=call_id, name="calculator", arguments=json.dumps({"expression": expression}))
+
+
+@pytest.mark.asyncio
+async def test_tool_call_budget_forces_final_answer(monkeypatch):
+    """Test calls over the tool budget are refused and the model is asked to answer without tools."""
+    llm = ScriptedLLM([
+        ChatCompletionResponse(
+            content="",
+            role="assistant",
+            model="test",
+            tool_calls=[calculator_call("call_1", "1 + 1"), calculator_call("call_2", "2 + 2")],
+        ),
+        ChatCompletionResponse(content="1 + 1 is 2.", role="assistant", model="test"),
+    ])
+    monkeypatch.setattr(engine_module, "llm_client", llm)
+    agent = AgentEngine(
+        agent_slug="test-agent",
+        system_prompt="You are a test agent.",
+        tools_list=["calculator"],
+        config={"tool_mode": TOOL_MODE_NATIVE, "max_tool_calls": 1},
+    )
+
+    response = await agent.process([ChatMessage(role="user", content="1 + 1 and 2 + 2?")])
+
+    assert response.content == "1 + 1 is 2."
+    tool_messages = [m for m in llm.calls[1]["messages"] if m.role == "tool"]
+    assert "data" in json.loads(tool_messages[0].content)
+    assert "limit" in json.loads(tool_messages[1].content)["error"]
+    assert llm.calls[1]["tool_choice"] == "none"
+    assert response.budget["exhausted"] == "tool_calls"
+    assert response.budget["tool_calls"] == 1
+    assert [span["final"] for span in response.budget["iterations"]] == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_exhausted_token_budget_answers_without_another_call(monkeypatch):
+    """Test the engine stops calling the LLM once the token budget cannot cover a prompt."""
+    llm = ScriptedLLM(streams=[[
+        {"index": 0, "id": "call_1", "function": {"name": "calculator", "arguments": '{"expression": "1+1"}'}},
+        {"usage": {"prompt_tokens": 90, "completion_tokens": 5, "total_tokens": 95}},
+    ]])
+    monkeypatch.setattr(engine_module, "llm_client", llm)
+    agent = AgentEngine(
+        agent_slug="test-agent",
+        system_prompt="You are a test agent.",
+        tools_list=["calculator"],
+        config={"tool_mode": TOOL_MODE_NATIVE, "max_total_tokens": 100},
+    )
+
+    events = [event async for event in agent.process_stream([ChatMessage(role="user", content="1 + 1?")])]
+
+    assert len(llm.stream_calls) == 1
+    assert [e["type"] for e in events] == ["thinking", "tool_call", "tool_result", "content", "done"]
+    assert events[-2]["content"] == engine_module.BUDGET_EXHAUSTED_MESSAGE
+    assert events[-1]["budget"]["exhausted"] == "tokens"
+    assert events[-1]["budget"]["tokens_used"] == 95
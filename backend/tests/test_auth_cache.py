@@ -0,0 +1,81 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.dependencies import get_current_user
+from app.core.exceptions import InvalidCredentialsError
+from app.services import auth_cache as auth_cache_module
+from app.services.auth_cache import AuthUser, AuthUserCache, invalidate_auth_user
+
+
+def make_user(user_id: uuid.UUID, is_active: bool = True) -> AuthUser:
+    return AuthUser(id=user_id, is_active=is_active, is_superuser=False, tier="free", plan_id=None)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Fresh local-only cache; `fetched` counts database reads."""
+    cache = AuthUserCache()
+    monkeypatch.setattr(settings, "auth_cache_redis_enabled", False)
+    monkeypatch.setattr(settings, "auth_cache_local_ttl_seconds", 60.0)
+    monkeypatch.setattr(auth_cache_module, "auth_user_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def users(monkeypatch):
+    """Users in the fake database and the IDs fetched from it."""
+    state = {"users": {}, "fetched": []}
+
+    async def fetch(db, user_id):
+        state["fetched"].append(user_id)
+        return state["users"].get(user_id)
+
+    monkeypatch.setattr(auth_cache_module, "fetch_auth_user", fetch)
+    return state
+
+
+async def test_current_user_served_from_cache(cache, users):
+    """Test repeated requests read the user from the database once."""
+    user_id = uuid.uuid4()
+    users["users"][user_id] = make_user(user_id)
+
+    for _ in range(3):
+        user = await get_current_user(user_id=user_id, db=None)
+        assert user.id == user_id
+
+    assert users["fetched"] == [user_id]
+    assert cache.stats()["hits"] == 2
+
+
+async def test_suspended_user_rejected_after_invalidation(cache, users):
+    """Test a suspension takes effect once the entry is invalidated."""
+    user_id = uuid.uuid4()
+    users["users"][user_id] = make_user(user_id)
+    await get_current_user(user_id=user_id, db=None)
+
+    users["users"][user_id] = make_user(user_id, is_active=False)
+    db = AsyncSession()
+    await invalidate_auth_user(db, user_id)
+
+    with pytest.raises(InvalidCredentialsError):
+        await get_current_user(user_id=user_id, db=None)
+
+
+async def test_invalidated_again_after_commit(cache, users):
+    """Test an entry re-read before the commit is dropped when the session commits."""
+    user_id = uuid.uuid4()
+    db = AsyncSession()
+    await invalidate_auth_user(db, user_id)
+
+    # A concurrent request caches the pre-commit row
+    await cache.set(make_user(user_id))
+
+    auth_cache_module._invalidate_after_commit(db.sync_session)
+    await asyncio.sleep(0)
+
+    assert await cache.get(user_id) is None
+    assert auth_cache_module.PENDING_INVALIDATIONS not in db.sync_session.info
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from app.agents.tools import calculator as calculator_module
+from app.agents.tools.calculator import (
+    calculator_tool,
+    compile_expression,
+    evaluate_batch,
+    safe_eval,
+)
+from app.config import settings
+
+
+def test_expressions_are_compiled_once():
+    """Test repeated evaluations reuse the cached compiled expression."""
+    compile_expression.cache_clear()
+
+    assert safe_eval("2 * x + 1", {"x": 3}) == 7
+    assert safe_eval("2 * x + 1", {"x": 4}) == 9
+
+    info = compile_expression.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "9**9**9",
+        "2**100000",
+        "10**300 * 10**300",
+        "-" * 40 + "1",
+        " + ".join(["1"] * 150),
+        "().__class__",
+        "__import__('os')",
+        "sum([1] * 10**7)",
+        "max([0] * 10**9)",
+        "sum(10**8 * (1, 2))",
+    ],
+)
+def test_pathological_expressions_are_rejected_quickly(expression):
+    """Test expressions over the limits fail fast instead of computing."""
+    start = time.perf_counter()
+
+    with pytest.raises(ValueError):
+        safe_eval(expression)
+
+    assert time.perf_counter() - start < 0.5
+
+
+def test_vectorized_evaluation_broadcasts_scalars():
+    """Test list variables are evaluated element-wise with scalars broadcast."""
+    assert evaluate_batch("x * rate + fee", {"x": [100, 200, 300], "rate": 0.5, "fee": 1}) == [51.0, 101.0, 151.0]
+
+    with pytest.raises(ValueError):
+        evaluate_batch("x + y", {"x": [1, 2], "y": [1, 2, 3]})
+
+
+async def test_tool_evaluates_batches_and_reports_errors_inline():
+    """Test several expressions in one call, each with its own result or error."""
+    result = await calculator_tool.execute(expressions=["sqrt(16)", "1/0"])
+
+    assert result.success
+    assert result.data[0] == {"expression": "sqrt(16)", "result": 4.0}
+    assert result.data[1]["error"] == "Division by zero"
+
+
+async def test_tool_times_out_slow_evaluations(monkeypatch):
+    """Test a slow evaluation returns an error instead of blocking."""
+    monkeypatch.setattr(settings, "calculator_timeout_seconds", 0.05)
+
+    def slow_eval(expression, variables=None):
+        time.sleep(0.5)
+        return 1
+
+    monkeypatch.setattr(calculator_module, "safe_eval", slow_eval)
+
+    result = await calculator_tool.execute(expression="1 + 1")
+
+    assert not result.success
+    assert "timed out" in result.error
@@ -0,0 +1,144 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes import chat as chat_module
+from app.schemas.chat import ChatRequest
+from app.services import conversation as conversation_service
+from app.services import stream_replay
+from app.services.auth_cache import AuthUser
+from app.services.credits import CreditReservation
+
+
+class FakeRequest:
+    headers: dict[str, str] = {}
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.fail_commit = False
+
+    async def commit(self) -> None:
+        if self.fail_commit:
+            raise ConnectionError("database unavailable")
+
+
+class FakeReplayStore:
+    def __init__(self) -> None:
+        self.frames: list[str] = []
+
+    async def create(self, stream_id: str, user_id: str) -> None:
+        pass
+
+    async def append(self, stream_id: str, frame: str) -> int:
+        self.frames.append(frame)
+        return len(self.frames)
+
+    async def finish(self, stream_id: str) -> None:
+        pass
+
+
+class FakeCreditAccounting:
+    def __init__(self) -> None:
+        self.released: list[CreditReservation] = []
+
+    async def release(self, reservation: CreditReservation) -> None:
+        self.released.append(reservation)
+
+
+@pytest.fixture
+def agent_stream(monkeypatch):
+    """Stub the agent stream route's collaborators; producers are captured, not started."""
+    user = AuthUser(id=uuid.uuid4(), is_active=True, is_superuser=False, tier="free", plan_id=None)
+    state = {
+        "user": user,
+        "db": FakeSession(),
+        "engine": None,
+        "reservations": [],
+        "producers": [],
+        "store": FakeReplayStore(),
+        "credits": FakeCreditAccounting(),
+        "saved": [],
+    }
+
+    async def get_agent_engine(db, agent_slug, user_id):
+        return state["engine"], None
+
+    async def get_or_create_conversation(db, user_id, conversation_id):
+        if conversation_id is not None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        return uuid.uuid4()
+
+    async def add_message(**kwargs):
+        pass
+
+    async def build_messages_from_history(**kwargs):
+        return []
+
+    async def reserve_quota(db, user_id, amount):
+        reservation = CreditReservation(user_id, "2026-10", amount, uuid.uuid4().hex)
+        state["reservations"].append(reservation)
+        return reservation, None
+
+    async def save_stream_response(**kwargs):
+        state["saved"].append(kwargs)
+
+    monkeypatch.setattr(chat_module, "get_agent_engine", get_agent_engine)
+    monkeypatch.setattr(chat_module, "get_or_create_conversation", get_or_create_conversation)
+    monkeypatch.setattr(conversation_service, "add_message", add_message)
+    monkeypatch.setattr(chat_module, "build_messages_from_history", build_messages_from_history)
+    monkeypatch.setattr(chat_module, "reserve_quota", reserve_quota)
+    monkeypatch.setattr(chat_module, "save_stream_response", save_stream_response)
+    monkeypatch.setattr(chat_module, "credit_accounting", state["credits"])
+    monkeypatch.setattr(stream_replay, "get_replay_store", lambda: state["store"])
+    monkeypatch.setattr(stream_replay, "start_producer", lambda stream_id, coro: state["producers"].append(coro))
+    return state
+
+
+async def test_agent_stream_unknown_conversation_reserves_nothing(agent_stream):
+    """Test a request for a foreign conversation fails before credits are reserved."""
+    data = ChatRequest(message="Hi", agent_slug="assistant", conversation_id=uuid.uuid4())
+
+    with pytest.raises(HTTPException):
+        await chat_module.chat_agent_stream(FakeRequest(), data, agent_stream["user"], agent_stream["db"])
+
+    assert agent_stream["reservations"] == []
+
+
+async def test_agent_stream_releases_credits_when_setup_fails(agent_stream):
+    """Test the reservation is released if the stream cannot be started."""
+    agent_stream["db"].fail_commit = True
+    data = ChatRequest(message="Hi", agent_slug="assistant")
+
+    with pytest.raises(ConnectionError):
+        await chat_module.chat_agent_stream(FakeRequest(), data, agent_stream["user"], agent_stream["db"])
+
+    assert agent_stream["credits"].released == agent_stream["reservations"]
+    assert agent_stream["producers"] == []
+
+
+class TwoTurnEngine:
+    """Calls a tool after some preamble text, then answers."""
+
+    async def process_stream(self, messages, db=None, user_id=None):
+        yield {"type": "content", "content": "Let me ", "done": False}
+        yield {"type": "content", "content": "check.", "done": False}
+        yield {"type": "thinking", "content": "Processing with 1 tool(s)..."}
+        yield {"type": "tool_call", "name": "calculator", "params": {"expression": "2+2"}}
+        yield {"type": "tool_result", "name": "calculator", "result": {"result": 4}}
+        yield {"type": "content", "content": "It is ", "done": False}
+        yield {"type": "content", "content": "4.", "done": False}
+        yield {"type": "done", "tools_used": ["calculator"], "sources": [], "model": "gpt-4o-mini", "usage": None}
+
+
+async def test_agent_stream_saves_only_the_final_answer(agent_stream):
+    """Test text streamed before a tool call is shown but not saved, as /chat saves only the answer."""
+    agent_stream["engine"] = TwoTurnEngine()
+    data = ChatRequest(message="What is 2+2?", agent_slug="assistant")
+
+    await chat_module.chat_agent_stream(FakeRequest(), data, agent_stream["user"], agent_stream["db"])
+    await agent_stream["producers"][0]
+
+    assert [saved["content"] for saved in agent_stream["saved"]] == ["It is 4."]
+    assert any("check." in frame for frame in agent_stream["store"].frames)
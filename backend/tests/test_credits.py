@@ -0,0 +1,127 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services import credits as credits_module
+from app.services import quota as quota_module
+from app.services.credits import CreditAccounting, MemoryCreditLedger
+from app.services.quota import QuotaSnapshot
+
+PERIOD = "2026-10"
+
+
+@pytest.fixture
+def accounting(monkeypatch):
+    monkeypatch.setattr(settings, "credit_ledger_backend", "memory")
+    accounting = CreditAccounting()
+    monkeypatch.setattr(quota_module, "credit_accounting", accounting)
+    return accounting
+
+
+async def test_reservations_count_against_limit(accounting):
+    """Test outstanding reservations are included until settled."""
+    user_id = uuid.uuid4()
+
+    first = await accounting.reserve(user_id, PERIOD, 4, limit=10, used=2)
+    second = await accounting.reserve(user_id, PERIOD, 4, limit=10, used=2)
+    assert first.reservation and second.reservation
+
+    refused = await accounting.reserve(user_id, PERIOD, 4, limit=10, used=2)
+    assert refused.reservation is None
+    assert refused.available(10) == 0
+
+    # Settled for less than reserved: the difference is available again
+    await accounting.commit(first.reservation, 1)
+    await accounting.release(second.reservation)
+    result = await accounting.reserve(user_id, PERIOD, 7, limit=10, used=2)
+    assert result.reservation is not None
+    assert result.used == 3
+
+
+async def test_commit_is_idempotent(accounting):
+    """Test settling twice (commit, then release in finally) counts once."""
+    user_id = uuid.uuid4()
+    result = await accounting.reserve(user_id, PERIOD, 2, limit=10, used=0)
+
+    await accounting.commit(result.reservation, 2)
+    await accounting.release(result.reservation)
+
+    assert (await accounting.reserve(user_id, PERIOD, 0, limit=10, used=0)).used == 2
+
+
+async def test_expired_reservations_are_reclaimed(accounting, monkeypatch):
+    """Test unsettled reservations stop holding credits after their TTL."""
+    monkeypatch.setattr(settings, "credit_reservation_ttl_seconds", -1)
+    user_id = uuid.uuid4()
+
+    await accounting.reserve(user_id, PERIOD, 10, limit=10, used=0)
+    result = await accounting.reserve(user_id, PERIOD, 10, limit=10, used=0)
+
+    assert result.reservation is not None
+    assert isinstance(accounting.ledger, MemoryCreditLedger)
+    assert accounting.stats()["reclaimed"] == 1
+
+
+async def test_concurrent_requests_cannot_overspend(accounting, monkeypatch):
+    """Test concurrent reserve_quota calls admit only what the plan allows."""
+    user_id = uuid.uuid4()
+    snapshot = QuotaSnapshot(
+        user_id=user_id,
+        plan_name="Free",
+        plan_type="free",
+        has_active_subscription=False,
+        tokens_limit=10000,
+        requests_limit=100,
+        credits_limit=10,
+        documents_limit=5,
+        projects_limit=2,
+        requests_per_minute_limit=5,
+        requests_per_day_limit=100,
+        tokens_used=0,
+        requests_used=0,
+        credits_used=4,
+        documents_used=0,
+        projects_used=0,
+        period=PERIOD,
+    )
+
+    async def get_snapshot(db, requested_id):
+        await asyncio.sleep(0)
+        return snapshot
+
+    monkeypatch.setattr(quota_module, "get_quota_snapshot", get_snapshot)
+
+    results = await asyncio.gather(
+        *(quota_module.reserve_quota(None, user_id, credits_needed=2) for _ in range(10))
+    )
+
+    admitted = [reservation for reservation, _ in results if reservation is not None]
+    errors = [error for _, error in results if error is not None]
+    assert len(admitted) == 3
+    assert len(errors) == 7
+    assert "held by requests in progress" in errors[0]
+
+
+async def test_commit_after_settles_only_when_the_session_commits(accounting, monkeypatch):
+    """Test usage written in a session charges the ledger on commit, and releases otherwise."""
+    monkeypatch.setattr(credits_module, "credit_accounting", accounting)
+    user_id = uuid.uuid4()
+    committed = (await accounting.reserve(user_id, PERIOD, 3, limit=10, used=0)).reservation
+    discarded = (await accounting.reserve(user_id, PERIOD, 3, limit=10, used=0)).reservation
+
+    db = AsyncSession()
+    db.sync_session.begin()
+    accounting.commit_after(db, committed, 2)
+    await accounting.release(committed)  # The route's finally: a no-op now
+    db.sync_session.commit()
+
+    db.sync_session.begin()
+    accounting.commit_after(db, discarded, 2)
+    db.sync_session.close()
+    await asyncio.sleep(0)
+
+    result = await accounting.reserve(user_id, PERIOD, 0, limit=10, used=0)
+    assert (result.used, result.reserved) == (2, 0)
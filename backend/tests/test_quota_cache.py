@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services import quota as quota_module
+from app.services.quota import QuotaCache, QuotaSnapshot
+from app.services.usage import get_current_period
+
+
+def make_snapshot(user_id: uuid.UUID, period: str = "2026-10", tokens_used: int = 0) -> QuotaSnapshot:
+    return QuotaSnapshot(
+        user_id=user_id,
+        plan_name="Free",
+        plan_type="free",
+        has_active_subscription=False,
+        tokens_limit=10000,
+        requests_limit=100,
+        credits_limit=100,
+        documents_limit=5,
+        projects_limit=2,
+        requests_per_minute_limit=5,
+        requests_per_day_limit=100,
+        tokens_used=tokens_used,
+        requests_used=0,
+        credits_used=0,
+        documents_used=0,
+        projects_used=0,
+        period=period,
+    )
+
+
+@pytest.fixture(autouse=True)
+def local_only(monkeypatch):
+    monkeypatch.setattr(settings, "quota_cache_redis_enabled", False)
+    monkeypatch.setattr(settings, "quota_cache_local_ttl_seconds", 60.0)
+
+
+async def test_cache_hit_until_invalidated():
+    """Test snapshots are served from cache until invalidated."""
+    cache = QuotaCache()
+    user_id = uuid.uuid4()
+
+    assert await cache.get(user_id, "2026-10") is None
+    await cache.set(make_snapshot(user_id))
+    assert await cache.get(user_id, "2026-10") is not None
+
+    await cache.invalidate(user_id)
+    assert await cache.get(user_id, "2026-10") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+async def test_invalidated_again_after_commit(monkeypatch):
+    """Test a snapshot re-read before the commit is dropped when the session commits."""
+    cache = QuotaCache()
+    monkeypatch.setattr(quota_module, "quota_cache", cache)
+    user_id = uuid.uuid4()
+    db = AsyncSession()
+    await quota_module.invalidate_user_quota(user_id, db)
+
+    # A concurrent request caches the pre-commit document count
+    await cache.set(make_snapshot(user_id))
+
+    quota_module._invalidate_after_commit(db.sync_session)
+    await asyncio.sleep(0)
+
+    assert await cache.get(user_id, "2026-10") is None
+    assert quota_module.PENDING_INVALIDATIONS not in db.sync_session.info
+
+
+async def test_cache_ignores_previous_period():
+    """Test a snapshot from last month is not served after the period rolls over."""
+    cache = QuotaCache()
+    user_id = uuid.uuid4()
+    await cache.set(make_snapshot(user_id, period="2026-09", tokens_used=9999))
+
+    assert await cache.get(user_id, "2026-10") is None
+
+
+async def test_get_user_quota_fetches_once(monkeypatch):
+    """Test repeated quota checks within a request issue one snapshot query."""
+    user_id = uuid.uuid4()
+    fetches = 0
+
+    async def fetch(db, requested_id):
+        nonlocal fetches
+        fetches += 1
+        return make_snapshot(requested_id, period=get_current_period(), tokens_used=10000)
+
+    monkeypatch.setattr(quota_module, "quota_cache", QuotaCache())
+    monkeypatch.setattr(quota_module, "fetch_quota_snapshot", fetch)
+
+    allowed, error = await quota_module.check_token_quota(None, user_id)
+    quota = await quota_module.get_user_quota(None, user_id)
+
+    assert not allowed and "token quota exceeded" in error.lower()
+    assert quota.tokens.is_exceeded
+    assert fetches == 1
+
+
+def test_snapshot_json_round_trip():
+    """Test snapshots survive serialization for the Redis tier."""
+    snapshot = make_snapshot(uuid.uuid4(), tokens_used=42)
+
+    assert QuotaSnapshot.from_json(snapshot.to_json()) == snapshot
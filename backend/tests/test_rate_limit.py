@@ -0,0 +1,103 @@
+import uuid
+
+from app.config import settings
+from app.services import rate_limit as rate_limit_module
+from app.services.quota import QuotaSnapshot
+from app.services.rate_limit import MemoryRateLimiter, RateLimit, check_rate_limit
+
+MINUTE = [RateLimit("requests_per_minute", 3, 60)]
+
+
+class Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_refuses_over_limit_with_retry_after():
+    """Test requests over the limit are refused with a retry delay."""
+    clock = Clock(1_000_040.0)  # 20s into a minute bucket
+    limiter = MemoryRateLimiter(clock=clock)
+
+    for _ in range(3):
+        assert (await limiter.hit("user", MINUTE)).allowed
+
+    result = await limiter.hit("user", MINUTE)
+    assert not result.allowed
+    assert result.exceeded == MINUTE[0]
+    # Next bucket starts in 40s, then the 3 requests must slide out to 2
+    assert result.retry_after == 60
+
+    clock.now += result.retry_after
+    assert (await limiter.hit("user", MINUTE)).allowed
+
+
+async def test_previous_bucket_is_weighted():
+    """Test requests from the previous bucket count for the part still in the window."""
+    clock = Clock(1_000_050.0)
+    limiter = MemoryRateLimiter(clock=clock)
+    for _ in range(3):
+        await limiter.hit("user", MINUTE)
+
+    # 30s into the next bucket: half of the 3 earlier requests still count
+    clock.now = 1_000_110.0
+    assert (await limiter.hit("user", MINUTE)).allowed
+    result = await limiter.hit("user", MINUTE)
+    assert not result.allowed
+    assert result.retry_after == 10
+
+
+async def test_refused_request_is_not_counted():
+    """Test a request refused by one limit does not use up another."""
+    limiter = MemoryRateLimiter(clock=Clock(1_000_000.0))
+    limits = [RateLimit("requests_per_minute", 1, 60), RateLimit("requests_per_day", 2, 86400)]
+
+    assert (await limiter.hit("user", limits)).allowed
+    assert not (await limiter.hit("user", limits)).allowed
+    assert (await limiter.hit("other", limits)).allowed
+
+    day_only = [limits[1]]
+    assert (await limiter.hit("user", day_only)).allowed
+
+
+async def test_check_rate_limit_uses_plan_limits(monkeypatch):
+    """Test plan limits are applied and -1 means unlimited."""
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(rate_limit_module, "_limiter", MemoryRateLimiter())
+    snapshot = QuotaSnapshot(
+        user_id=uuid.uuid4(),
+        plan_name="Pro",
+        plan_type="pro",
+        has_active_subscription=True,
+        tokens_limit=-1,
+        requests_limit=-1,
+        credits_limit=-1,
+        documents_limit=-1,
+        projects_limit=-1,
+        requests_per_minute_limit=2,
+        requests_per_day_limit=-1,
+        tokens_used=0,
+        requests_used=0,
+        credits_used=0,
+        documents_used=0,
+        projects_used=0,
+        period="2026-10",
+    )
+
+    results = [await check_rate_limit(snapshot) for _ in range(3)]
+
+    assert [result.allowed for result in results] == [True, True, False]
+    assert results[-1].exceeded.name == "requests_per_minute"
+    assert results[-1].retry_after > 0
+
+
+async def test_zero_limit_waits_for_next_bucket():
+    """Test a zero limit refuses until the window rolls over."""
+    limiter = MemoryRateLimiter(clock=Clock(1_000_040.0))
+
+    result = await limiter.hit("user", [RateLimit("requests_per_minute", 0, 60)])
+
+    assert not result.allowed
+    assert result.retry_after == 40
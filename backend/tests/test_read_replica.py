@@ -0,0 +1,155 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.core import read_replica as read_replica_module
+from app.core.context import RequestContext, reset_context, set_context
+from app.core.dependencies import get_read_db
+from app.core.read_replica import ReplicaRouter
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class FakeUnitOfWork:
+    def __init__(self, read_only: bool = False) -> None:
+        self.session = object()
+        self.closed = False
+
+    async def begin(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """Enabled router over a fake replica whose lag the test sets."""
+    router = ReplicaRouter()
+    state = {"lag": 0.0, "checks": 0}
+
+    async def query_lag():
+        state["checks"] += 1
+        if isinstance(state["lag"], Exception):
+            raise state["lag"]
+        return state["lag"]
+
+    redis = FakeRedis()
+    monkeypatch.setattr(read_replica_module, "read_engine", object())
+    monkeypatch.setattr(read_replica_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(read_replica_module, "UnitOfWork", FakeUnitOfWork)
+    monkeypatch.setattr(router, "_query_lag", query_lag)
+    monkeypatch.setattr(settings, "read_replica_lag_check_interval_seconds", 0.0)
+    router.state = state
+    router.redis = redis
+    return router
+
+
+async def test_disabled_without_separate_read_engine(monkeypatch):
+    """Test reads use the primary when no read database is configured."""
+    monkeypatch.setattr(read_replica_module, "read_engine", read_replica_module.engine)
+    router = ReplicaRouter()
+
+    assert router.enabled is False
+    async with router.read_session(uuid.uuid4()) as session:
+        assert session is None
+
+
+async def test_routes_to_replica_and_falls_back_on_lag(router):
+    """Test reads go to the replica until it lags more than the max."""
+    async with router.read_session(None) as session:
+        assert session is not None
+
+    router.state["lag"] = settings.read_replica_max_lag_seconds + 1
+    async with router.read_session(None) as session:
+        assert session is None
+
+    router.state["lag"] = OSError("connection refused")
+    async with router.read_session(None) as session:
+        assert session is None
+
+    stats = router.stats()
+    assert (stats["replica_reads"], stats["primary_reads"]) == (1, 2)
+    assert (stats["lag_fallbacks"], stats["unavailable_fallbacks"]) == (1, 1)
+
+
+async def test_lag_checked_once_per_interval(router, monkeypatch):
+    """Test the lag is not re-measured for every request."""
+    monkeypatch.setattr(settings, "read_replica_lag_check_interval_seconds", 60.0)
+
+    for _ in range(3):
+        assert await router.use_replica(None)
+
+    assert router.state["checks"] == 1
+
+
+async def test_user_sticks_to_primary_after_write(router):
+    """Test a user's reads stay on the primary until the replica catches up."""
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    router.state["lag"] = 1.0
+    router.record_write(user_id)
+
+    assert await router.use_replica(user_id) is False
+    assert await router.use_replica(other_id) is True
+
+    # Another worker sees the write through Redis
+    await asyncio.sleep(0)
+    other_worker = ReplicaRouter()
+    assert await other_worker.last_write_at(user_id) == pytest.approx(time.time(), abs=5)
+
+    # Once lag + sticky window has passed
+    past = time.time() - 1.0 - settings.read_replica_sticky_seconds - 0.1
+    router._writes[user_id] = past
+    router.redis.data.clear()
+    assert await router.use_replica(user_id) is True
+
+
+async def test_commit_records_write_of_context_user(router, monkeypatch):
+    """Test committing a transaction that wrote records the request's user."""
+    monkeypatch.setattr(read_replica_module, "replica_router", router)
+    user_id = uuid.uuid4()
+    set_context(RequestContext(user_id=user_id))
+    try:
+        session = type("Session", (), {"info": {}})()
+        read_replica_module._record_write(session)
+        assert router.writes_recorded == 0
+
+        session.info[read_replica_module.WROTE] = True
+        read_replica_module._record_write(session)
+        assert user_id in router._writes
+        assert read_replica_module.WROTE not in session.info
+    finally:
+        reset_context()
+
+
+async def test_read_db_uses_request_session_on_fallback(router, monkeypatch):
+    """Test get_read_db hands out the primary session when the replica lags."""
+    monkeypatch.setattr("app.core.dependencies.replica_router", router)
+    db = object()
+    router.state["lag"] = settings.read_replica_max_lag_seconds + 1
+
+    dependency = get_read_db(db=db, user_id=None)
+    assert await anext(dependency) is db
+    await dependency.aclose()
+
+
+async def test_system_metrics_accept_every_cache_stats():
+    """Test the admin metrics schema validates the real stats of every registered cache."""
+    from app.services.system_health import get_system_metrics
+
+    metrics = await get_system_metrics(None)
+
+    assert metrics.caches["read_replica"]["lag_seconds"] == -1
+    assert metrics.caches["read_replica"]["enabled"] is read_replica_module.replica_router.enabled
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.core.streaming import DisconnectWatcher
+from app.providers.llm import ChatMessage, LLMClient
+
+UPSTREAM_CLOSE_TIMEOUT = 2.0
+
+
+class FakeLLMServer:
+    """Minimal OpenAI-compatible streaming server that stalls after a few chunks."""
+
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+        self.connected = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.closed_at: float | None = None
+        self._server: asyncio.Server | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in headers.decode().split("\r\n"):
+            if line.lower().startswith("content-length:"):
+                length = int(line.split(":", 1)[1])
+        await reader.readexactly(length)
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        for content in self.chunks:
+            event = json.dumps({"choices": [{"delta": {"content": content}}]})
+            payload = f"data: {event}\n\n".encode()
+            writer.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+        await writer.drain()
+        self.connected.set()
+
+        # Stall like a slow model; returns once the client closes the socket
+        await reader.read()
+        self.closed_at = time.perf_counter()
+        self.closed.set()
+        writer.close()
+
+
+class FakeRequest:
+    """Stands in for a Starlette Request whose client can disconnect."""
+
+    def __init__(self) -> None:
+        self.gone = False
+
+    async def is_disconnected(self) -> bool:
+        return self.gone
+
+
+@pytest.fixture
+async def fake_llm():
+    server = FakeLLMServer(chunks=["Hello", " there"])
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_upstream_stream(fake_llm: FakeLLMServer):
+    """Test the upstream LLM connection is closed promptly after a client disconnect."""
+    client = LLMClient(base_url=fake_llm.base_url, api_key="test")
+    request = FakeRequest()
+    received: list[str] = []
+
+    async def consume() -> bool:
+        async with DisconnectWatcher(request, poll_interval=0.01) as watcher:
+            async for chunk in client.chat_completion_stream(
+                messages=[ChatMessage(role="user", content="Hi")],
+            ):
+                received.append(chunk)
+        return watcher.disconnected
+
+    task = asyncio.create_task(consume())
+    await asyncio.wait_for(fake_llm.connected.wait(), timeout=UPSTREAM_CLOSE_TIMEOUT)
+    while len(received) < 2:
+        await asyncio.sleep(0.01)
+
+    request.gone = True
+    disconnected_at = time.perf_counter()
+
+    assert await asyncio.wait_for(task, timeout=UPSTREAM_CLOSE_TIMEOUT) is True
+    await asyncio.wait_for(fake_llm.closed.wait(), timeout=UPSTREAM_CLOSE_TIMEOUT)
+    assert fake_llm.closed_at - disconnected_at < UPSTREAM_CLOSE_TIMEOUT
+    assert "".join(received) == "Hello there"
+
+
+@pytest.mark.asyncio
+async def test_watcher_does_not_swallow_foreign_cancellation(fake_llm: FakeLLMServer):
+    """Test cancellations not caused by a disconnect still propagate."""
+    client = LLMClient(base_url=fake_llm.base_url, api_key="test")
+
+    async def consume() -> None:
+        async with DisconnectWatcher(FakeRequest(), poll_interval=0.01):
+            async for _ in client.chat_completion_stream(
+                messages=[ChatMessage(role="user", content="Hi")],
+            ):
+                pass
+
+    task = asyncio.create_task(consume())
+    await asyncio.wait_for(fake_llm.connected.wait(), timeout=UPSTREAM_CLOSE_TIMEOUT)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.wait_for(fake_llm.closed.wait(), timeout=UPSTREAM_CLOSE_TIMEOUT)
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.services import stream_replay
+from app.services.stream_replay import MemoryReplayStore
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    store = MemoryReplayStore(max_events=3, ttl_seconds=60)
+    monkeypatch.setattr(stream_replay, "_store", store)
+    return store
+
+
+async def _collect(stream_id: str, after: int = 0) -> list[str]:
+    return [frame async for frame in stream_replay.tail(stream_id, after)]
+
+
+@pytest.mark.asyncio
+async def test_tail_resumes_after_last_event_id(memory_store: MemoryReplayStore):
+    """Test a reconnect only receives frames after the given sequence."""
+    await memory_store.create("s1", "user-1")
+    for text in ("a", "b", "c"):
+        await memory_store.append("s1", f"data: {text}\n\n")
+    await memory_store.finish("s1")
+
+    frames = await _collect("s1", after=1)
+
+    assert frames == ["id: s1:2\ndata: b\n\n", "id: s1:3\ndata: c\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_tail_follows_live_producer(memory_store: MemoryReplayStore):
+    """Test a reader receives frames appended while it is waiting."""
+    await memory_store.create("s1", "user-1")
+    reader = asyncio.create_task(_collect("s1"))
+
+    await asyncio.sleep(0)
+    await memory_store.append("s1", "data: a\n\n")
+    await memory_store.finish("s1")
+
+    assert await asyncio.wait_for(reader, timeout=2) == ["id: s1:1\ndata: a\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_can_resume_checks_owner_and_window(memory_store: MemoryReplayStore):
+    """Test resume is refused for other users or frames evicted from the ring buffer."""
+    await memory_store.create("s1", "user-1")
+    for text in ("a", "b", "c", "d"):
+        await memory_store.append("s1", f"data: {text}\n\n")
+
+    assert await stream_replay.can_resume("s1", 1, "user-1") is True
+    assert await stream_replay.can_resume("s1", 0, "user-1") is False
+    assert await stream_replay.can_resume("s1", 1, "user-2") is False
+    assert stream_replay.parse_event_id("s1:4") == ("s1", 4)
+    assert stream_replay.parse_event_id("garbage") is None
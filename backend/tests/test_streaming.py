@@ -0,0 +1,57 @@
+import json
+
+from app.core.streaming import SSEStreamWriter
+
+
+def _parse(frame: str) -> dict:
+    assert frame.startswith("data: ")
+    assert frame.endswith("\n\n")
+    return json.loads(frame[6:])
+
+
+def test_writer_emits_frame_per_delta_by_default():
+    """Test each delta becomes a frame and only the first carries conversation_id."""
+    writer = SSEStreamWriter(conversation_id="conv-1")
+
+    first = _parse(writer.add("Hel"))
+    second = _parse(writer.add('lo "x"'))
+
+    assert first == {"conversation_id": "conv-1", "done": False, "content": "Hel"}
+    assert second == {"done": False, "content": 'lo "x"'}
+    assert writer.flush() is None
+    assert writer.text == 'Hello "x"'
+
+
+def test_writer_coalesces_by_size():
+    """Test deltas are buffered until flush_bytes is reached."""
+    writer = SSEStreamWriter(conversation_id="conv-1", flush_bytes=5)
+
+    assert writer.add("ab") is None
+    assert writer.add("cd") is None
+    frame = writer.add("ef")
+    assert _parse(frame)["content"] == "abcdef"
+
+    assert writer.add("g") is None
+    assert _parse(writer.flush())["content"] == "g"
+    assert writer.text == "abcdefg"
+    assert writer.frames_sent == 2
+
+
+def test_writer_flush_bytes_counts_encoded_size():
+    """Test flush_bytes compares the UTF-8 size, not the character count."""
+    writer = SSEStreamWriter(conversation_id="conv-1", flush_bytes=6)
+
+    assert writer.add("é") is None  # 2 bytes
+    frame = writer.add("日本")  # 6 bytes, 3 characters in total
+    assert _parse(frame)["content"] == "é日本"
+
+
+def test_writer_done_frame():
+    """Test the final frame includes done flag and extra fields."""
+    writer = SSEStreamWriter(conversation_id="conv-1")
+
+    done = _parse(writer.done(usage={"total_tokens": 3}))
+
+    assert done["done"] is True
+    assert done["conversation_id"] == "conv-1"
+    assert done["usage"] == {"total_tokens": 3}
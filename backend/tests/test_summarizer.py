@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.providers.llm import ChatCompletionResponse, ChatMessage
+from app.services import summarizer as summarizer_module
+from app.services.document_processor import TextChunker
+from app.services.summarizer import CHUNK_SUMMARY_PROMPT, ChunkSummaryCache, Summarizer
+
+
+class CountingLLM:
+    """Answers every call with a short summary and tracks concurrency."""
+
+    def __init__(self) -> None:
+        self.calls: list[list[ChatMessage]] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def chat_completion(self, messages: list[ChatMessage], **kwargs) -> ChatCompletionResponse:
+        self.calls.append(list(messages))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return ChatCompletionResponse(
+            content=f"summary {len(self.calls)}",
+            role="assistant",
+            model="test-model",
+            usage={"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        )
+
+    def map_calls(self) -> int:
+        return sum(1 for call in self.calls if call[0].content == CHUNK_SUMMARY_PROMPT)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = CountingLLM()
+    monkeypatch.setattr(summarizer_module, "llm_client", fake)
+    monkeypatch.setattr(settings, "summarize_map_reduce_threshold_chars", 1000)
+    monkeypatch.setattr(settings, "summarize_concurrency", 2)
+    return fake
+
+
+def make_summarizer() -> Summarizer:
+    return Summarizer(chunker=TextChunker(chunk_size=300, chunk_overlap=0), cache=ChunkSummaryCache(100))
+
+
+def long_text(paragraphs: int) -> str:
+    return "\n\n".join(f"Paragraph {i}. " + "word " * 50 for i in range(paragraphs))
+
+
+async def test_short_text_uses_one_call(llm):
+    """Test text under the threshold is summarized in a single call."""
+    result = await make_summarizer().summarize("A short text.")
+
+    assert len(llm.calls) == 1
+    assert result.levels == 0
+    assert result.summary == "summary 1"
+
+
+async def test_long_text_is_mapped_then_reduced(llm):
+    """Test long text is summarized per chunk with bounded concurrency, then combined."""
+    result = await make_summarizer().summarize(long_text(12), style="bullet_points")
+
+    assert result.chunks > 1
+    assert llm.map_calls() == result.chunks
+    assert llm.max_active <= 2
+    assert len(llm.calls) == result.chunks + 1
+    assert "bullet points" in llm.calls[-1][0].content
+    assert result.usage["total_tokens"] == 12 * len(llm.calls)
+
+
+async def test_reduce_stops_when_summaries_do_not_shrink(llm, monkeypatch):
+    """Test a model whose summaries are longer than their input cannot loop forever."""
+
+    async def verbose(messages: list[ChatMessage], **kwargs) -> ChatCompletionResponse:
+        llm.calls.append(list(messages))
+        return ChatCompletionResponse(
+            content="very long summary " * 40,
+            role="assistant",
+            model="test-model",
+            usage={"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        )
+
+    monkeypatch.setattr(llm, "chat_completion", verbose)
+
+    result = await make_summarizer().summarize(long_text(12))
+
+    assert result.levels == 1
+    assert len(llm.calls[-1][1].content) < 1000 + 200
+
+
+async def test_reduce_levels_are_capped(llm, monkeypatch):
+    """Test the reduce loop stops at summarize_max_levels even while shrinking."""
+    monkeypatch.setattr(settings, "summarize_max_levels", 2)
+    monkeypatch.setattr(settings, "summarize_map_reduce_threshold_chars", 10)
+
+    result = await make_summarizer().summarize(long_text(40))
+
+    assert result.levels == 2
+
+
+async def test_chunk_summaries_are_cached(llm):
+    """Test summarizing the same text again only repeats the reduce call."""
+    summarizer = make_summarizer()
+    first = await summarizer.summarize(long_text(12))
+    calls = len(llm.calls)
+
+    second = await summarizer.summarize(long_text(12), style="detailed")
+
+    assert len(llm.calls) == calls + 1
+    assert second.cached_chunks == first.chunks
+    assert summarizer.cache.stats()["hits"] == first.chunks
+
+
+async def test_document_summary_is_built_per_section(llm):
+    """Test ingestion summaries group chunk summaries into sections, then one document summary."""
+    chunks = [f"Chunk {i}. " + "text " * 40 for i in range(5)]
+
+    result = await make_summarizer().summarize_document(chunks, section_chunks=2)
+
+    assert [(s["chunk_start"], s["chunk_end"]) for s in result.sections] == [(0, 1), (2, 3), (4, 4)]
+    # 5 chunk summaries + 2 multi-chunk sections + 1 document reduce
+    assert len(llm.calls) == 8
+    assert result.summary == "summary 8"
@@ -0,0 +1,76 @@
+import json
+
+from app.agents.formatting import ToolResultFormatter
+
+
+def rag_result(*chunk_indexes: int, content: str = "text") -> dict:
+    return {
+        "success": True,
+        "data": [
+            {"document_id": "doc-1", "chunk_index": i, "content": content, "score": 0.912345}
+            for i in chunk_indexes
+        ],
+        "error": None,
+        "metadata": {"query": "q", "top_k": 5, "count": len(chunk_indexes)},
+    }
+
+
+def test_compact_output_drops_redundant_fields():
+    """Test results are unindented and omit empty or repeated fields."""
+    formatter = ToolResultFormatter()
+
+    text = formatter.format("rag_search", rag_result(0))
+
+    assert "\n" not in text
+    assert json.loads(text) == {
+        "data": [{"document_id": "doc-1", "chunk_index": 0, "content": "text", "score": 0.912}],
+    }
+    assert formatter.stats()["tokens_saved"] > 0
+
+
+def test_chunks_shown_earlier_are_deduplicated():
+    """Test a chunk from an earlier iteration is replaced by a count."""
+    formatter = ToolResultFormatter()
+    formatter.format("rag_search", rag_result(0, 1))
+
+    second = json.loads(formatter.format("rag_search", rag_result(1, 2)))
+
+    assert [c["chunk_index"] for c in second["data"]] == [2]
+    assert second["already_shown"] == 1
+    assert formatter.stats()["deduplicated_chunks"] == 1
+
+
+def test_results_are_cut_to_the_token_budget():
+    """Test long results fit the budget, keeping the top-ranked chunks."""
+    formatter = ToolResultFormatter(default_budget=200)
+
+    text = formatter.format("rag_search", rag_result(0, 1, 2, 3, content="x" * 600))
+    result = json.loads(text)
+
+    assert len(text) <= 200 * 4
+    assert result["data"][0]["chunk_index"] == 0
+    assert result["omitted"] >= 1
+    assert formatter.stats()["truncated"] == 1
+
+
+def test_large_dict_result_stays_valid_json():
+    """Test a dict payload over the budget is cut to a preview inside valid JSON."""
+    formatter = ToolResultFormatter(default_budget=50)
+    payload = {f"key_{i}": "v" * 20 for i in range(100)}
+
+    text = formatter.format("web_fetch", {"success": True, "data": payload, "error": None, "metadata": {}})
+    result = json.loads(text)
+
+    assert len(text) <= 50 * 4
+    assert result["data"]["truncated"] is True
+    assert result["data"]["preview"].startswith('{"key_0":')
+    assert formatter.stats()["truncated"] == 1
+
+
+def test_failed_results_keep_only_the_error():
+    """Test errors stay visible to the model."""
+    formatter = ToolResultFormatter()
+
+    text = formatter.format("calculator", {"success": False, "data": None, "error": "bad", "metadata": {}})
+
+    assert json.loads(text) == {"success": False, "error": "bad"}
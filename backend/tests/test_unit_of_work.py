@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import unit_of_work as uow_module
+from app.core.context import RequestContext, reset_context, set_context
+from app.core.unit_of_work import ReadOnlySessionError, SessionStats, UnitOfWork
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.info: dict = {}
+        self.calls: list[str] = []
+
+    async def connection(self, execution_options=None):
+        self.calls.append(f"connection {execution_options}")
+
+    async def commit(self) -> None:
+        self.calls.append("commit")
+
+    async def rollback(self) -> None:
+        self.calls.append("rollback")
+
+    async def close(self) -> None:
+        self.calls.append("close")
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    created: list[FakeSession] = []
+
+    def factory() -> FakeSession:
+        created.append(FakeSession())
+        return created[-1]
+
+    monkeypatch.setattr(uow_module, "SessionLocal", factory)
+    monkeypatch.setattr(uow_module, "ReadSessionLocal", factory)
+    return created
+
+
+async def test_commits_on_success_and_rolls_back_on_error(sessions):
+    """Test the unit of work commits at the end unless the request raised."""
+    async with UnitOfWork():
+        pass
+    with pytest.raises(ValueError):
+        async with UnitOfWork():
+            raise ValueError("boom")
+
+    assert sessions[0].calls == ["commit", "close"]
+    assert sessions[1].calls == ["rollback", "close"]
+
+
+async def test_read_only_never_commits(sessions):
+    """Test a read-only unit of work runs READ ONLY and refuses to commit."""
+    async with UnitOfWork(read_only=True) as uow:
+        with pytest.raises(ReadOnlySessionError):
+            await uow.commit()
+
+    assert sessions[0].calls == ["connection {'postgresql_readonly': True}", "close"]
+
+
+def test_read_only_session_refuses_flush():
+    """Test ORM changes cannot be flushed in a read-only session."""
+    session = AsyncSession().sync_session
+    session.info[uow_module.READ_ONLY] = True
+
+    with pytest.raises(ReadOnlySessionError):
+        uow_module._refuse_read_only_flush(session, None, None)
+
+
+def test_request_stats_counted_on_context():
+    """Test session events are counted on the current request only."""
+    stats = SessionStats()
+    ctx = RequestContext()
+    ctx.set("db_stats", stats)
+    set_context(ctx)
+    try:
+        session = AsyncSession().sync_session
+        uow_module._count_session(session, None, None)
+        uow_module._count_session(session, None, None)
+        uow_module._count_query()
+        uow_module._count_query()
+        uow_module._count_commit(session)
+    finally:
+        reset_context()
+
+    # Outside a request nothing is counted
+    uow_module._count_query()
+
+    assert stats.as_dict() == {"sessions": 1, "commits": 1, "rollbacks": 0, "queries": 2}
@@ -0,0 +1,196 @@
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.models.usage import RequestType
+from app.schemas.usage import UsageRecordCreate
+from app.services import usage_buffer as usage_buffer_module
+from app.services.usage import UsageEvent, aggregate_usage_summaries
+from app.services.usage_buffer import UsageBuffer
+
+
+def make_event(user_id: uuid.UUID, request_type: RequestType = RequestType.CHAT, tokens: int = 10) -> UsageEvent:
+    return UsageEvent(
+        user_id=user_id,
+        data=UsageRecordCreate(request_type=request_type, model="gpt-4o-mini", tokens_total=tokens, cost=0.5),
+        credits=2,
+        period="2026-10",
+        created_at=datetime(2026, 10, 19, 12, tzinfo=UTC),
+    )
+
+
+class FakeSession:
+    def __init__(self, fail: bool) -> None:
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def commit(self) -> None:
+        if self.fail:
+            raise ConnectionError("database unavailable")
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Capture batches instead of writing them; set `fail` to simulate errors."""
+    state = {"batches": [], "fail": False, "invalidated": set(), "rejected": set()}
+
+    async def write(db, events):
+        if any(event.user_id in state["rejected"] for event in events):
+            raise IntegrityError("INSERT INTO usage_records", {}, Exception("foreign key violation"))
+        if not state["fail"]:
+            state["batches"].append(list(events))
+
+    async def invalidate(user_id):
+        state["invalidated"].add(user_id)
+
+    monkeypatch.setattr(usage_buffer_module, "write_usage_events", write)
+    monkeypatch.setattr(usage_buffer_module, "invalidate_user_quota", invalidate)
+    monkeypatch.setattr("app.core.database.SessionLocal", lambda: FakeSession(state["fail"]))
+    monkeypatch.setattr(settings, "usage_flush_batch_size", 3)
+    return state
+
+
+def test_summaries_aggregate_per_user_and_period():
+    """Test one summary increment is built per (user, period)."""
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    events = [make_event(alice), make_event(alice, RequestType.RAG, tokens=5), make_event(bob)]
+
+    rows = {row["user_id"]: row for row in aggregate_usage_summaries(events)}
+
+    assert len(rows) == 2
+    assert rows[alice]["total_requests"] == 2
+    assert rows[alice]["total_tokens"] == 15
+    assert rows[alice]["total_credits"] == 4
+    assert rows[alice]["chat_requests"] == 1
+    assert rows[alice]["rag_requests"] == 1
+    assert rows[bob]["total_cost"] == 0.5
+
+
+async def test_flush_writes_batches_and_invalidates(writes):
+    """Test events are written in batches and quota snapshots dropped."""
+    buffer = UsageBuffer()
+    user_id = uuid.uuid4()
+    for _ in range(4):
+        buffer.add(make_event(user_id))
+
+    assert await buffer.flush()
+    assert await buffer.flush()
+
+    assert [len(batch) for batch in writes["batches"]] == [3, 1]
+    assert writes["invalidated"] == {user_id}
+    assert buffer.stats()["flushed"] == 4
+    assert buffer.pending == 0
+
+
+async def test_failed_flush_keeps_events_in_order(writes):
+    """Test a failed batch is retried before newer events."""
+    buffer = UsageBuffer()
+    events = [make_event(uuid.uuid4()) for _ in range(4)]
+    for event in events[:2]:
+        buffer.add(event)
+
+    writes["fail"] = True
+    assert not await buffer.flush()
+    buffer.add(events[2])
+    writes["fail"] = False
+    assert await buffer.flush()
+
+    assert writes["batches"] == [events[:3]]
+    assert buffer.stats()["failures"] == 1
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.lists: dict[str, list[str]] = {}
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    async def lpop(self, key, count):
+        values = self.lists.get(key, [])
+        chunk, self.lists[key] = values[:count], values[count:]
+        return chunk or None
+
+
+async def test_rejected_event_is_dead_lettered(writes, monkeypatch):
+    """Test an event the database rejects does not block the rest of its batch."""
+    redis = FakeRedis()
+    monkeypatch.setattr(usage_buffer_module, "get_redis", lambda: redis)
+    buffer = UsageBuffer()
+    deleted_user = uuid.uuid4()
+    writes["rejected"].add(deleted_user)
+    events = [make_event(uuid.uuid4()), make_event(deleted_user), make_event(uuid.uuid4())]
+    for event in events:
+        buffer.add(event)
+
+    assert await buffer.flush()
+
+    assert writes["batches"] == [[events[0]], [events[2]]]
+    assert [UsageEvent.from_json(line).user_id for line in redis.lists[usage_buffer_module.DEAD_LETTER_KEY]] == [
+        deleted_user
+    ]
+    assert buffer.pending == 0
+    assert buffer.stats()["dead_lettered"] == 1
+    assert buffer.stats()["failures"] == 0
+
+
+async def test_events_over_cap_are_spilled(writes, monkeypatch):
+    """Test events beyond the pending cap are spilled and recovered once drained."""
+    redis = FakeRedis()
+    monkeypatch.setattr(usage_buffer_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(settings, "usage_buffer_max_pending", 2)
+    buffer = UsageBuffer()
+    events = [make_event(uuid.uuid4()) for _ in range(5)]
+    for event in events:
+        buffer.add(event)
+    await buffer._overflow_task
+
+    assert buffer.pending == 2
+    assert len(redis.lists[usage_buffer_module.SPILL_KEY]) == 3
+    assert buffer.stats()["overflowed"] == 3
+
+    assert await buffer.flush()
+    await buffer._recover()
+    assert await buffer.flush()
+
+    flushed = [event.user_id for batch in writes["batches"] for event in batch]
+    assert flushed == [event.user_id for event in events]
+
+
+async def test_spill_to_file_and_recover(writes, monkeypatch, tmp_path):
+    """Test unwritten events survive a restart through the spill file."""
+    from redis.exceptions import ConnectionError as RedisConnectionError
+
+    class DownRedis:
+        async def rpush(self, *args):
+            raise RedisConnectionError("redis unavailable")
+
+        async def lpop(self, *args):
+            raise RedisConnectionError("redis unavailable")
+
+    monkeypatch.setattr(usage_buffer_module, "get_redis", lambda: DownRedis())
+    monkeypatch.setattr(settings, "usage_spill_path", str(tmp_path / "spill.jsonl"))
+    event = make_event(uuid.uuid4(), RequestType.AGENT)
+
+    await UsageBuffer()._spill([event])
+    restarted = UsageBuffer()
+    await restarted._recover()
+
+    assert restarted.pending == 1
+    assert await restarted.flush()
+    recovered = writes["batches"][0][0]
+    assert (recovered.user_id, recovered.data, recovered.credits, recovered.created_at) == (
+        event.user_id,
+        event.data,
+        event.credits,
+        event.created_at,
+    )
+    assert not (tmp_path / "spill.jsonl").exists()
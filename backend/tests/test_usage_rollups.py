@@ -0,0 +1,93 @@
+import uuid
+from datetime import UTC, date, datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.usage import RequestType
+from app.schemas.usage import UsageRecordCreate
+from app.services.usage import UsageEvent
+from app.services.usage_rollups import (
+    aggregate_rollups,
+    backfill_rollups,
+    bucket_start,
+    upsert_rollups,
+)
+
+
+def make_event(
+    user_id: uuid.UUID,
+    created_at: datetime,
+    model: str = "gpt-4o-mini",
+    request_type: RequestType = RequestType.CHAT,
+) -> UsageEvent:
+    return UsageEvent(
+        user_id=user_id,
+        data=UsageRecordCreate(
+            request_type=request_type, model=model, tokens_input=4, tokens_output=6, tokens_total=10, cost=0.5
+        ),
+        credits=2,
+        period=created_at.strftime("%Y-%m"),
+        created_at=created_at,
+    )
+
+
+def test_bucket_start_truncates_to_naive_utc():
+    moment = datetime(2026, 10, 19, 1, 45, 12, tzinfo=timezone(timedelta(hours=2)))
+
+    assert bucket_start(moment, "hour") == datetime(2026, 10, 18, 23)
+    assert bucket_start(moment, "day") == datetime(2026, 10, 18)
+
+
+def test_aggregate_rollups_groups_by_bucket_model_and_type():
+    user_id = uuid.uuid4()
+    noon = datetime(2026, 10, 19, 12, 5, tzinfo=UTC)
+    events = [
+        make_event(user_id, noon),
+        make_event(user_id, noon + timedelta(minutes=30)),
+        make_event(user_id, noon + timedelta(hours=1)),
+        make_event(user_id, noon, model="gpt-4o"),
+        make_event(user_id, noon, request_type=RequestType.RAG),
+    ]
+
+    hourly = {
+        (row["bucket_start"].hour, row["model"], row["request_type"]): row
+        for row in aggregate_rollups(events, "hour")
+    }
+    assert len(hourly) == 4
+    row = hourly[(12, "gpt-4o-mini", RequestType.CHAT)]
+    assert (row["requests"], row["tokens_total"], row["credits"], row["cost"]) == (2, 20, 4, 1.0)
+
+    daily = aggregate_rollups(events, "day")
+    assert len(daily) == 3
+    assert sum(row["requests"] for row in daily) == len(events)
+    assert {row["bucket_start"] for row in daily} == {datetime(2026, 10, 19)}
+
+
+class RecordingSession:
+    """Records the SQL it is asked to run."""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, stmt) -> None:
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+    async def commit(self) -> None:
+        self.statements.append("COMMIT")
+
+
+async def test_flush_and_rebuild_take_the_day_lock_first():
+    """Test flushes share each day's lock and a rebuild holds it alone before touching rows."""
+    user_id = uuid.uuid4()
+    flush = RecordingSession()
+    await upsert_rollups(flush, [
+        make_event(user_id, datetime(2026, 10, 19, 23, 50, tzinfo=UTC)),
+        make_event(user_id, datetime(2026, 10, 18, 8, tzinfo=UTC)),
+    ])
+    assert all("pg_advisory_xact_lock_shared" in stmt for stmt in flush.statements[:2])
+    assert not any("advisory" in stmt for stmt in flush.statements[2:])
+
+    rebuild = RecordingSession()
+    await backfill_rollups(rebuild, date(2026, 10, 18), date(2026, 10, 20))
+    locks = [i for i, stmt in enumerate(rebuild.statements) if "pg_advisory_xact_lock(" in stmt]
+    assert locks == [0, rebuild.statements.index("COMMIT") + 1]
@@ -0,0 +1,74 @@
+import uuid
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.config import settings
+from app.services import user_counters as user_counters_module
+from app.services.user_counters import UserCountersReconciler
+
+
+class FakeResult:
+    def __init__(self, ids: list[uuid.UUID]) -> None:
+        self.ids = ids
+
+    def scalars(self):
+        return self
+
+    def all(self) -> list[uuid.UUID]:
+        return self.ids
+
+
+class FakeSession:
+    """Serves user ID pages in order."""
+
+    def __init__(self, pages: list[list[uuid.UUID]], commits: list[int]) -> None:
+        self.pages = pages
+        self.commits = commits
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, stmt) -> FakeResult:
+        return FakeResult(self.pages.pop(0) if self.pages else [])
+
+    async def commit(self) -> None:
+        self.commits.append(1)
+
+
+async def test_reconciler_walks_all_users_in_batches(monkeypatch):
+    """Test every user is reconciled once, one transaction per batch."""
+    user_ids = sorted(uuid.uuid4() for _ in range(5))
+    pages = [user_ids[:2], user_ids[2:4], user_ids[4:]]
+    commits: list[int] = []
+    reconciled: list[list[uuid.UUID]] = []
+
+    async def reconcile(db, batch):
+        reconciled.append(batch)
+        return 1 if user_ids[0] in batch else 0
+
+    monkeypatch.setattr(settings, "user_counters_reconcile_batch_size", 2)
+    monkeypatch.setattr(user_counters_module, "reconcile_user_counters", reconcile)
+    monkeypatch.setattr("app.core.database.SessionLocal", lambda: FakeSession(pages, commits))
+
+    reconciler = UserCountersReconciler()
+    assert await reconciler.run_once() == 1
+
+    assert reconciled == [user_ids[:2], user_ids[2:4], user_ids[4:]]
+    assert len(commits) == 3
+    assert reconciler.stats()["checked"] == 5
+    assert reconciler.stats()["corrected"] == 1
+
+
+async def test_reconcile_runs_without_redis_lock(monkeypatch):
+    """Test a pass still runs when the Redis lock cannot be taken."""
+
+    class DownRedis:
+        async def set(self, *args, **kwargs):
+            raise RedisConnectionError("redis down")
+
+    monkeypatch.setattr(user_counters_module, "get_redis", lambda: DownRedis())
+
+    assert await UserCountersReconciler()._acquire_pass()
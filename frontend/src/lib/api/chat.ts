@@ -2,6 +2,7 @@ import { fetchApi } from './client';
 import { ApiException } from '$lib/types';
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+const MAX_RESUME_ATTEMPTS = 3;
 
 export interface ModelInfo {
 	id: string;
@@ -72,9 +73,14 @@ export interface ChatResponse {
 export interface LatencyInfo {
 	retrieval_ms?: number;
 	llm_ms?: number;
+	ttft_ms?: number;
+	inter_token_ms?: number;
+	tokens_per_second?: number;
 }
 
 export interface StreamChunk {
+	// Agent streams only: thinking, tool_call, tool_result, content, done, error
+	type?: string;
 	content: string;
 	done: boolean;
 	error?: string;
@@ -112,7 +118,10 @@ export const chatApi = {
 	},
 
 	/**
-	 * Send chat message with streaming response
+	 * Send chat message with streaming response.
+	 * Uses the agent stream when an agent is selected.
+	 * Resumes from the server's replay buffer (Last-Event-ID) if the
+	 * connection drops mid-answer.
 	 */
 	stream: async (
 		data: ChatRequest,
@@ -123,80 +132,106 @@ export const chatApi = {
 	): Promise<{ traceId: string | null; conversationId: string | null }> => {
 		const token = localStorage.getItem('access_token');
 
-		const response = await fetch(`${API_BASE}/api/chat/stream`, {
-			method: 'POST',
-			headers: {
-				'Content-Type': 'application/json',
-				...(token && { Authorization: `Bearer ${token}` }),
-			},
-			body: JSON.stringify({ ...data, stream: true }),
-			signal: abortSignal,
-		});
+		let traceId: string | null = null;
+		let conversationId: string | null = null;
+		let lastEventId: string | null = null;
+		let resumeAttempts = 0;
+		const path = data.agent_slug ? '/api/chat/agent/stream' : '/api/chat/stream';
 
-		if (!response.ok) {
-			let message = 'Chat failed';
-			try {
-				const errorData = await response.json();
-				message = errorData.error || errorData.detail || message;
-			} catch {
-				message = await response.text();
+		while (true) {
+			const response = await fetch(`${API_BASE}${path}`, {
+				method: 'POST',
+				headers: {
+					'Content-Type': 'application/json',
+					...(token && { Authorization: `Bearer ${token}` }),
+					...(lastEventId && { 'Last-Event-ID': lastEventId }),
+				},
+				body: JSON.stringify({ ...data, stream: true }),
+				signal: abortSignal,
+			});
+
+			if (!response.ok) {
+				let message = 'Chat failed';
+				try {
+					const errorData = await response.json();
+					message = errorData.error || errorData.detail || message;
+				} catch {
+					message = await response.text();
+				}
+				throw new ApiException(response.status, message);
 			}
-			throw new ApiException(response.status, message);
-		}
 
-		const traceId = response.headers.get('X-Trace-Id');
-		const reader = response.body?.getReader();
-		const decoder = new TextDecoder();
+			traceId = traceId ?? response.headers.get('X-Trace-Id');
+			const reader = response.body?.getReader();
+			const decoder = new TextDecoder();
 
-		if (!reader) {
-			throw new Error('Response body is not readable');
-		}
+			if (!reader) {
+				throw new Error('Response body is not readable');
+			}
 
-		let buffer = '';
-		let conversationId: string | null = null;
+			let buffer = '';
 
-		while (true) {
-			const { done, value } = await reader.read();
-			if (done) break;
-
-			buffer += decoder.decode(value, { stream: true });
-
-			// Parse SSE events
-			const lines = buffer.split('\n\n');
-			buffer = lines.pop() || ''; // Keep incomplete line in buffer
-
-			for (const line of lines) {
-				if (line.startsWith('data: ')) {
-					try {
-						const data = JSON.parse(line.slice(6)) as StreamChunk;
-						// Capture conversation_id from first chunk
-						if (data.conversation_id && !conversationId) {
-							conversationId = data.conversation_id;
-						}
-						if (data.error) {
-							onError(data.error);
-							return { traceId, conversationId };
-						}
-						if (data.done) {
-							onDone({
-								conversation_id: conversationId || undefined,
-								sources: data.sources,
-								usage: data.usage,
-								latency: data.latency
-							});
-							return { traceId, conversationId };
+			try {
+				while (true) {
+					const { done, value } = await reader.read();
+					if (done) break;
+
+					buffer += decoder.decode(value, { stream: true });
+
+					// Parse SSE events (each may have an id: line before data:)
+					const events = buffer.split('\n\n');
+					buffer = events.pop() || ''; // Keep incomplete event in buffer
+
+					for (const event of events) {
+						let payload: string | null = null;
+						for (const line of event.split('\n')) {
+							if (line.startsWith('id: ')) {
+								lastEventId = line.slice(4);
+							} else if (line.startsWith('data: ')) {
+								payload = line.slice(6);
+							}
 						}
-						if (data.content) {
-							onChunk(data.content);
+						if (payload === null) continue;
+
+						try {
+							const data = JSON.parse(payload) as StreamChunk;
+							// Capture conversation_id from first chunk
+							if (data.conversation_id && !conversationId) {
+								conversationId = data.conversation_id;
+							}
+							if (data.error) {
+								onError(data.error);
+								return { traceId, conversationId };
+							}
+							if (data.done) {
+								onDone({
+									conversation_id: conversationId || undefined,
+									sources: data.sources,
+									usage: data.usage,
+									latency: data.latency
+								});
+								return { traceId, conversationId };
+							}
+							// Agent tool and thinking events are not part of the answer
+							if (data.content && (!data.type || data.type === 'content')) {
+								onChunk(data.content);
+							}
+						} catch (e) {
+							console.error('Failed to parse SSE data:', e);
 						}
-					} catch (e) {
-						console.error('Failed to parse SSE data:', e);
 					}
 				}
+			} catch (e) {
+				// Network drop: resume from the last received event
+				if (abortSignal?.aborted || !lastEventId || resumeAttempts >= MAX_RESUME_ATTEMPTS) {
+					throw e;
+				}
+				resumeAttempts++;
+				continue;
 			}
-		}
 
-		onDone({ conversation_id: conversationId || undefined });
-		return { traceId, conversationId };
+			onDone({ conversation_id: conversationId || undefined });
+			return { traceId, conversationId };
+		}
 	},
 };